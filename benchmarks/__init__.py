@@ -0,0 +1,12 @@
+"""Local benchmarks for the chat bot; run them with ``python3 -m benchmarks.<name>``."""
+
+import os
+
+# config.py refuses to import without credentials; benchmarks never reach Groq.
+for _name, _value in {
+    "GROQ_BOT1_KEY": "bench-bot1",
+    "GROQ_BOT2_KEY": "bench-bot2",
+    "CHAT_ADMIN_USERNAME": "bench",
+    "CHAT_ADMIN_PASSWORD": "bench",
+}.items():
+    os.environ.setdefault(_name, _value)
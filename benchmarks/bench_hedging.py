@@ -0,0 +1,82 @@
+"""Tail time-to-first-content with and without hedging to a fallback model.
+
+Usage: ``python3 -m benchmarks.bench_hedging [turns]``
+
+The mock answers the primary model quickly but stalls TAIL_RATE of all
+requests for TAIL_LATENCY seconds. "unhedged" waits those stalls out;
+"hedged" sends the same prompt to the fallback model once a reply is slower
+to start than the primary's observed p95 and keeps whichever starts first.
+Extra requests shows what the hedges cost in load.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import hedging
+from benchmarks.mock_groq import MockGroqServer
+from benchmarks.run_benchmarks import percentile
+
+PRIMARY = "mock-primary"
+FALLBACK = "mock-fallback"
+TAIL_RATE = 0.03
+TAIL_LATENCY = 1.5
+
+
+def _run(turns: int, extra: List[str]) -> Dict[str, Any]:
+    import chat
+    from groq_client import GroqClient
+
+    server = MockGroqServer(
+        model_latency={PRIMARY: 0.03, FALLBACK: 0.06},
+        tail_rate=TAIL_RATE,
+        tail_latency=TAIL_LATENCY,
+        seed=7,
+    ).start()
+    # Every run learns the p95 from scratch.
+    hedging._default_tracker = hedging.LatencyTracker()
+    args = chat.parse_args(["bench", "bot1", PRIMARY, str(turns), "0", "0", *extra])
+    client = GroqClient(server.endpoint)
+    ends: List[Dict[str, Any]] = []
+
+    def on_event(kind: str, data: Dict[str, Any]) -> None:
+        if kind == "turn_end":
+            ends.append(data)
+
+    started = time.monotonic()
+    try:
+        chat.run_conversation(args, out=open(os.devnull, "w"), client=client, on_event=on_event)
+    finally:
+        client.close()
+        server.stop()
+    elapsed = time.monotonic() - started
+    ttfb = [event["ttfb"] for event in ends]
+    return {
+        "turns": len(ends),
+        "ttfb_p50_ms": round(percentile(ttfb, 0.50) * 1000, 1),
+        "ttfb_p95_ms": round(percentile(ttfb, 0.95) * 1000, 1),
+        "ttfb_p99_ms": round(percentile(ttfb, 0.99) * 1000, 1),
+        "ttfb_max_ms": round(max(ttfb, default=0.0) * 1000, 1),
+        "hedged": sum(1 for event in ends if event.get("hedged")),
+        "fallback_wins": sum(1 for event in ends if event.get("winning_model") == FALLBACK),
+        "extra_requests": server.request_count - len(ends),
+        "wall_s": round(elapsed, 2),
+    }
+
+
+def main(argv: List[str]) -> None:
+    turns = int(argv[0]) if argv else 60
+    print(f"{TAIL_RATE:.0%} of requests stall {TAIL_LATENCY:g}s; {turns} turns each")
+    for name, extra in (
+        ("unhedged", ["--hedge-budget", "0"]),
+        ("hedged", ["--fallback-models", FALLBACK, "--hedge-budget", "0.2"]),
+        ("hedged stream", ["--fallback-models", FALLBACK, "--hedge-budget", "0.2", "--stream"]),
+    ):
+        print(f"{name:<14}", _run(turns, extra))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
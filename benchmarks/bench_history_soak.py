@@ -0,0 +1,73 @@
+"""Long-run soak: per-turn context assembly cost and memory, old list vs. ConversationHistory.
+
+Usage: ``python3 -m benchmarks.bench_history_soak [turns] [context_limit]``
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from conversation import OPENING_SPEAKER, ConversationHistory
+
+REPLY = "A typical reply of a few sentences that one bot sends to the other. " * 4
+
+
+def _legacy_turn(conversation: List[Dict[str, str]], context_limit: int) -> None:
+    """What chat_turn used to do on every turn, minus the HTTP call."""
+    if conversation and conversation[-1]["role"] == "assistant":
+        conversation.append({"role": "user", "content": conversation[-1]["content"]})
+    system_prompt = next((msg for msg in reversed(conversation) if msg["role"] == "system"), None)
+    recent_non_system = [msg for msg in conversation if msg["role"] != "system"]
+    context = recent_non_system[-context_limit:]
+    if system_prompt:
+        context = [system_prompt, *context]
+    conversation.append({"role": "assistant", "content": REPLY + str(len(conversation))})
+
+
+def _soak(label: str, turns: int, step: Callable[[int], None]) -> None:
+    tracemalloc.start()
+    checkpoints = {turns // 10, turns // 2, turns}
+    window_started = time.perf_counter()
+    window_first = 1
+    for turn in range(1, turns + 1):
+        step(turn)
+        if turn in checkpoints:
+            measured = turn - window_first + 1
+            per_turn_us = (time.perf_counter() - window_started) / measured * 1e6
+            current, _ = tracemalloc.get_traced_memory()
+            print(
+                f"{label:<8} turn {turn:>7}: {per_turn_us:8.2f} us/turn (last {measured})  heap={current / 1024:9.1f} KiB"
+            )
+        if turn % 1000 == 0:
+            window_started = time.perf_counter()
+            window_first = turn + 1
+    tracemalloc.stop()
+
+
+def main(argv: List[str]) -> None:
+    turns = int(argv[0]) if argv else 50_000
+    context_limit = int(argv[1]) if len(argv) > 1 else 6
+
+    conversation = [
+        {"role": "system", "content": "system prompt"},
+        {"role": "user", "content": "opening"},
+    ]
+    _soak("list", turns, lambda turn, conversation=conversation: _legacy_turn(conversation, context_limit))
+    del conversation
+
+    history = ConversationHistory("system prompt", context_limit)
+    history.record(OPENING_SPEAKER, "opening")
+
+    def history_turn(turn: int) -> None:
+        speaker = "bot1" if turn % 2 else "bot2"
+        history.context_for(speaker, context_limit)
+        history.record(speaker, REPLY + str(turn))
+
+    _soak("history", turns, history_turn)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
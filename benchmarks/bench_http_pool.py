@@ -0,0 +1,64 @@
+"""Per-turn latency of one-shot ``requests.post`` vs. the pooled GroqClient.
+
+Usage: ``python3 -m benchmarks.bench_http_pool [turns]``
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+import requests
+
+from benchmarks.mock_groq import MockGroqServer
+from groq_client import GroqClient
+
+BODY = {"model": "mock", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.3}
+
+
+def _measure(turns: int, call: Callable[[], requests.Response]) -> List[float]:
+    samples = []
+    for _ in range(turns):
+        started = time.perf_counter()
+        response = call()
+        response.raise_for_status()
+        response.json()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _report(label: str, samples: List[float], connections: int) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<14} mean={statistics.mean(samples) * 1000:7.2f} ms  "
+        f"p95={p95 * 1000:7.2f} ms  connections={connections}"
+    )
+
+
+def main(argv: List[str]) -> None:
+    turns = int(argv[0]) if argv else 200
+    server = MockGroqServer().start()
+    try:
+        headers = {"Authorization": "Bearer bench-bot1", "Content-Type": "application/json"}
+        one_shot = _measure(
+            turns, lambda: requests.post(server.endpoint, headers=headers, json=BODY, timeout=10)
+        )
+        _report("requests.post", one_shot, server.connection_count)
+
+        server.connection_count = 0
+        client = GroqClient(server.endpoint)
+        pooled = _measure(turns, lambda: client.post_chat("bench-bot1", BODY))
+        client.close()
+        _report("GroqClient", pooled, server.connection_count)
+
+        saved = statistics.mean(one_shot) - statistics.mean(pooled)
+        print(f"saved per turn: {saved * 1000:.2f} ms (plain HTTP; TLS handshakes add far more on a Pi)")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,131 @@
+"""LogBuffer memory footprint and snapshot latency under concurrent writers.
+
+Usage: ``python3 -m benchmarks.bench_log_buffer [seconds]``
+
+Reports the memory a full buffer holds (tracemalloc) next to a plain deque
+of ``str`` with the same lines, once for LCD-wrapped chat lines and once
+for error dumps of a few KB each. Then runs two writer threads appending
+as fast as they can alongside four readers calling ``snapshot()`` and
+``read_since()``.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, List
+
+from benchmarks.run_benchmarks import percentile
+from config import LCD_WIDTH, LOG_MAX_BYTES, LOG_MAX_LINES
+from log_buffer import LogBuffer, parse_cursor
+
+WRITERS = 2
+READERS = 4
+
+
+def _lines(count: int) -> List[str]:
+    rng = random.Random(3)
+    words = "the quick brown fox jumps over a lazy dog while groq answers politely".split()
+    return [
+        f"[Bot {index % 2 + 1} 12:{index % 60:02d}:00] "
+        + " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))[:LCD_WIDTH]
+        for index in range(count)
+    ]
+
+
+def _dumps(count: int) -> List[str]:
+    rng = random.Random(4)
+    return ["[Groq error] 500 " + "<html>upstream failure</html> " * rng.randint(30, 130) for _ in range(count)]
+
+
+def _footprint(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del held
+    return used
+
+
+def main(argv: List[str]) -> None:
+    seconds = float(argv[0]) if argv else 3.0
+    lines = _lines(LOG_MAX_LINES * 4)
+    print(f"{LOG_MAX_LINES} lines max, ring of {LOG_MAX_BYTES} bytes")
+    for name, sample in (("chat lines", lines), ("error dumps", _dumps(LOG_MAX_LINES * 2))):
+
+        def fill_deque() -> object:
+            held: deque = deque(maxlen=LOG_MAX_LINES)
+            for line in sample:
+                # A fresh str per line, as the log produces them.
+                held.append(line.encode("utf-8").decode("utf-8"))
+            return held
+
+        def fill_buffer() -> object:
+            buffer = LogBuffer(LOG_MAX_LINES, max_bytes=LOG_MAX_BYTES)
+            buffer.extend(sample)
+            return buffer
+
+        print(
+            f"{name:<12} deque of str: {_footprint(fill_deque) / 1024:8.1f} KiB   "
+            f"LogBuffer: {_footprint(fill_buffer) / 1024:8.1f} KiB"
+        )
+
+    buffer = LogBuffer(LOG_MAX_LINES, max_bytes=LOG_MAX_BYTES)
+    buffer.extend(lines)
+    stop = threading.Event()
+    appended = [0] * WRITERS
+    snapshots: List[float] = []
+    increments: List[float] = []
+    lock = threading.Lock()
+
+    def writer(index: int) -> None:
+        position = index
+        while not stop.is_set():
+            buffer.append(lines[position % len(lines)])
+            position += WRITERS
+            appended[index] += 1
+            if position % 64 == 0:
+                time.sleep(0)  # let readers in, as a real producer would
+
+    def reader() -> None:
+        generation, seq = parse_cursor(buffer.cursor())
+        local_snapshots, local_increments = [], []
+        while not stop.is_set():
+            started = time.perf_counter()
+            buffer.snapshot()
+            local_snapshots.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            log_slice = buffer.read_since(generation, seq)
+            local_increments.append(time.perf_counter() - started)
+            generation, seq = log_slice.generation, log_slice.last_seq
+        with lock:
+            snapshots.extend(local_snapshots)
+            increments.extend(local_increments)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    def summary(samples: List[float]) -> str:
+        return (
+            f"p50={percentile(samples, 0.50) * 1e6:7.1f} us  p95={percentile(samples, 0.95) * 1e6:7.1f} us  "
+            f"p99={percentile(samples, 0.99) * 1e6:7.1f} us  n={len(samples)}"
+        )
+
+    print(f"appends/s:   {sum(appended) / seconds:,.0f} ({WRITERS} writers, {READERS} readers)")
+    print(f"snapshot():   {summary(snapshots)}")
+    print(f"read_since(): {summary(increments)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
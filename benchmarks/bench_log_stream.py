@@ -0,0 +1,133 @@
+"""Load test for /logs/stream: many concurrent SSE viewers against the panel.
+
+Usage: ``python3 -m benchmarks.bench_log_stream [viewers ...]``
+
+The panel runs in a child process (so its CPU and RSS can be read from
+/proc) with a thread appending timestamped log lines; each viewer measures
+how long a line took from append to arrival.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import requests
+
+LINES_PER_SECOND = 20
+DURATION = 5.0
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def _serve(port: int) -> None:
+    import control_panel
+
+    def produce() -> None:
+        while True:
+            control_panel.log_buffer.append(f"bench {time.time():.6f}")
+            time.sleep(1 / LINES_PER_SECOND)
+
+    threading.Thread(target=produce, daemon=True).start()
+    control_panel.app.run(host="127.0.0.1", port=port, threaded=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as handle:
+        fields = handle.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+
+def _rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _viewer(url: str, stop: threading.Event, latencies: List[float]) -> None:
+    try:
+        with requests.get(url, stream=True, timeout=30) as response:
+            for raw in response.iter_lines(chunk_size=None):
+                if stop.is_set():
+                    return
+                if not raw.startswith(b"data:"):
+                    continue
+                received = time.time()
+                data = json.loads(raw[5:])
+                if data.get("reset"):
+                    continue
+                for line in data["lines"]:
+                    latencies.append(received - float(line.split()[1]))
+    except requests.RequestException:
+        return
+
+
+def _run(port: int, pid: int, viewers: int) -> Dict[str, float]:
+    url = f"http://127.0.0.1:{port}/logs/stream"
+    stop = threading.Event()
+    latencies: List[float] = []
+    threads = [
+        threading.Thread(target=_viewer, args=(url, stop, latencies), daemon=True)
+        for _ in range(viewers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    cpu_before = _cpu_seconds(pid)
+    latencies.clear()
+    time.sleep(DURATION)
+    cpu_used = _cpu_seconds(pid) - cpu_before
+    stop.set()
+    ordered = sorted(latencies) or [0.0]
+    return {
+        "viewers": viewers,
+        "cpu_percent": round(100 * cpu_used / DURATION, 1),
+        "rss_kib": _rss_kib(pid),
+        "lines_delivered": len(latencies),
+        "latency_p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "latency_p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main(argv: List[str]) -> None:
+    if argv[:1] == ["--serve"]:
+        _serve(int(argv[1]))
+        return
+
+    counts = [int(arg) for arg in argv] or [1, 12, 48]
+    port = _free_port()
+    child = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_log_stream", "--serve", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"http://127.0.0.1:{port}/logs", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        for viewers in counts:
+            print(json.dumps(_run(port, child.pid, viewers)))
+    finally:
+        child.terminate()
+        child.wait()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,100 @@
+"""Sustained turn rate and 429 count with and without rate-limit pacing.
+
+Usage: ``python3 -m benchmarks.bench_pacing [turns]``
+
+Each key gets RPM_LIMIT requests per (shortened) rate window from the mock.
+"unpaced" runs with delay 0 and relies on retries alone; "paced" lets the
+pacer schedule turns from the x-ratelimit-* headers. "shared" drains bot2's
+key first and compares waiting for it with borrowing bot1's.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks import mock_groq
+from benchmarks.mock_groq import MockGroqServer
+
+RPM_LIMIT = 10
+mock_groq.RATE_WINDOW_SECONDS = 5.0
+
+
+class _NoPacing:
+    def attach(self, client):
+        return self
+
+    def detach(self, client) -> None:
+        pass
+
+    def choose_key(self, own_key, other_keys, tokens):
+        return own_key, 0.0
+
+
+def _run(server: MockGroqServer, turns: int, extra: List[str], *, paced: bool = True) -> Dict[str, float]:
+    import chat
+    from groq_client import GroqClient
+
+    args = chat.parse_args(["bench", "bot1", "mock", str(turns), "0", "0", *extra])
+    client = GroqClient(server.endpoint, backoff_base=0.05)
+    pacer_factory = chat.RateLimitPacer
+    if not paced:
+        chat.RateLimitPacer = lambda **kwargs: _NoPacing()
+    limited_before = server.rate_limited_count
+    events: List[str] = []
+    started = time.monotonic()
+    try:
+        chat.run_conversation(
+            args, out=open(os.devnull, "w"), client=client, on_event=lambda kind, data: events.append(kind)
+        )
+    finally:
+        chat.RateLimitPacer = pacer_factory
+        client.close()
+    elapsed = time.monotonic() - started
+    return {
+        "turns": events.count("turn_end"),
+        "failed_turns": events.count("turn_error"),
+        "http_429s": server.rate_limited_count - limited_before,
+        "turns_per_sec": round(events.count("turn_end") / elapsed, 2),
+        "wall_s": round(elapsed, 2),
+    }
+
+
+def _drain(server: MockGroqServer, api_key: str) -> None:
+    import requests
+
+    body = {"model": "mock", "messages": [{"role": "user", "content": "hi"}]}
+    while requests.post(server.endpoint, json=body, headers={"Authorization": f"Bearer {api_key}"}).status_code != 429:
+        pass
+
+
+def main(argv: List[str]) -> None:
+    turns = int(argv[0]) if argv else 40
+    sustained = 2 * RPM_LIMIT / mock_groq.RATE_WINDOW_SECONDS
+    print(f"limit: {RPM_LIMIT} requests per {mock_groq.RATE_WINDOW_SECONDS:g}s per key "
+          f"(sustained max {sustained:.1f} turns/s with both keys)")
+    for name, extra, paced in (("unpaced", [], False), ("paced", ["--min-delay", "0"], True)):
+        server = MockGroqServer(rpm_limit=RPM_LIMIT).start()
+        try:
+            print(f"{name:<14}", _run(server, turns, extra, paced=paced))
+        finally:
+            server.stop()
+
+    from config import GROQ_API_KEYS
+
+    for name, extra in (
+        ("bot2 drained", ["--min-delay", "0"]),
+        ("+ share-keys", ["--min-delay", "0", "--share-keys"]),
+    ):
+        server = MockGroqServer(rpm_limit=RPM_LIMIT).start()
+        try:
+            _drain(server, GROQ_API_KEYS["bot2"])
+            print(f"{name:<14}", _run(server, 6, extra))
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
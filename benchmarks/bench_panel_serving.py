@@ -0,0 +1,129 @@
+"""Requests/sec and latency of the control panel's ``/`` and ``/logs``.
+
+Usage: ``python3 -m benchmarks.bench_panel_serving [seconds] [clients]``
+
+Each server runs the panel in a child process with a full log buffer and is
+hammered by ``clients`` threads for ``seconds`` per path. "dev" is the
+previous setup: Flask's development server, the page rendered on every
+request and nothing compressed. "builtin" and "waitress" serve through
+:mod:`panel_server` with the cached page render and gzip.
+"""
+
+from __future__ import annotations
+
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+import requests
+
+from benchmarks.run_benchmarks import percentile
+
+LOG_LINES = 200
+PATHS = ("/", "/logs")
+
+
+def _serve(mode: str, port: int) -> None:
+    import control_panel
+    from panel_server import serve
+
+    control_panel.is_authenticated = True
+    for index in range(LOG_LINES):
+        control_panel.log_buffer.append(f"[Bot {index % 2 + 1} 12:00:{index % 60:02d}] " + "Some chat text. " * 8)
+    if mode == "dev":
+        control_panel.PAGE_CACHE_SIZE = 0
+    serve(control_panel.app, "127.0.0.1", port, server=mode)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(base + "/logs", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.05)
+    raise TimeoutError("panel did not come up")
+
+
+def _hammer(url: str, seconds: float, clients: int, headers: Dict[str, str]) -> Dict[str, Any]:
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def client() -> None:
+        nonlocal errors
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, headers=headers, timeout=10, stream=True)
+                raw = response.raw.read()
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok, raw = False, b""
+            elapsed = time.perf_counter() - started
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                    sizes.append(len(raw))
+                else:
+                    errors += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "rps": round(len(latencies) / seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "bytes": int(sum(sizes) / len(sizes)) if sizes else 0,
+        "errors": errors,
+    }
+
+
+def _run(mode: str, seconds: float, clients: int) -> List[Tuple[str, Dict[str, Any]]]:
+    port = _free_port()
+    child = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_panel_serving", "--serve", mode, str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    # The old setup never compressed; ask it for the identity encoding.
+    headers = {"Accept-Encoding": "identity" if mode == "dev" else "gzip"}
+    try:
+        _wait_ready(base)
+        return [(path, _hammer(base + path, seconds, clients, headers)) for path in PATHS]
+    finally:
+        child.terminate()
+        child.wait()
+
+
+def main(argv: List[str]) -> None:
+    if argv[:1] == ["--serve"]:
+        _serve(argv[1], int(argv[2]))
+        return
+    seconds = float(argv[0]) if argv else 5.0
+    clients = int(argv[1]) if len(argv) > 1 else 16
+    print(f"{clients} clients, {seconds:g}s per path, {LOG_LINES} log lines")
+    for mode in ("dev", "builtin", "waitress"):
+        for path, result in _run(mode, seconds, clients):
+            print(f"{mode:<9} {path:<6}", result)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
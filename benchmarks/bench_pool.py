@@ -0,0 +1,84 @@
+"""Many conversations at once in one process through ConversationPool.
+
+Usage: ``python3 -m benchmarks.bench_pool [conversations ...]``
+
+Every conversation is headless, types at a realistic pace and talks to the
+mock endpoint; reports the aggregate turn rate, this process's CPU%, RSS and
+thread count, and how many TCP connections the shared client opened.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.mock_groq import MockGroqServer
+
+DURATION = 10.0
+REPLY = "Sure, and that reminds me of something else worth discussing about it."
+
+
+def _rss_kib() -> int:
+    with open("/proc/self/status") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _run(server: MockGroqServer, count: int) -> Dict[str, float]:
+    from chat_events import TurnCompleted
+    from config import load_control_defaults
+    from conversation_pool import ConversationPool
+
+    pool = ConversationPool(max_conversations=count)
+    chat_config = load_control_defaults()
+    chat_config.update(max_turns=0, delay=0.5, typing_speed=0.01, stream=False, pipeline=False)
+    completed: List[int] = []
+    for index in range(count):
+        conversation = pool.create(dict(chat_config, topic=f"topic {index}"))
+        conversation.runner.add_event_listener(
+            lambda event: completed.append(1) if isinstance(event, TurnCompleted) else None
+        )
+    connections_before = server.connection_count
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.monotonic()
+    for conversation in pool.conversations():
+        pool.start(conversation.id)
+    time.sleep(DURATION)
+    threads = threading.active_count()
+    rss = _rss_kib()
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    elapsed = time.monotonic() - started
+    pool.stop_all()
+    pool.client.close()
+    cpu = (usage.ru_utime - usage_before.ru_utime) + (usage.ru_stime - usage_before.ru_stime)
+    return {
+        "conversations": count,
+        "turns_per_sec": round(len(completed) / elapsed, 2),
+        "cpu_percent": round(100 * cpu / elapsed, 1),
+        "rss_kib": rss,
+        "threads": threads,
+        "tcp_connections": server.connection_count - connections_before,
+    }
+
+
+def main(argv: List[str]) -> None:
+    counts = [int(arg) for arg in argv] or [1, 8, 32]
+    server = MockGroqServer(latency=0.3, reply=REPLY).start()
+    server.tokens_per_second = 200
+    os.environ["GROQ_ENDPOINT"] = server.endpoint
+    try:
+        for count in counts:
+            print(json.dumps(_run(server, count)))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
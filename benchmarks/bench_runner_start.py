@@ -0,0 +1,76 @@
+"""Click-to-first-reply latency of ChatRunner's start modes.
+
+Usage: ``python3 -m benchmarks.bench_runner_start [rounds]``
+
+"subprocess" launches chat.py cold on every start, "standby" hands the
+settings to a pre-started chat.py that already has its imports done and its
+API connection open, and "inprocess" runs the engine on a thread. With no
+delay and instant typing the first reply line is also the first character.
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import time
+from typing import List, Tuple
+
+from benchmarks.mock_groq import MockGroqServer
+
+
+def _first_reply_latency(runner, log_buffer, chat_config, timeout: float = 30.0) -> float:
+    started = time.perf_counter()
+    runner.start(chat_config)
+    try:
+        while time.perf_counter() - started < timeout:
+            if any(line.startswith("[Bot") for line in log_buffer.snapshot()):
+                return time.perf_counter() - started
+            time.sleep(0.002)
+        raise TimeoutError("no reply reached the log")
+    finally:
+        runner.stop()
+
+
+# Time between clicks, so a fresh standby is warm again before the next start.
+STANDBY_SETTLE = 2.0
+
+MODES: Tuple[Tuple[str, str, bool], ...] = (
+    ("subprocess", "subprocess", False),
+    ("standby", "subprocess", True),
+    ("inprocess", "inprocess", False),
+)
+
+
+def main(argv: List[str]) -> None:
+    rounds = int(argv[0]) if argv else 5
+    server = MockGroqServer().start()
+    # Both the child process and this one must talk to the mock, not Groq.
+    os.environ["GROQ_ENDPOINT"] = server.endpoint
+
+    from chat_runner import ChatRunner
+    from config import load_control_defaults
+    from log_buffer import LogBuffer
+
+    chat_config = load_control_defaults()
+    chat_config.update(max_turns=1, delay=0, typing_speed=0)
+    try:
+        for name, mode, standby in MODES:
+            log_buffer = LogBuffer(200)
+            runner = ChatRunner(log_buffer, mode=mode, standby=standby, journal=None)
+            samples = []
+            for _ in range(rounds):
+                runner.prepare()
+                if standby:
+                    time.sleep(STANDBY_SETTLE)
+                samples.append(_first_reply_latency(runner, log_buffer, chat_config))
+            print(
+                f"{name:<11} click-to-first-reply: median={statistics.median(samples) * 1000:8.1f} ms  "
+                f"max={max(samples) * 1000:8.1f} ms"
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
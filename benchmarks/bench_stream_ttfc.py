@@ -0,0 +1,67 @@
+"""Time-to-first-character on the display, buffered vs. streamed completions.
+
+Usage: ``python3 -m benchmarks.bench_stream_ttfc [token_delay_seconds]``
+"""
+
+from __future__ import annotations
+
+import io
+import sys
+import time
+from typing import List
+
+import chat
+from benchmarks.mock_groq import MockGroqServer
+from groq_client import GroqClient
+
+REPLY = " ".join(["Streaming lets the display start typing long before generation ends."] * 4)
+
+
+class _FirstGlyphClock(io.StringIO):
+    """Captures output and remembers when the first reply character appeared."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.first_glyph_at: float | None = None
+
+    def write(self, text: str) -> int:
+        if self.first_glyph_at is None and text.strip() and chat.GREEN + "[" not in text:
+            self.first_glyph_at = time.perf_counter()
+        return super().write(text)
+
+
+def _run(client: GroqClient, stream: bool) -> float:
+    out = _FirstGlyphClock()
+    sys.stdout = out
+    try:
+        started = time.perf_counter()
+        history = chat.build_initial_conversation("benchmarks")
+        typer = chat.StreamTyper("Bot 1", 0.0) if stream else None
+        reply = chat.chat_turn(
+            history, "bot1", "mock", "bench-bot1", 6, 0.3, 0, client=client,
+            on_delta=typer.feed if typer else None,
+        )
+        if typer is None:
+            chat.type_text(reply, "Bot 1", 0.0)
+        else:
+            typer.finish()
+    finally:
+        sys.stdout = sys.__stdout__
+    assert out.first_glyph_at is not None
+    return out.first_glyph_at - started
+
+
+def main(argv: List[str]) -> None:
+    token_delay = float(argv[0]) if argv else 0.02
+    server = MockGroqServer(token_delay=token_delay, reply=REPLY).start()
+    client = GroqClient(server.endpoint)
+    try:
+        for label, stream in (("buffered", False), ("streamed", True)):
+            print(f"{label:<9} time-to-first-character: {_run(client, stream) * 1000:8.1f} ms")
+    finally:
+        client.close()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,321 @@
+"""Minimal local stand-in for the OpenAI-compatible Groq completions endpoint.
+
+Run it on its own with ``python3 -m benchmarks.mock_groq [--port N ...]`` and
+point ``GROQ_ENDPOINT`` at the URL it prints.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+RATE_WINDOW_SECONDS = 60.0
+
+
+class _RateBucket:
+    """Per-key limit that refills continuously, ``capacity`` per window, like Groq's."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = float(capacity)
+        self.rate = capacity / RATE_WINDOW_SECONDS
+        self.level = float(capacity)
+        self._updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        return max(amount - self.level, 0.0) / self.rate
+
+    def reset_in(self) -> float:
+        return (self.capacity - self.level) / self.rate
+
+
+class MockGroqServer(ThreadingHTTPServer):
+    """Threaded HTTP/1.1 server answering chat completion POSTs.
+
+    ``latency`` is slept before answering and ``token_delay`` between streamed
+    tokens (or per token before a non-streamed reply). ``error_rate`` answers
+    that fraction of requests with one of ``error_statuses``, and
+    :meth:`fail_next` queues specific failures. With ``rpm_limit`` or
+    ``tpm_limit`` set, every response carries Groq's ``x-ratelimit-*``
+    headers and requests over the per-key limit get a 429 with
+    ``retry-after``; like Groq's, the limits refill continuously over a
+    minute (``RATE_WINDOW_SECONDS``). ``model_latency`` overrides
+    ``latency`` per requested model, and ``tail_rate`` of all requests stall
+    for an extra ``tail_latency`` first, like a slow replica would.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        *,
+        latency: float = 0.0,
+        token_delay: float = 0.0,
+        reply: str = "Hello from the mock.",
+        error_rate: float = 0.0,
+        error_statuses: Tuple[int, ...] = (500, 503),
+        rpm_limit: int = 0,
+        tpm_limit: int = 0,
+        model_latency: Optional[Dict[str, float]] = None,
+        tail_rate: float = 0.0,
+        tail_latency: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply = reply
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.model_latency = dict(model_latency or {})
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.request_count = 0
+        self.connection_count = 0
+        self.error_count = 0
+        self.rate_limited_count = 0
+        self._random = random.Random(seed)
+        self._scripted: List[int] = []
+        self._buckets: Dict[str, Tuple[Optional[_RateBucket], Optional[_RateBucket]]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def handle_error(self, request, client_address) -> None:
+        # A client that hangs up mid-reply (a cancelled hedge, a stopped
+        # conversation) is expected; anything else is still reported.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/openai/v1/chat/completions"
+
+    def start(self) -> "MockGroqServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def tokens_per_second(self) -> float:
+        return 1 / self.token_delay if self.token_delay else 0.0
+
+    @tokens_per_second.setter
+    def tokens_per_second(self, rate: float) -> None:
+        self.token_delay = 1 / rate if rate > 0 else 0.0
+
+    def fail_next(self, status: int, count: int = 1) -> None:
+        """Answer the next ``count`` requests with ``status``."""
+        with self._lock:
+            self._scripted.extend([status] * count)
+
+    def latency_for(self, body: Dict[str, Any]) -> float:
+        """Seconds to stall before answering a request for ``body``'s model."""
+        latency = self.model_latency.get(str(body.get("model", "")), self.latency)
+        with self._lock:
+            if self.tail_rate and self._random.random() < self.tail_rate:
+                latency += self.tail_latency
+        return latency
+
+    def admit(self, api_key: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, str]]:
+        """Decide the status for one request and the rate-limit headers to send."""
+        cost = _prompt_tokens(body) + len(_tokens(self.reply))
+        with self._lock:
+            self.request_count += 1
+            headers: Dict[str, str] = {}
+            status = 200
+            if self.rpm_limit or self.tpm_limit:
+                requests_bucket, tokens_bucket = self._buckets.setdefault(
+                    api_key,
+                    (
+                        _RateBucket(self.rpm_limit) if self.rpm_limit else None,
+                        _RateBucket(self.tpm_limit) if self.tpm_limit else None,
+                    ),
+                )
+                wait = 0.0
+                for bucket, amount in ((requests_bucket, 1), (tokens_bucket, cost)):
+                    if bucket is not None:
+                        bucket.refill()
+                        wait = max(wait, bucket.wait_for(amount))
+                if wait > 0:
+                    status = 429
+                    self.rate_limited_count += 1
+                    headers["retry-after"] = str(max(int(wait + 0.999), 1))
+                else:
+                    for bucket, amount in ((requests_bucket, 1), (tokens_bucket, cost)):
+                        if bucket is not None:
+                            bucket.level -= amount
+                for name, bucket in (("requests", requests_bucket), ("tokens", tokens_bucket)):
+                    if bucket is not None:
+                        headers[f"x-ratelimit-limit-{name}"] = str(int(bucket.capacity))
+                        headers[f"x-ratelimit-remaining-{name}"] = str(int(bucket.level))
+                        headers[f"x-ratelimit-reset-{name}"] = f"{bucket.reset_in():.2f}s"
+            if status == 200:
+                if self._scripted:
+                    status = self._scripted.pop(0)
+                elif self.error_rate and self._random.random() < self.error_rate:
+                    status = self._random.choice(self.error_statuses)
+                if status != 200:
+                    self.error_count += 1
+            return status, headers
+
+    def completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"mock-{self.request_count}",
+            "object": "chat.completion",
+            "model": body.get("model", "mock"),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": self.reply}, "finish_reason": "stop"}
+            ],
+            "usage": self.usage(body),
+        }
+
+    def usage(self, body: Dict[str, Any]) -> Dict[str, int]:
+        prompt = _prompt_tokens(body)
+        completion = len(_tokens(self.reply))
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into word-sized pieces, roughly how a model streams it."""
+    return re.findall(r"\S+\s*|\s+", text)
+
+
+def _prompt_tokens(body: Dict[str, Any]) -> int:
+    chars = sum(len(str(message.get("content") or "")) for message in body.get("messages", []))
+    return chars // 4 + 4 * len(body.get("messages", []))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockGroqServer
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle stall them.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connection_count += 1
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        # The model listing clients use to warm their connections.
+        self._send_json(200, {}, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        api_key = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        status, headers = self.server.admit(api_key, body)
+        latency = self.server.latency_for(body)
+        if latency:
+            time.sleep(latency)
+        if status != 200:
+            self._send_json(status, headers, _error_body(status))
+            return
+        if body.get("stream"):
+            self._stream_reply(body, headers)
+            return
+        # Without streaming the whole generation happens before the response.
+        time.sleep(self.server.token_delay * len(_tokens(self.server.reply)))
+        self._send_json(200, headers, self.server.completion(body))
+
+    def _send_json(self, status: int, headers: Dict[str, str], data: Dict[str, Any]) -> None:
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream_reply(self, body: Dict[str, Any], headers: Dict[str, str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        for token in _tokens(self.server.reply):
+            time.sleep(self.server.token_delay)
+            chunk = {
+                "object": "chat.completion.chunk",
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "delta": {"content": token}}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        final = {
+            "object": "chat.completion.chunk",
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "x_groq": {"usage": self.server.usage(body)},
+        }
+        self._write_chunk(f"data: {json.dumps(final)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+
+def _error_body(status: int) -> Dict[str, Any]:
+    kind = "rate_limit_exceeded" if status == 429 else "server_error"
+    return {"error": {"message": f"Mock error {status}", "type": kind, "code": kind}}
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Run the mock Groq endpoint in the foreground.")
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before answering.")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 = no per-token delay.")
+    parser.add_argument("--reply", default="Hello from the mock.")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rpm-limit", type=int, default=0)
+    parser.add_argument("--tpm-limit", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    server = MockGroqServer(
+        args.port,
+        latency=args.latency,
+        reply=args.reply,
+        error_rate=args.error_rate,
+        rpm_limit=args.rpm_limit,
+        tpm_limit=args.tpm_limit,
+        seed=args.seed,
+    )
+    server.tokens_per_second = args.tokens_per_second
+    print(f"GROQ_ENDPOINT={server.endpoint}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+__all__ = ["MockGroqServer"]
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
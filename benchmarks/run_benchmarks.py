@@ -0,0 +1,333 @@
+"""End-to-end benchmark suite run against the local mock Groq endpoint.
+
+Usage: ``python3 -m benchmarks.run_benchmarks [--turns N] [--rounds N]
+[--output PATH] [--compare OLD.json]``
+
+Drives ``chat.py`` as a subprocess, ``ChatRunner`` in both modes and the
+Flask control panel, and writes p50/p95 latencies, rendered chars/sec, CPU%
+and RSS as JSON (``benchmarks/results/<timestamp>.json`` by default), so two
+runs can be diffed with ``--compare``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from benchmarks.mock_groq import MockGroqServer
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ANSI_RE = re.compile(r"\x1B(?:\[[0-?]*[ -/]*[@-~]|c)")
+
+REPLY = (
+    "That is a fascinating question, and I think the answer depends on how we frame it. "
+    "If we look at the history, small changes compounded into large ones over decades, "
+    "and nobody at the time noticed the turning point until long after it had passed."
+)
+MOCK_LATENCY = 0.05
+MOCK_TOKENS_PER_SECOND = 400.0
+TYPING_SPEED = 0.002
+PANEL_REQUESTS = 200
+
+
+def percentile(samples: Iterable[float], fraction: float) -> float:
+    """Nearest-rank percentile; 0.0 for no samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(max(int(round(fraction * len(ordered) + 0.5)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+def _summary_ms(samples: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+        "samples": len(samples),
+    }
+
+
+def _self_rss_kib() -> int:
+    with open("/proc/self/status") as handle:
+        for line in handle:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _cpu_seconds(who: int) -> float:
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+
+
+# --- chat.py -------------------------------------------------------------
+
+
+def bench_chat_cli(turns: int, stream: bool) -> Dict[str, Any]:
+    """Run chat.py end to end and read its turn events and display output."""
+    events_read, events_write = os.pipe()
+    args = [
+        sys.executable, str(ROOT / "chat.py"), "benchmarks", "bot1", "mock-model",
+        str(turns), "0", str(TYPING_SPEED), "6", "0.3", "256",
+        "--events-fd", str(events_write),
+    ]
+    if stream:
+        args.append("--stream")
+    started = time.monotonic()
+    proc = subprocess.Popen(
+        args, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        text=True, pass_fds=(events_write,),
+    )
+    os.close(events_write)
+
+    events: List[Dict[str, Any]] = []
+
+    def read_events() -> None:
+        with open(events_read, encoding="utf-8") as handle:
+            events.extend(json.loads(line) for line in handle if line.strip())
+
+    reader = threading.Thread(target=read_events, daemon=True)
+    reader.start()
+    assert proc.stdout is not None
+    rendered = sum(len(ANSI_RE.sub("", line).strip()) for line in proc.stdout)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.monotonic() - started
+    reader.join(timeout=5)
+
+    starts = {event["turn"]: event["ts"] for event in events if event["event"] == "turn_start"}
+    ends = [event for event in events if event["event"] == "turn_end"]
+    turn_times = [event["ts"] - starts[event["turn"]] for event in ends if event["turn"] in starts]
+    typing_window = sum(turn_times) or elapsed
+    return {
+        "turns": len(ends),
+        "errors": sum(1 for event in events if event["event"] == "turn_error"),
+        "turn_latency": _summary_ms(turn_times),
+        "api_latency": _summary_ms([event["api_latency"] for event in ends]),
+        "ttfb": _summary_ms([event["ttfb"] for event in ends]),
+        "chars_per_sec": round(rendered / typing_window, 1),
+        "cpu_percent": round(100 * (usage.ru_utime + usage.ru_stime) / elapsed, 1),
+        "rss_kib": usage.ru_maxrss,
+        "wall_s": round(elapsed, 3),
+    }
+
+
+# --- ChatRunner ----------------------------------------------------------
+
+
+def bench_runner(mode: str, turns: int, rounds: int) -> Dict[str, Any]:
+    """Start/stop ChatRunner ``rounds`` times and time each conversation."""
+    from chat_events import TurnCompleted, TurnStarted
+    from chat_runner import ChatRunner
+    from config import load_control_defaults
+    from log_buffer import LogBuffer
+
+    chat_config = load_control_defaults()
+    chat_config.update(max_turns=turns, delay=0, typing_speed=TYPING_SPEED, stream=False)
+    log_buffer = LogBuffer(500)
+    # Every round starts afresh rather than resuming the previous one.
+    runner = ChatRunner(log_buffer, mode=mode, journal=None)
+
+    lock = threading.Lock()
+    turn_started: Dict[int, float] = {}
+    turn_times: List[float] = []
+    first_reply = threading.Event()
+    done = threading.Event()
+
+    def listener(event) -> None:
+        now = time.monotonic()
+        with lock:
+            if isinstance(event, TurnStarted):
+                turn_started[event.turn] = now
+            elif isinstance(event, TurnCompleted):
+                if event.turn in turn_started:
+                    turn_times.append(now - turn_started.pop(event.turn))
+                first_reply.set()
+                if event.turn + 1 >= turns:
+                    done.set()
+
+    runner.add_event_listener(listener)
+    startup: List[float] = []
+    cpu_before = _cpu_seconds(resource.RUSAGE_SELF) + _cpu_seconds(resource.RUSAGE_CHILDREN)
+    wall_started = time.monotonic()
+    for _ in range(rounds):
+        first_reply.clear()
+        done.clear()
+        started = time.monotonic()
+        runner.start(chat_config)
+        if first_reply.wait(30):
+            startup.append(time.monotonic() - started)
+        done.wait(60)
+        runner.stop()
+    wall = time.monotonic() - wall_started
+    cpu_used = (
+        _cpu_seconds(resource.RUSAGE_SELF) + _cpu_seconds(resource.RUSAGE_CHILDREN) - cpu_before
+    )
+    rss = _self_rss_kib()
+    if mode == "subprocess":
+        rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "rounds": rounds,
+        "start_to_first_turn": _summary_ms(startup),
+        "turn_latency": _summary_ms(turn_times),
+        "cpu_percent": round(100 * cpu_used / wall, 1),
+        "rss_kib": rss,
+    }
+
+
+# --- control panel -------------------------------------------------------
+
+
+def bench_control_panel(requests_per_route: int) -> Dict[str, Any]:
+    """Time the panel's routes through Flask's test client (no sockets)."""
+    import control_panel
+
+    buffer = control_panel.log_buffer
+    buffer.clear()
+    buffer.extend(f"[Bot 1]: benchmark line {index} " + "x" * 40 for index in range(buffer.max_lines))
+    control_panel.is_authenticated = True
+    client = control_panel.app.test_client()
+
+    def timed(run) -> List[float]:
+        samples = []
+        for _ in range(requests_per_route):
+            started = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    def logs_full() -> None:
+        assert client.get("/logs").status_code == 200
+
+    def logs_unchanged() -> None:
+        cursor = buffer.cursor()
+        response = client.get(f"/logs?since={cursor}", headers={"If-None-Match": f'"{cursor}"'})
+        assert response.status_code == 304
+
+    def logs_incremental() -> None:
+        cursor = buffer.cursor()
+        buffer.append("[Bot 2]: a new line")
+        assert client.get(f"/logs?since={cursor}").status_code == 200
+
+    def index_page() -> None:
+        assert client.get("/").status_code == 200
+
+    cpu_before = _cpu_seconds(resource.RUSAGE_SELF)
+    wall_started = time.monotonic()
+    results: Dict[str, Any] = {
+        "logs_full": _summary_ms(timed(logs_full)),
+        "logs_not_modified": _summary_ms(timed(logs_unchanged)),
+        "logs_incremental": _summary_ms(timed(logs_incremental)),
+        "index": _summary_ms(timed(index_page)),
+    }
+    wall = time.monotonic() - wall_started
+    results["cpu_percent"] = round(100 * (_cpu_seconds(resource.RUSAGE_SELF) - cpu_before) / wall, 1)
+    results["rss_kib"] = _self_rss_kib()
+    return results
+
+
+# --- reporting -----------------------------------------------------------
+
+
+def _flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Text table of every numeric result present in both runs."""
+    before, after = _flatten(old.get("results", {})), _flatten(new.get("results", {}))
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        change = (after[name] - before[name]) / before[name] * 100 if before[name] else 0.0
+        rows.append(f"{name:<55} {before[name]:>12.2f} {after[name]:>12.2f} {change:>+8.1f}%")
+    return rows
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+            timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite.")
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None, help="Earlier results JSON to diff against.")
+    args = parser.parse_args(argv)
+
+    server = MockGroqServer(latency=MOCK_LATENCY, reply=REPLY).start()
+    server.tokens_per_second = MOCK_TOKENS_PER_SECOND
+    # chat.py children and the modules imported below must all use the mock.
+    os.environ["GROQ_ENDPOINT"] = server.endpoint
+    os.environ["CHAT_CACHE_MODE"] = "passthrough"
+
+    results: Dict[str, Any] = {}
+    try:
+        results["chat_cli"] = bench_chat_cli(args.turns, stream=False)
+        results["chat_cli_stream"] = bench_chat_cli(args.turns, stream=True)
+        for mode in ("subprocess", "inprocess"):
+            results[f"runner_{mode}"] = bench_runner(mode, args.turns, args.rounds)
+        results["control_panel"] = bench_control_panel(PANEL_REQUESTS)
+    finally:
+        server.stop()
+
+    report = {
+        "meta": {
+            "timestamp": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "turns": args.turns,
+            "rounds": args.rounds,
+            "mock_latency_s": MOCK_LATENCY,
+            "mock_tokens_per_second": MOCK_TOKENS_PER_SECOND,
+            "typing_speed_s": TYPING_SPEED,
+            "panel_requests": PANEL_REQUESTS,
+        },
+        "results": results,
+    }
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{_dt.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        old = json.loads(args.compare.read_text())
+        print(f"\n{'metric':<55} {'before':>12} {'after':>12} {'change':>9}")
+        for row in compare(old, report):
+            print(row)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
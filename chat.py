@@ -3,40 +3,47 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import json
+import signal
 import sys
 import textwrap
+import threading
 import time
-from typing import Dict, List
-
-import requests
-
-from config import GROQ_API_KEYS, GROQ_ENDPOINT, LCD_WIDTH, load_control_defaults
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from chat_events import JsonEventWriter
+from checkpoint import ConversationJournal
+from config import (
+    CACHE_DIR,
+    CACHE_MAX_MB,
+    CACHE_MODE,
+    CACHE_REPLAY_LATENCY,
+    GROQ_API_KEYS,
+    HEDGE_BUDGET,
+    HEDGE_FALLBACK_MODELS,
+    LCD_WIDTH,
+    PACING_MIN_DELAY,
+    PACING_SHARE_KEYS,
+    load_control_defaults,
+)
+from conversation import OPENING_SPEAKER, ConversationHistory
+from groq_client import GroqClient, get_default_client
+from hedging import Hedger, parse_model_chain
+from outputs import LineBufferedOutput, MultiOutput, QueuedSink
+from pacing import DEFAULT_COMPLETION_TOKENS, RateLimitPacer
+from response_cache import CACHE_MODES, CachedReply, ResponseCache, cache_key
 
 GREEN = "\033[92m"
 RESET = "\033[0m"
 CLEAR = "\033c"
 
-
-class MultiOutput:
-    """Mirror writes to multiple file-like objects."""
-
-    def __init__(self, *targets):
-        self.targets = targets
-
-    def write(self, message: str) -> None:
-        for target in self.targets:
-            try:
-                target.write(message)
-                target.flush()
-            except Exception:
-                continue
-
-    def flush(self) -> None:
-        for target in self.targets:
-            try:
-                target.flush()
-            except Exception:
-                continue
+# Typed characters are batched and written at most once per frame.
+FRAME_INTERVAL = 1 / 30
+# Idle time after which a server has likely dropped a keep-alive connection;
+# a standby handed a conversation later than this reconnects before turn one.
+STANDBY_KEEPALIVE_SECONDS = 45.0
 
 
 def parse_args(argv: List[str]) -> argparse.Namespace:
@@ -56,29 +63,127 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
         default=load_control_defaults()["max_completion_tokens"],
         help="Cap each reply (Groq max_completion_tokens); 0 = omit limit.",
     )
+    parser.add_argument(
+        "--context-tokens",
+        type=int,
+        default=load_control_defaults()["context_tokens"],
+        help="Fit the context into this many estimated prompt tokens, summarising "
+        "older turns; 0 = keep the last context_limit messages instead.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=load_control_defaults()["stream"],
+        help="Stream the completion and type it while it is still being generated.",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=load_control_defaults()["pipeline"],
+        help="Request the next speaker's reply while the current one is typed and the delay runs.",
+    )
+    parser.add_argument(
+        "--min-delay",
+        type=float,
+        default=PACING_MIN_DELAY,
+        help="Pace turns from the API rate-limit headers, waiting at least this long "
+        "between them; without it the fixed delay is used and only ever stretched.",
+    )
+    parser.add_argument(
+        "--share-keys",
+        action="store_true",
+        default=PACING_SHARE_KEYS,
+        help="Let a bot use the other bot's API key while its own is rate limited.",
+    )
+    parser.add_argument(
+        "--fallback-models",
+        default=HEDGE_FALLBACK_MODELS,
+        help="Comma-separated models to hedge to, in order, when a reply is slower "
+        "to start than the model's recent p95; empty disables hedging.",
+    )
+    parser.add_argument(
+        "--hedge-budget",
+        type=float,
+        default=HEDGE_BUDGET,
+        help="Largest share of turns that may send a hedge request (0 disables hedging).",
+    )
+    parser.add_argument(
+        "--cache-mode",
+        choices=CACHE_MODES,
+        default=CACHE_MODE if CACHE_MODE in CACHE_MODES else "passthrough",
+        help="record: store every reply; replay: answer only from the store; "
+        "passthrough: always call Groq.",
+    )
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Response cache directory.")
+    parser.add_argument(
+        "--cache-replay-latency",
+        action="store_true",
+        default=CACHE_REPLAY_LATENCY,
+        help="In replay mode, reproduce the recorded API latencies instead of running flat out.",
+    )
+    parser.add_argument(
+        "--journal",
+        default="",
+        help="Append a checkpoint of every turn to this journal file; empty disables it.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the journal's latest checkpoint if it holds an unfinished "
+        "conversation about the same topic.",
+    )
+    parser.add_argument(
+        "--events-fd",
+        type=int,
+        default=None,
+        help="Write structured JSON-lines turn events to this inherited file descriptor.",
+    )
+    parser.add_argument(
+        "--standby",
+        action="store_true",
+        help='Load everything, warm the API connections and wait for a {"argv": [...]} '
+        "JSON line on stdin with the conversation's arguments.",
+    )
     return parser.parse_args(argv)
 
 
 def setup_outputs() -> None:
+    """Route stdout/stderr through queued sinks, mirrored to the LCD when present.
+
+    Each device gets its own writer thread, so a slow framebuffer console or a
+    full pipe to ChatRunner never stalls the conversation loop.
+    """
+    stdout = sys.__stdout__
+    if not stdout.isatty():
+        stdout = LineBufferedOutput(stdout)
+    out_targets = [QueuedSink(stdout, "stdout")]
+    err_targets = [QueuedSink(sys.__stderr__, "stderr")]
+    lcd_error: Optional[Exception] = None
     try:
-        lcd = open("/dev/tty1", "w")
-        sys.stdout = MultiOutput(sys.__stdout__, lcd)
-        sys.stderr = MultiOutput(sys.__stderr__, lcd)
+        lcd = QueuedSink(open("/dev/tty1", "w"), "lcd")
+        out_targets.append(lcd)
+        err_targets.append(lcd)
     except Exception as exc:
-        print(f"[Warning] Could not open /dev/tty1: {exc}")
-
-
-def build_initial_conversation(topic: str) -> List[Dict[str, str]]:
-    return [
-        {
-            "role": "system",
-            "content": (
-                "You are an AI model engaging in a friendly and thoughtful conversation "
-                f"with another AI about: {topic}. Keep your responses brief (1-5 sentences)."
-            ),
-        },
-        {"role": "user", "content": f"Let's start our conversation about {topic}."},
-    ]
+        lcd_error = exc
+    sys.stdout = MultiOutput(*out_targets)
+    sys.stderr = MultiOutput(*err_targets)
+    atexit.register(sys.stderr.close)
+    atexit.register(sys.stdout.close)
+    if lcd_error is not None:
+        print(f"[Warning] Could not open /dev/tty1: {lcd_error}")
+
+
+def build_initial_conversation(
+    topic: str, window: int = 6, token_budget: int = 0
+) -> ConversationHistory:
+    history = ConversationHistory(
+        "You are an AI model engaging in a friendly and thoughtful conversation "
+        f"with another AI about: {topic}. Keep your responses brief (1-5 sentences).",
+        window,
+        token_budget,
+    )
+    history.record(OPENING_SPEAKER, f"Let's start our conversation about {topic}.")
+    return history
 
 
 def ensure_api_keys() -> None:
@@ -94,93 +199,585 @@ def wrap_text(text: str, width: int) -> List[str]:
     return textwrap.wrap(text, width=width, break_long_words=True, break_on_hyphens=False)
 
 
-def type_text(text: str, speaker_name: str, typing_speed: float) -> None:
-    prefix = f"{GREEN}[{speaker_name}]:{RESET}"
-    margin = "  "
-    wrapped = wrap_text(text, LCD_WIDTH)
-
-    sys.stdout.write(prefix + "\n")
-    sys.stdout.flush()
-
-    for line in wrapped:
-        sys.stdout.write(margin)
-        for char in line:
-            sys.stdout.write(GREEN + char + RESET)
-            sys.stdout.flush()
-            time.sleep(typing_speed)
-        sys.stdout.write("\n")
-    sys.stdout.flush()
+class StreamTyper:
+    """Types text incrementally, word-wrapping at ``width`` across chunk boundaries.
+
+    Each chunk fed in may end mid-word, so the current word is held back until
+    whitespace (or :meth:`finish`) shows where it ends; that is the only point
+    at which we know whether it still fits on the current line.
+
+    Output is frame-paced: characters are scheduled at ``typing_speed`` seconds
+    apart from a fixed anchor and whatever is due is written in one batch per
+    frame, so a slow terminal makes frames bigger rather than typing slower.
+    The colour escape is sent once per line instead of once per character.
+    """
+
+    def __init__(
+        self,
+        speaker_name: str,
+        typing_speed: float,
+        width: int = LCD_WIDTH,
+        frame_interval: float = FRAME_INTERVAL,
+        *,
+        out=None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> None:
+        self._out = out or sys.stdout
+        self._stop = stop_event or threading.Event()
+        self._speaker_name = speaker_name
+        self._typing_speed = typing_speed
+        self._width = max(width, 1)
+        self._frame_interval = frame_interval
+        self._column = 0
+        self._word = ""
+        # (text, glyph count) segments; markup such as colour codes weighs 0.
+        self._pending: deque[tuple[str, int]] = deque()
+        self._pending_glyphs = 0
+        self._anchor: Optional[float] = None
+        self._emitted = 0
+        self._idle_since = 0.0
+        self.started = False
+        self.started_at = 0.0
+
+    def start(self) -> None:
+        if self.started:
+            return
+        self.started = True
+        self.started_at = time.monotonic()
+        self._out.write(f"{GREEN}[{self._speaker_name}]:{RESET}" + "\n")
+        self._out.flush()
+
+    def feed(self, chunk: str) -> None:
+        self.start()
+        for char in chunk:
+            if char.isspace():
+                self._place_word()
+            else:
+                self._word += char
+        self._drain()
+
+    def finish(self) -> None:
+        self.start()
+        self._place_word()
+        if self._column:
+            self._newline()
+        self._drain()
+        self._out.flush()
+
+    def _place_word(self) -> None:
+        word, self._word = self._word, ""
+        while word:
+            if self._column and self._column + 1 + len(word) > self._width:
+                # Like textwrap, a word too long for any line fills the rest of this one.
+                if len(word) <= self._width or self._column + 1 >= self._width:
+                    self._newline()
+            if self._column:
+                self._type(" ")
+                self._column += 1
+            else:
+                self._pending.append(("  " + GREEN, 0))
+            room = self._width - self._column
+            piece, word = word[:room], word[room:]
+            self._type(piece)
+            self._column += len(piece)
+            if word:
+                self._newline()
+
+    def _newline(self) -> None:
+        self._pending.append((RESET + "\n", 0))
+        self._column = 0
+
+    def _type(self, text: str) -> None:
+        self._pending.append((text, len(text)))
+        self._pending_glyphs += len(text)
+
+    def _take(self, glyphs: int) -> tuple[str, int]:
+        """Pop up to ``glyphs`` characters plus the markup around them."""
+        parts: List[str] = []
+        taken = 0
+        while self._pending:
+            text, weight = self._pending[0]
+            if weight == 0:
+                parts.append(text)
+            elif taken >= glyphs:
+                break
+            elif weight <= glyphs - taken:
+                parts.append(text)
+                taken += weight
+            else:
+                split = glyphs - taken
+                parts.append(text[:split])
+                self._pending[0] = (text[split:], weight - split)
+                taken = glyphs
+                continue
+            self._pending.popleft()
+        self._pending_glyphs -= taken
+        return "".join(parts), taken
+
+    def _drain(self) -> None:
+        """Write everything pending, paced against the typing schedule."""
+        speed = self._typing_speed
+        if speed <= 0 or not self._pending_glyphs:
+            if self._pending:
+                self._out.write(self._take(self._pending_glyphs)[0])
+                self._out.flush()
+            return
+
+        now = time.monotonic()
+        if self._anchor is None or now - self._idle_since > self._frame_interval:
+            # Starting, or resuming after waiting on the network: don't burst
+            # to "catch up" on time nobody was typing.
+            self._anchor = max(self._anchor or now, now - self._emitted * speed)
+
+        while self._pending_glyphs:
+            now = time.monotonic()
+            due = int((now - self._anchor) / speed) + 1 - self._emitted
+            if due > 0:
+                batch, taken = self._take(due)
+                self._emitted += taken
+                self._out.write(batch)
+                self._out.flush()
+            if not self._pending_glyphs:
+                break
+            next_due = self._anchor + self._emitted * speed
+            last_due = next_due + (self._pending_glyphs - 1) * speed
+            wake = max(next_due, min(now + self._frame_interval, last_due))
+            if self._stop.wait(max(wake - time.monotonic(), 0)):
+                # Stopping: drop whatever is left instead of finishing the line.
+                self._pending.clear()
+                self._pending_glyphs = 0
+        if self._pending:
+            self._out.write(self._take(0)[0])
+            self._out.flush()
+        self._idle_since = time.monotonic()
+
+
+def type_text(
+    text: str,
+    speaker_name: str,
+    typing_speed: float,
+    *,
+    out=None,
+    stop_event: Optional[threading.Event] = None,
+) -> None:
+    typer = StreamTyper(speaker_name, typing_speed, out=out, stop_event=stop_event)
+    typer.feed(text)
+    typer.finish()
 
 
 def chat_turn(
-    conversation: List[Dict[str, str]],
+    history: ConversationHistory,
+    speaker: str,
     model: str,
     api_key: str,
     context_limit: int,
     temperature: float,
     max_completion_tokens: int,
+    client: Optional[GroqClient] = None,
+    on_delta: Optional[Callable[[str], None]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    cache: Optional[ResponseCache] = None,
+    hedger: Optional[Hedger] = None,
 ) -> str:
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    if conversation and conversation[-1]["role"] == "assistant":
-        conversation.append({"role": "user", "content": conversation[-1]["content"]})
+    """Request ``speaker``'s next reply and record it in ``history``.
 
-    system_prompt = next((msg for msg in reversed(conversation) if msg["role"] == "system"), None)
-    recent_non_system = [msg for msg in conversation if msg["role"] != "system"]
-    context = recent_non_system[-context_limit:]
-    if system_prompt:
-        context = [system_prompt, *context]
+    ``context_limit`` caps the context in messages unless the history was
+    built with a token budget, which then decides what is sent.
+
+    When ``on_delta`` is given the completion is streamed and every content
+    chunk is handed to it as soon as it arrives. ``stats``, if given, is
+    filled with ``ttfb`` (seconds until the first content was available),
+    ``api_latency`` (until the last byte; for streams this includes the
+    typewriter's pace), the response's ``usage`` token counts and the number
+    of ``retries`` it took.
+
+    With a ``cache`` in record or replay mode the reply is stored in, or
+    answered from, the on-disk response cache. A ``hedger`` races a fallback
+    model against a slow start; ``stats["model"]`` then names the winner.
+    """
+    client = client or get_default_client()
+    context = history.context_for(speaker, context_limit)
 
     body: Dict[str, object] = {"model": model, "messages": context, "temperature": temperature}
     if max_completion_tokens > 0:
         body["max_completion_tokens"] = max_completion_tokens
 
-    response = requests.post(GROQ_ENDPOINT, headers=headers, json=body)
+    stats = {} if stats is None else stats
+    if cache is not None and cache.mode == "passthrough":
+        cache = None
+    key = cache_key(body) if cache is not None else ""
+    if cache is not None and cache.mode == "replay":
+        reply_text = cache.replay(key, on_delta=on_delta, stats=stats)
+    else:
+        if hedger is not None:
+            reply_text = hedger.request(client, api_key, body, on_delta, stats)
+        else:
+            reply_text = _request_reply(client, api_key, body, on_delta, stats)
+        if cache is not None:
+            cache.store(
+                key,
+                CachedReply(
+                    text=reply_text,
+                    usage=stats["usage"],
+                    ttfb=stats.get("ttfb", 0.0),
+                    latency=stats.get("generation_time", stats["api_latency"]),
+                    model=stats.get("model", model),
+                    recorded_at=time.time(),
+                ),
+            )
+    reply_content = reply_text.strip() or "(no response)"
+    history.record(speaker, reply_content)
+    return reply_content
+
+
+def _request_reply(
+    client: GroqClient,
+    api_key: str,
+    body: Dict[str, object],
+    on_delta: Optional[Callable[[str], None]],
+    stats: Dict[str, Any],
+) -> str:
+    if on_delta is not None:
+        body = {**body, "stream": True}
+    started = time.monotonic()
+    response = client.post_chat(api_key, body, stream=on_delta is not None, stats=stats)
     if not response.ok:
         print(f"[Groq error] {response.status_code}: {response.text}")
     response.raise_for_status()
-    reply = response.json()["choices"][0]["message"]
-    reply_content = reply.get("content", "").strip() or "(no response)"
-    conversation.append({"role": "assistant", "content": reply_content})
-    return reply_content
+    usage: Dict[str, Any] = {}
+    if on_delta is not None:
+        chunks: List[str] = []
+        consumer_time = 0.0
+        for delta in client.iter_deltas(response, usage=usage):
+            if not chunks:
+                stats["ttfb"] = time.monotonic() - started
+            chunks.append(delta)
+            handed_off = time.monotonic()
+            on_delta(delta)
+            consumer_time += time.monotonic() - handed_off
+        reply_text = "".join(chunks)
+    else:
+        payload = response.json()
+        stats["ttfb"] = time.monotonic() - started
+        usage.update(payload.get("usage") or {})
+        reply_text = payload["choices"][0]["message"].get("content", "")
+        consumer_time = 0.0
+    stats["api_latency"] = time.monotonic() - started
+    stats["generation_time"] = stats["api_latency"] - consumer_time
+    stats["usage"] = usage
+    return reply_text
+
+
+class PrefetchedTurn:
+    """Runs one ``chat_turn`` on a daemon thread so it overlaps typing and the delay.
+
+    The turn works on a private copy of the history and its reply is only
+    recorded in the real one by :meth:`result`, so a cancelled prefetch never
+    leaks into the conversation. The thread is a daemon so a request still
+    waiting on the network cannot keep the process alive after a stop.
+    """
+
+    def __init__(self, history: ConversationHistory, speaker: str, *args, **kwargs) -> None:
+        self._speaker = speaker
+        self._working = history.copy()
+        self._done = threading.Event()
+        self._reply = ""
+        self._error: Optional[BaseException] = None
+        self.stats: Dict[str, Any] = {}
+        self.cancelled = False
+        self._thread = threading.Thread(
+            target=self._run, args=args, kwargs=kwargs, name="chat-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, *args, **kwargs) -> None:
+        try:
+            self._reply = chat_turn(
+                self._working, self._speaker, *args, stats=self.stats, **kwargs
+            )
+        except BaseException as exc:  # noqa: BLE001 re-raised in result()
+            self._error = exc
+        finally:
+            self._done.set()
+
+    def result(self, history: ConversationHistory) -> str:
+        """Wait for the reply and record it in ``history``."""
+        self._done.wait()
+        if self.cancelled:
+            raise RuntimeError("Prefetched turn was cancelled")
+        if self._error is not None:
+            raise self._error
+        history.record(self._speaker, self._reply)
+        return self._reply
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+def speaker_for_turn(turn: int, first_speaker: str) -> tuple[str, str]:
+    expects_bot1 = (turn % 2 == 0)
+    bot = "bot1" if expects_bot1 == (first_speaker == "bot1") else "bot2"
+    return bot, ("Bot 1" if bot == "bot1" else "Bot 2")
+
+
+class ConversationStopped(Exception):
+    """Raised inside a turn once the engine has been asked to stop."""
+
+
+def run_conversation(
+    args: argparse.Namespace,
+    *,
+    out=None,
+    stop_event: Optional[threading.Event] = None,
+    on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    client: Optional[GroqClient] = None,
+    pacer: Optional[RateLimitPacer] = None,
+) -> None:
+    """Run the two-bot conversation described by ``args`` until it ends or is stopped.
+
+    ``out`` receives the display output (``sys.stdout`` by default) and
+    ``on_event`` gets a ``(kind, data)`` callback for every turn start, end and
+    error and every deliberate wait (see chat_events), so a host can follow
+    the conversation without scraping the terminal text. Conversations that
+    share one ``client`` and an already attached ``pacer`` also share its
+    connections and rate limits.
+    """
+    out = out or sys.stdout
+    stop_event = stop_event or threading.Event()
+
+    def emit(kind: str, **data: Any) -> None:
+        if on_event is not None:
+            on_event(kind, {"ts": time.time(), "model": args.model, **data})
+
+    out.write(CLEAR + "\n")
+    out.write(GREEN + "╔══════════════════════════════╗\n")
+    out.write("║  AI CONVERSATION TERMINAL    ║\n")
+    out.write("╚══════════════════════════════╝" + RESET + "\n\n")
+    out.flush()
+
+    window, token_budget = max(args.context_limit, 1), max(args.context_tokens, 0)
+    journal = ConversationJournal(args.journal) if args.journal else None
+    checkpoint = journal.load() if journal is not None and args.resume else None
+    if checkpoint is not None and not checkpoint.can_resume(args.topic, args.max_turns):
+        checkpoint = None
+    first_speaker = args.first_speaker
+    turn = 0
+    if checkpoint is not None:
+        history = checkpoint.restore(window, token_budget)
+        # Keep the alternation the journaled conversation had.
+        first_speaker, turn = checkpoint.first_speaker, checkpoint.turn
+        out.write(GREEN + f"Resuming the conversation at turn {turn + 1}." + RESET + "\n\n")
+        out.flush()
+        emit("resumed", turn=turn, restored=len(history))
+    else:
+        history = build_initial_conversation(args.topic, window, token_budget)
+    if journal is not None:
+        journal.begin(args.topic, first_speaker, history, turn)
+    cache = None
+    if args.cache_mode != "passthrough":
+        cache = ResponseCache(
+            args.cache_dir,
+            args.cache_mode,
+            max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+            replay_latency=args.cache_replay_latency,
+        )
+    client = client or get_default_client()
+    own_pacer = pacer is None
+    if pacer is None:
+        pacer = RateLimitPacer(share_keys=args.share_keys).attach(client)
+    hedger = None
+    fallbacks = parse_model_chain(args.fallback_models)
+    if fallbacks and args.hedge_budget > 0:
+        hedger = Hedger(fallbacks, budget=args.hedge_budget, pacer=pacer)
+    completion_reserve = args.max_completion_tokens or DEFAULT_COMPLETION_TOKENS
+    pending: Optional[PrefetchedTurn] = None
+
+    def key_for(bot: str) -> tuple[str, float]:
+        """The API key ``bot`` should use next and how long it must wait for it."""
+        others = [key for name, key in GROQ_API_KEYS.items() if name != bot]
+        tokens = history.estimated_tokens() + completion_reserve
+        return pacer.choose_key(GROQ_API_KEYS[bot], others, tokens)
+
+    def turn_args(bot: str, api_key: str) -> tuple:
+        return (
+            history,
+            bot,
+            args.model,
+            api_key,
+            max(args.context_limit, 1),
+            args.temperature,
+            max(args.max_completion_tokens, 0),
+        )
+
+    try:
+        while not stop_event.is_set():
+            current_bot, bot_label = speaker_for_turn(turn, first_speaker)
+            is_last_turn = args.max_turns > 0 and turn + 1 >= args.max_turns
+
+            api_key = ""
+            if pending is None:
+                api_key, wait = key_for(current_bot)
+                if wait > 0:
+                    emit("waiting", seconds=wait, reason="rate_limit")
+                    if stop_event.wait(wait):
+                        break
+
+            typer = None
+            on_delta: Optional[Callable[[str], None]] = None
+            if args.stream and pending is None:
+                typer = StreamTyper(bot_label, args.typing_speed, out=out, stop_event=stop_event)
+
+                def feed_typer(delta: str, typer: StreamTyper = typer) -> None:
+                    if stop_event.is_set():
+                        raise ConversationStopped()
+                    typer.feed(delta)
+
+                on_delta = feed_typer
+
+            emit("turn_start", turn=turn, bot=current_bot, speaker=bot_label)
+            reply = ""
+            stats: Dict[str, Any] = {}
+            error: Optional[Exception] = None
+            try:
+                if pending is not None:
+                    stats = pending.stats
+                    reply = pending.result(history)
+                else:
+                    reply = chat_turn(
+                        *turn_args(current_bot, api_key),
+                        client=client,
+                        on_delta=on_delta,
+                        stats=stats,
+                        cache=cache,
+                        hedger=hedger,
+                    )
+            except ConversationStopped:
+                break
+            except Exception as exc:  # noqa: BLE001 broad catch to keep loop alive
+                error = exc
+            pending = None
+            if stop_event.is_set():
+                break
+
+            if args.pipeline and not is_last_turn:
+                # The reply is known, so the other bot can start thinking while
+                # this one is typed out and the delay runs, unless its key has
+                # to wait for rate-limit budget first.
+                next_bot, _ = speaker_for_turn(turn + 1, first_speaker)
+                next_key, wait = key_for(next_bot)
+                if wait <= 0:
+                    pending = PrefetchedTurn(
+                        *turn_args(next_bot, next_key), client=client, cache=cache, hedger=hedger
+                    )
+
+            if error is None:
+                try:
+                    typing_started = time.monotonic()
+                    if typer is None:
+                        type_text(reply, bot_label, args.typing_speed, out=out, stop_event=stop_event)
+                    else:
+                        if not typer.started:
+                            typer.feed(reply)
+                        typer.finish()
+                        typing_started = typer.started_at
+                    typing_time = time.monotonic() - typing_started
+                    out.write(GREEN + "─" * LCD_WIDTH + RESET + "\n")
+                    out.flush()
+                    emit(
+                        "turn_end",
+                        turn=turn,
+                        bot=current_bot,
+                        speaker=bot_label,
+                        text=reply,
+                        api_latency=stats.get("api_latency", 0.0),
+                        ttfb=stats.get("ttfb", 0.0),
+                        usage=stats.get("usage", {}),
+                        retries=stats.get("retries", 0),
+                        typing_time=typing_time,
+                        winning_model=stats.get("model", args.model),
+                        hedged=stats.get("hedged", False),
+                    )
+                    if journal is not None:
+                        journal.record_turn(turn, current_bot, reply, history)
+                except Exception as exc:  # noqa: BLE001 broad catch to keep loop alive
+                    error = exc
+            if error is not None:
+                if typer is not None and typer.started:
+                    typer.finish()
+                type_text(
+                    f"[ERROR] {error}", bot_label, args.typing_speed, out=out, stop_event=stop_event
+                )
+                emit(
+                    "turn_error",
+                    turn=turn,
+                    bot=current_bot,
+                    speaker=bot_label,
+                    error=str(error),
+                    retries=stats.get("retries", 0),
+                )
+
+            turn += 1
+            pause = args.delay if args.min_delay is None else args.min_delay
+            if pending is None and not is_last_turn:
+                # Stretch (or, with --min-delay, shrink) the pause to what the
+                # next speaker's rate-limit budget allows.
+                pause = max(pause, key_for(speaker_for_turn(turn, first_speaker)[0])[1])
+            if pause > 0:
+                emit("waiting", seconds=pause, reason="delay")
+            stopped = stop_event.wait(max(pause, 0))
+            if is_last_turn:
+                if journal is not None:
+                    journal.finish()
+                break
+            if stopped:
+                break
+    finally:
+        if journal is not None:
+            journal.close()
+        if own_pacer:
+            pacer.detach(client)
+        if pending is not None:
+            pending.cancel()
+
+
+def _handle_sigterm(signum: int, frame: object) -> None:
+    # Turn a stop request into SystemExit so pending prefetches get cancelled.
+    raise SystemExit(0)
+
+
+def wait_for_standby_args(standby_args: argparse.Namespace, client: GroqClient) -> Optional[argparse.Namespace]:
+    """Open the API connections, then wait for the conversation's arguments on stdin.
+
+    The connections are warmed once up front and again only if the arguments
+    arrive after they have sat idle past the keep-alive, so an idle standby
+    makes no requests. Returns None if stdin closes first (the panel went away).
+    """
+    keys = [key for key in GROQ_API_KEYS.values() if key]
+    client.warm(keys)
+    warmed = time.monotonic()
+    line = sys.stdin.readline()
+    if not line.strip():
+        return None
+    if time.monotonic() - warmed > STANDBY_KEEPALIVE_SECONDS:
+        client.warm(keys)
+    argv = [str(arg) for arg in json.loads(line)["argv"]]
+    if standby_args.events_fd is not None:
+        argv += ["--events-fd", str(standby_args.events_fd)]
+    return parse_args(argv)
 
 
 def main(argv: List[str] | None = None) -> None:
     args = parse_args(argv or sys.argv[1:])
     ensure_api_keys()
     setup_outputs()
-
-    print(CLEAR)
-    print(GREEN + "╔══════════════════════════════╗")
-    print("║  AI CONVERSATION TERMINAL    ║")
-    print("╚══════════════════════════════╝" + RESET)
-    print()
-
-    conversation = build_initial_conversation(args.topic)
-    turn = 0
-
-    while True:
-        expects_bot1 = (turn % 2 == 0)
-        current_bot = "bot1" if expects_bot1 == (args.first_speaker == "bot1") else "bot2"
-        bot_label = "Bot 1" if current_bot == "bot1" else "Bot 2"
-
-        try:
-            reply = chat_turn(
-                conversation,
-                args.model,
-                GROQ_API_KEYS[current_bot],
-                max(args.context_limit, 1),
-                args.temperature,
-                max(args.max_completion_tokens, 0),
-            )
-            type_text(reply, bot_label, args.typing_speed)
-            print(GREEN + "─" * LCD_WIDTH + RESET)
-        except Exception as exc:  # noqa: BLE001 broad catch to keep loop alive
-            type_text(f"[ERROR] {exc}", bot_label, args.typing_speed)
-
-        time.sleep(args.delay)
-        turn += 1
-        if args.max_turns > 0 and turn >= args.max_turns:
-            break
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+    client = get_default_client()
+    if args.standby:
+        args = wait_for_standby_args(args, client)
+        if args is None:
+            return
+    on_event = JsonEventWriter(args.events_fd) if args.events_fd is not None else None
+    run_conversation(args, on_event=on_event, client=client)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""Structured turn events emitted by the chat engine.
+
+chat.py reports every turn (and every deliberate wait) as a JSON line on a side-channel file descriptor
+(or, in-process, straight to a callback); ChatRunner decodes those lines back
+into the typed records below instead of scraping ANSI terminal text.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Union
+
+
+@dataclass(frozen=True)
+class TurnStarted:
+    turn: int
+    bot: str
+    speaker: str
+    model: str
+    ts: float = 0.0
+
+
+@dataclass(frozen=True)
+class TurnCompleted:
+    turn: int
+    bot: str
+    speaker: str
+    model: str
+    text: str
+    api_latency: float = 0.0
+    ttfb: float = 0.0
+    usage: Dict[str, Any] = field(default_factory=dict)
+    retries: int = 0
+    typing_time: float = 0.0
+    # Model that actually produced the reply (differs from ``model`` when a
+    # hedged fallback won the turn) and whether a hedge request was sent.
+    winning_model: str = ""
+    hedged: bool = False
+    ts: float = 0.0
+
+
+@dataclass(frozen=True)
+class TurnFailed:
+    turn: int
+    bot: str
+    speaker: str
+    model: str
+    error: str
+    retries: int = 0
+    ts: float = 0.0
+
+
+@dataclass(frozen=True)
+class ConversationResumed:
+    # Next turn to play and how many history messages the checkpoint restored.
+    turn: int
+    restored: int
+    model: str
+    ts: float = 0.0
+
+
+@dataclass(frozen=True)
+class Waiting:
+    # The engine is about to sleep this long on purpose: the pause between
+    # turns or a wait for rate-limit budget ("delay" or "rate_limit").
+    seconds: float
+    reason: str
+    model: str
+    ts: float = 0.0
+
+
+ChatEvent = Union[TurnStarted, TurnCompleted, TurnFailed, ConversationResumed, Waiting]
+
+EVENT_TYPES: Dict[str, type] = {
+    "turn_start": TurnStarted,
+    "turn_end": TurnCompleted,
+    "turn_error": TurnFailed,
+    "resumed": ConversationResumed,
+    "waiting": Waiting,
+}
+
+
+def event_from_dict(kind: str, data: Dict[str, Any]) -> Optional[ChatEvent]:
+    """Build the typed record for ``kind``; unknown kinds and fields are ignored."""
+    event_type = EVENT_TYPES.get(kind)
+    if event_type is None:
+        return None
+    names = {item.name for item in dataclasses.fields(event_type)}
+    try:
+        return event_type(**{key: value for key, value in data.items() if key in names})
+    except TypeError:
+        return None
+
+
+def encode_event(kind: str, data: Dict[str, Any]) -> str:
+    return json.dumps({"event": kind, **data}, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_event(line: str) -> Optional[ChatEvent]:
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return event_from_dict(str(data.pop("event", "")), data)
+
+
+class JsonEventWriter:
+    """Engine ``on_event`` callback that writes JSON lines to a file descriptor."""
+
+    def __init__(self, fd: int) -> None:
+        self._file = open(fd, "w", buffering=1, encoding="utf-8", closefd=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, kind: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            try:
+                self._file.write(encode_event(kind, data) + "\n")
+            except (OSError, ValueError):
+                # The reader went away; the display must keep going regardless.
+                pass
+
+
+__all__ = [
+    "ChatEvent",
+    "ConversationResumed",
+    "EVENT_TYPES",
+    "JsonEventWriter",
+    "TurnCompleted",
+    "TurnFailed",
+    "TurnStarted",
+    "Waiting",
+    "decode_event",
+    "encode_event",
+    "event_from_dict",
+]
@@ -1,72 +1,221 @@
-"""Utilities for launching and supervising the chat subprocess."""
+"""Utilities for launching and supervising the chat loop."""
 
 from __future__ import annotations
 
 import datetime as _dt
+import json
+import logging
+import os
 import pathlib
 import re
 import subprocess
 import sys
 import threading
-from typing import Dict, Any, Optional
+import time
+from collections import deque
+from typing import Callable, Dict, Any, Optional
 
-from config import load_control_defaults
+import chat
+from chat_events import (
+    ChatEvent,
+    ConversationResumed,
+    TurnCompleted,
+    TurnFailed,
+    Waiting,
+    decode_event,
+    event_from_dict,
+)
+from config import (
+    CHECKPOINT_FILE,
+    CHECKPOINT_RESUME,
+    CRASH_LOOP_LIMIT,
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_READ_TIMEOUT,
+    GROQ_TURN_DEADLINE,
+    HEDGE_BUDGET,
+    HEDGE_FALLBACK_MODELS,
+    LCD_WIDTH,
+    RESTART_BACKOFF_MAX,
+    RUNNER_MODE,
+    RUNNER_STANDBY,
+    WATCHDOG_TIMEOUT,
+    load_control_defaults,
+)
+from conversation import CHARS_PER_TOKEN
+from groq_client import GroqClient
+from hedging import parse_model_chain
 from log_buffer import LogBuffer
+from metrics import (
+    API_LATENCY,
+    API_RETRIES,
+    API_TTFB,
+    HEDGES,
+    RUNNER_EVENTS,
+    TOKENS,
+    TURNS,
+    TYPING_DURATION,
+)
+from outputs import MultiOutput
+from pacing import DEFAULT_COMPLETION_TOKENS, RateLimitPacer
 
 _CHAT_DEFAULTS = load_control_defaults()
 
+DEFAULT_DISPLAY = "/dev/tty1"
+DEFAULT_JOURNAL = CHECKPOINT_FILE if CHECKPOINT_RESUME else None
+
 ANSI_RE = re.compile(r"\x1B(?:\[[0-?]*[ -/]*[@-~]|c)")
 
+RESTART_BACKOFF_BASE = 1.0
+# Crashes older than this no longer count towards CRASH_LOOP_LIMIT.
+CRASH_LOOP_WINDOW = 600.0
+# How long a stop waits for the in-process engine to return, and how often a
+# start that has to wait for a previous engine checks on it again.
+ENGINE_STOP_TIMEOUT = 5.0
+ENGINE_DRAIN_POLL = 1.0
+
+
+def _timestamp() -> str:
+    return _dt.datetime.now().strftime("%H:%M:%S")
+
 
 class ChatRunner:
-    """Launches chat.py and streams its output into a LogBuffer."""
+    """Runs the chat loop and streams its output into a LogBuffer.
+
+    In ``"subprocess"`` mode every start launches ``chat.py``, which reports its
+    turns as JSON-lines events on a side-channel pipe. In ``"inprocess"`` mode
+    the conversation runs on a worker thread of this process and hands the same
+    events over directly, which skips the interpreter start-up entirely.
+
+    Once started, the chat is supervised until :meth:`stop`: a chat that
+    crashes is restarted with exponential backoff (and left down after a
+    crash loop), and one that stops producing turn events for longer than
+    its watchdog deadline is killed and restarted. :meth:`supervision`
+    reports restarts and downtime. ``clock`` (monotonic seconds) and
+    ``wait(event, timeout)`` pace the supervisor; tests swap both for a fake
+    clock.
 
-    def __init__(self, log_buffer: LogBuffer, script_name: str = "chat.py") -> None:
+    With ``standby`` (subprocess mode only) a ``chat.py --standby`` child is
+    kept ready with its imports done and API connections open; a start hands
+    it the settings on stdin instead of paying for a cold launch, and a new
+    standby is spawned in the background straight away.
+    """
+
+    MODES = ("subprocess", "inprocess")
+
+    def __init__(
+        self,
+        log_buffer: LogBuffer,
+        script_name: str = "chat.py",
+        mode: str = RUNNER_MODE,
+        *,
+        display: Optional[str] = DEFAULT_DISPLAY,
+        client: Optional[GroqClient] = None,
+        pacer: Optional[RateLimitPacer] = None,
+        standby: bool = RUNNER_STANDBY,
+        journal: Optional[str] = DEFAULT_JOURNAL,
+        clock: Callable[[], float] = time.monotonic,
+        wait: Callable[[threading.Event, Optional[float]], bool] = threading.Event.wait,
+    ) -> None:
         self._log = log_buffer
         self._script_path = pathlib.Path(__file__).resolve().parent / script_name
+        self._mode = mode if mode in self.MODES else "subprocess"
+        # Console the in-process engine types on; None runs headless. The
+        # subprocess always uses chat.py's own /dev/tty1 handling.
+        self._display = display
+        # Checkpoint journal handed to chat.py, which resumes from it when
+        # the topic still matches; None starts every run afresh.
+        self._journal = journal
+        self._client = client
+        self._pacer = pacer
         self._process: Optional[subprocess.Popen[str]] = None
+        self._standby_enabled = standby and self._mode == "subprocess"
+        # The waiting standby child and the read end of its events pipe.
+        self._standby: Optional[tuple[subprocess.Popen[str], int]] = None
+        self._standby_spawning = False
+        self._engine: Optional[threading.Thread] = None
+        self._engine_stop: Optional[threading.Event] = None
+        # Stopped or abandoned engines that have not returned yet; no new
+        # engine starts while one is left, as both would write the journal.
+        self._retired: list[threading.Thread] = []
+        # The pending launch is a start() that waited for one of them, not a restart.
+        self._start_deferred = False
+        self._event_listeners: list[Callable[[ChatEvent], None]] = []
         self._lock = threading.Lock()
+        # Supervision: the config that should be running (None once stopped
+        # or finished) and how the chat has fared so far.
+        self._desired: Optional[Dict[str, Any]] = None
+        self._last_progress = 0.0
+        # Extra silence the chat announced with a Waiting event.
+        self._grace = 0.0
+        self._restart_at: Optional[float] = None
+        self._crashes: deque[float] = deque()
+        self._down_since: Optional[float] = None
+        self._downtime = 0.0
+        self._restarts = 0
+        self._hangs = 0
+        self._gave_up = False
+        self._wake = threading.Event()
+        self._clock = clock
+        self._wait = wait
+        self._supervisor: Optional[threading.Thread] = None
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def display(self) -> Optional[str]:
+        return self._display
+
+    @property
+    def journal(self) -> Optional[str]:
+        return self._journal
 
     # --- public API -----------------------------------------------------
 
     def start(self, chat_config: Dict[str, Any]) -> bool:
-        """Spawn chat.py with the provided configuration.
+        """Start the chat loop with the provided configuration.
 
-        Returns True if a new subprocess was launched, False if one was already
-        running.
+        Returns True if a new conversation was launched, False if one was
+        already running. While a previous in-process engine is still
+        finishing, the launch is left to the supervisor until it has exited.
         """
         with self._lock:
-            if self._process and self.is_running():
+            if self.is_running():
                 return False
-
-            args = self._build_args(chat_config)
-            self._log.clear()
-            timestamp = _dt.datetime.now().strftime("%H:%M:%S")
-            self._log.append(f"[system {timestamp}] Chat launched.")
-
-            self._process = subprocess.Popen(
-                args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-            )
-
-            if self._process.stdout:
-                threading.Thread(
-                    target=self._stream_output,
-                    args=(self._process,),
-                    daemon=True,
-                ).start()
-                threading.Thread(
-                    target=self._monitor_exit,
-                    args=(self._process,),
-                    daemon=True,
-                ).start()
-
-            return True
+            self._desired = chat_config
+            self._restart_at = None
+            self._crashes.clear()
+            self._down_since = None
+            self._gave_up = False
+            self._start_deferred = self._engine_draining()
+            if self._start_deferred:
+                self._restart_at = self._clock()
+                self._log.append(
+                    f"[system {_timestamp()}] Waiting for the previous chat to finish before starting."
+                )
+            else:
+                self._launch(chat_config)
+            if self._supervisor is None:
+                self._supervisor = threading.Thread(
+                    target=self._supervise, name="chat-supervisor", daemon=True
+                )
+                self._supervisor.start()
+        self._wake.set()
+        return True
 
     def stop(self) -> bool:
+        """Stop the chat and its supervision; False if nothing was running or pending."""
+        with self._lock:
+            self._desired = None
+            restart_pending = self._restart_at is not None
+            self._restart_at = None
+            self._close_downtime(self._clock())
+        if self._mode == "inprocess":
+            return self._stop_engine() or restart_pending
+        return self._stop_process() or restart_pending
+
+    def _stop_process(self) -> bool:
         proc: Optional[subprocess.Popen[str]]
         with self._lock:
             proc = self._process
@@ -84,6 +233,7 @@ class ChatRunner:
             with self._lock:
                 if self._process is proc:
                     self._process = None
+        RUNNER_EVENTS.inc(event="stop", mode=self._mode)
         self._clear_display()
         return True
 
@@ -92,6 +242,9 @@ class ChatRunner:
         self.start(chat_config)
 
     def is_running(self) -> bool:
+        if self._mode == "inprocess":
+            engine, stop_event = self._engine, self._engine_stop
+            return bool(engine and engine.is_alive() and stop_event and not stop_event.is_set())
         proc = self._process
         return bool(proc and proc.poll() is None)
 
@@ -101,10 +254,147 @@ class ChatRunner:
             return proc.pid
         return None
 
+    def prepare(self) -> None:
+        """Spawn the standby now, so that even the first start is warm."""
+        if self._standby_enabled:
+            with self._lock:
+                self._request_standby()
+
+    def supervision(self) -> Dict[str, Any]:
+        """Restart and downtime figures for the panel."""
+        now = self._clock()
+        with self._lock:
+            downtime = self._downtime
+            if self._down_since is not None:
+                downtime += now - self._down_since
+            while self._crashes and now - self._crashes[0] > CRASH_LOOP_WINDOW:
+                self._crashes.popleft()
+            return {
+                "restarts": self._restarts,
+                "hangs": self._hangs,
+                "recent_crashes": len(self._crashes),
+                "downtime": downtime,
+                "restart_in": None if self._restart_at is None else max(self._restart_at - now, 0.0),
+                "gave_up": self._gave_up,
+            }
+
     # --- helpers --------------------------------------------------------
 
+    def _launch(self, chat_config: Dict[str, Any], *, restarted: bool = False) -> None:
+        """Launch the engine or child process; called with ``_lock`` held."""
+        args = self._build_args(chat_config)
+        if restarted:
+            self._log.append(f"[system {_timestamp()}] Chat restarted.")
+            RUNNER_EVENTS.inc(event="restart", mode=self._mode)
+        else:
+            self._log.clear()
+            self._log.append(f"[system {_timestamp()}] Chat launched.")
+            RUNNER_EVENTS.inc(event="start", mode=self._mode)
+        self._last_progress = self._clock()
+        self._grace = 0.0
+
+        if self._mode == "inprocess":
+            self._start_engine(chat.parse_args(args[2:]))
+            return
+
+        child = self._promote_standby(args[2:])
+        if child is None:
+            child = self._spawn_child(args)
+        self._process, events_read = child
+        if self._standby_enabled:
+            self._request_standby()
+
+        threading.Thread(
+            target=self._read_events,
+            args=(events_read,),
+            daemon=True,
+        ).start()
+        if self._process.stderr:
+            threading.Thread(
+                target=self._stream_output,
+                args=(self._process,),
+                daemon=True,
+            ).start()
+        threading.Thread(
+            target=self._monitor_exit,
+            args=(self._process,),
+            daemon=True,
+        ).start()
+
+    @staticmethod
+    def _spawn_child(args: list[str], *, standby: bool = False) -> tuple[subprocess.Popen[str], int]:
+        """Launch chat.py and return it with the read end of its events pipe."""
+        # Turns arrive as JSON lines on a dedicated pipe; the pretty
+        # terminal output only goes to the LCD. stderr still reaches the
+        # log so tracebacks stay visible.
+        events_read, events_write = os.pipe()
+        try:
+            process = subprocess.Popen(
+                [*args, "--events-fd", str(events_write)],
+                stdin=subprocess.PIPE if standby else None,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                pass_fds=(events_write,),
+            )
+        except Exception:
+            os.close(events_read)
+            raise
+        finally:
+            os.close(events_write)
+        return process, events_read
+
+    def _request_standby(self) -> None:
+        """Spawn a standby in the background unless one exists; needs ``_lock``."""
+        if self._standby_spawning or self._standby is not None:
+            return
+        self._standby_spawning = True
+        threading.Thread(target=self._spawn_standby, name="chat-standby", daemon=True).start()
+
+    def _spawn_standby(self) -> None:
+        try:
+            child = self._spawn_child(
+                [sys.executable, str(self._script_path), "--standby"], standby=True
+            )
+        except Exception:
+            logging.warning("Could not start a standby chat process", exc_info=True)
+            child = None
+        with self._lock:
+            self._standby_spawning = False
+            if child is not None and self._standby is None:
+                self._standby, child = child, None
+        if child is not None:
+            self._discard_child(child)
+
+    def _promote_standby(self, argv: list[str]) -> Optional[tuple[subprocess.Popen[str], int]]:
+        """Hand ``argv`` to the waiting standby; None if there is no live one. Needs ``_lock``."""
+        child, self._standby = self._standby, None
+        if child is None:
+            return None
+        process = child[0]
+        try:
+            if process.poll() is not None or process.stdin is None:
+                raise OSError("standby exited")
+            process.stdin.write(json.dumps({"argv": argv}) + "\n")
+            process.stdin.close()
+        except (OSError, ValueError):
+            self._discard_child(child)
+            return None
+        return child
+
+    @staticmethod
+    def _discard_child(child: tuple[subprocess.Popen[str], int]) -> None:
+        process, events_read = child
+        process.kill()
+        process.wait()
+        os.close(events_read)
+        for stream in (process.stdin, process.stderr):
+            if stream is not None:
+                stream.close()
+
     def _build_args(self, chat_config: Dict[str, Any]) -> list[str]:
-        return [
+        args = [
             sys.executable,
             str(self._script_path),
             chat_config["topic"],
@@ -122,29 +412,309 @@ class ChatRunner:
                 )
             ),
         ]
+        if chat_config.get("context_tokens"):
+            args.extend(["--context-tokens", str(chat_config["context_tokens"])])
+        if chat_config.get("stream"):
+            args.append("--stream")
+        if chat_config.get("pipeline"):
+            args.append("--pipeline")
+        if self._journal:
+            args.extend(["--journal", self._journal, "--resume"])
+        return args
 
     def _stream_output(self, process: subprocess.Popen[str]) -> None:
-        assert process.stdout is not None
-        for raw_line in iter(process.stdout.readline, ""):
+        assert process.stderr is not None
+        for raw_line in iter(process.stderr.readline, ""):
             line = ANSI_RE.sub("", raw_line.rstrip())
             if not line:
                 continue
             self._log.append(line)
-        process.stdout.close()
+        process.stderr.close()
+
+    def _read_events(self, fd: int) -> None:
+        with open(fd, "r", encoding="utf-8", errors="replace") as events:
+            for raw_line in events:
+                event = decode_event(raw_line)
+                if event is not None:
+                    self._handle_event(event)
 
     def _monitor_exit(self, process: subprocess.Popen[str]) -> None:
         process.wait()
-        timestamp = _dt.datetime.now().strftime("%H:%M:%S")
-        self._log.append(f"[system {timestamp}] Chat process exited.")
+        code = process.returncode
+        detail = f" (exit code {code})" if code else ""
+        self._log.append(f"[system {_timestamp()}] Chat process exited{detail}.")
+        RUNNER_EVENTS.inc(event="exit", mode=self._mode)
         with self._lock:
-            if self._process is process:
+            current = self._process is process
+            if current:
                 self._process = None
         self._clear_display()
+        if current:
+            self._on_exit(crashed=code != 0)
+
+    # --- in-process engine ----------------------------------------------
+
+    def _start_engine(self, args) -> None:
+        stop_event = threading.Event()
+        engine = threading.Thread(
+            target=self._run_engine, args=(args, stop_event), name="chat-engine", daemon=True
+        )
+        self._engine = engine
+        self._engine_stop = stop_event
+        engine.start()
+
+    def _stop_engine(self) -> bool:
+        with self._lock:
+            engine, stop_event = self._engine, self._engine_stop
+            if not engine or not engine.is_alive() or not stop_event or stop_event.is_set():
+                return False
+            stop_event.set()
+        # An HTTP call in flight can outlive this; its result is discarded.
+        engine.join(timeout=ENGINE_STOP_TIMEOUT)
+        with self._lock:
+            if self._engine is engine:
+                self._engine = None
+                self._engine_stop = None
+            if engine.is_alive():
+                self._retired.append(engine)
+        RUNNER_EVENTS.inc(event="stop", mode=self._mode)
+        self._clear_display()
+        return True
+
+    def _run_engine(self, args, stop_event: threading.Event) -> None:
+        lcd = None
+        if self._display:
+            try:
+                lcd = open(self._display, "w", encoding="utf-8", errors="ignore")
+            except OSError:
+                lcd = None
+        display = MultiOutput(*([lcd] if lcd else []))
+        crashed = False
+        try:
+            chat.run_conversation(
+                args,
+                out=display,
+                stop_event=stop_event,
+                on_event=self._handle_engine_event,
+                client=self._client,
+                pacer=self._pacer,
+            )
+        except Exception as exc:  # noqa: BLE001 surface engine crashes in the log
+            crashed = True
+            self._log.append(f"[system] Chat engine crashed: {exc}")
+        finally:
+            display.close()
+            if lcd:
+                lcd.close()
+            with self._lock:
+                # An engine the watchdog gave up on has already been replaced.
+                current = self._engine is threading.current_thread()
+                if current:
+                    self._engine = None
+                    self._engine_stop = None
+            if not current:
+                # A start may be waiting for this engine to go.
+                self._wake.set()
+            if current:
+                self._log.append(f"[system {_timestamp()}] Chat process exited.")
+                RUNNER_EVENTS.inc(event="exit", mode=self._mode)
+                self._clear_display()
+                self._on_exit(crashed=crashed)
+
+    def _handle_engine_event(self, kind: str, data: Dict[str, Any]) -> None:
+        event = event_from_dict(kind, data)
+        if event is not None:
+            self._handle_event(event)
+
+    # --- events -----------------------------------------------------------
+
+    def add_event_listener(self, listener: Callable[[ChatEvent], None]) -> None:
+        """Call ``listener`` with every decoded turn event, in either mode."""
+        self._event_listeners.append(listener)
+
+    def _handle_event(self, event: ChatEvent) -> None:
+        self._mark_progress(event.seconds if isinstance(event, Waiting) else 0.0)
+        if isinstance(event, TurnCompleted):
+            self._log.extend(self._format_turn(event.speaker, event.text, separator=True))
+        elif isinstance(event, TurnFailed):
+            self._log.extend(self._format_turn(event.speaker, f"[ERROR] {event.error}"))
+        elif isinstance(event, ConversationResumed):
+            self._log.append(
+                f"[system {_timestamp()}] Resumed at turn {event.turn + 1} "
+                f"({event.restored} messages restored)."
+            )
+        self._observe(event)
+        for listener in list(self._event_listeners):
+            try:
+                listener(event)
+            except Exception:
+                logging.warning("Chat event listener failed", exc_info=True)
+
+    @staticmethod
+    def _observe(event: ChatEvent) -> None:
+        if isinstance(event, TurnCompleted):
+            model = event.winning_model or event.model
+            API_LATENCY.observe(event.api_latency, model=model, bot=event.bot)
+            API_TTFB.observe(event.ttfb, model=model, bot=event.bot)
+            TYPING_DURATION.observe(event.typing_time, bot=event.bot)
+            TURNS.inc(bot=event.bot, outcome="ok")
+            if event.hedged:
+                HEDGES.inc(model=event.model, winner=model)
+            for direction, key in (("in", "prompt_tokens"), ("out", "completion_tokens")):
+                tokens = event.usage.get(key)
+                if isinstance(tokens, (int, float)):
+                    TOKENS.inc(tokens, model=model, bot=event.bot, direction=direction)
+        elif isinstance(event, TurnFailed):
+            TURNS.inc(bot=event.bot, outcome="error")
+        else:
+            return
+        if event.retries:
+            API_RETRIES.inc(event.retries, model=event.model, bot=event.bot)
+
+    # --- supervision ------------------------------------------------------
+
+    def _mark_progress(self, grace: float = 0.0) -> None:
+        now = self._clock()
+        self._last_progress = now
+        self._grace = max(grace, 0.0)
+        if self._down_since is not None:
+            with self._lock:
+                self._close_downtime(now)
+
+    def _close_downtime(self, now: float) -> None:
+        if self._down_since is not None:
+            self._downtime += now - self._down_since
+            self._down_since = None
+
+    def _on_exit(self, *, crashed: bool) -> None:
+        """Decide what follows the current chat's exit: nothing, a restart or giving up."""
+        now = self._clock()
+        with self._lock:
+            if self._desired is None:
+                return
+            if not crashed:
+                # The conversation ran its course (max_turns reached).
+                self._desired = None
+                return
+            if self._down_since is None:
+                self._down_since = now
+            self._crashes.append(now)
+            while now - self._crashes[0] > CRASH_LOOP_WINDOW:
+                self._crashes.popleft()
+            if len(self._crashes) > CRASH_LOOP_LIMIT:
+                self._desired = None
+                self._gave_up = True
+                RUNNER_EVENTS.inc(event="give_up", mode=self._mode)
+                message = (
+                    f"Chat crashed {len(self._crashes)} times in {CRASH_LOOP_WINDOW / 60:.0f} "
+                    "minutes; not restarting until it is started again."
+                )
+            else:
+                delay = min(RESTART_BACKOFF_BASE * 2 ** (len(self._crashes) - 1), RESTART_BACKOFF_MAX)
+                self._restart_at = now + delay
+                message = f"Restarting the chat in {delay:g}s."
+        self._log.append(f"[system {_timestamp()}] {message}")
+        self._wake.set()
+
+    def _watchdog_timeout(self, chat_config: Dict[str, Any]) -> float:
+        """Longest silence allowed after a turn event, plus WATCHDOG_TIMEOUT.
+
+        That is the turn delay, the longest the API may take and typing a
+        full reply. The client's turn deadline covers every retry and
+        Retry-After sleep, but the last attempt may run one connect and read
+        timeout past it, and a hedge can start a second such request once the
+        first has failed. Waits for rate-limit budget are announced by the
+        chat with a Waiting event and added on top.
+        """
+        client = self._client
+        if client is not None:
+            deadline, connect, read = client.turn_deadline, client.connect_timeout, client.read_timeout
+        else:
+            deadline, connect, read = GROQ_TURN_DEADLINE, GROQ_CONNECT_TIMEOUT, GROQ_READ_TIMEOUT
+        chains = 2 if parse_model_chain(HEDGE_FALLBACK_MODELS) and HEDGE_BUDGET > 0 else 1
+        api = chains * (deadline + connect + read)
+        completion = chat_config.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+        typing = CHARS_PER_TOKEN * completion * float(chat_config.get("typing_speed") or 0)
+        return WATCHDOG_TIMEOUT + float(chat_config.get("delay") or 0) + api + typing
+
+    def _supervise(self) -> None:
+        while True:
+            self._wake.clear()
+            now = self._clock()
+            launch_failed = False
+            with self._lock:
+                config = self._desired
+                if config is not None and self._restart_at is not None and now >= self._restart_at:
+                    if self._engine_draining():
+                        self._restart_at = now + ENGINE_DRAIN_POLL
+                    else:
+                        restarted, self._start_deferred = not self._start_deferred, False
+                        self._restart_at = None
+                        self._restarts += restarted
+                        try:
+                            self._launch(config, restarted=restarted)
+                        except Exception as exc:  # noqa: BLE001 counts as another crash
+                            self._log.append(f"[system {_timestamp()}] Restart failed: {exc}")
+                            launch_failed = True
+                restart_at = self._restart_at
+            if launch_failed:
+                self._on_exit(crashed=True)
+                continue
+            deadline = None
+            if config is not None and restart_at is None and WATCHDOG_TIMEOUT > 0 and self.is_running():
+                deadline = self._last_progress + self._grace + self._watchdog_timeout(config)
+                if now >= deadline:
+                    self._kill_hung(now - self._last_progress)
+                    continue
+            waits = [moment - now for moment in (restart_at, deadline) if moment is not None]
+            self._wait(self._wake, min(waits) if waits else None)
+
+    def _engine_draining(self) -> bool:
+        """Whether a previous in-process engine is still running; called with ``_lock`` held."""
+        self._retired = [engine for engine in self._retired if engine.is_alive()]
+        return bool(self._retired)
+
+    def _kill_hung(self, silent_for: float) -> None:
+        self._hangs += 1
+        RUNNER_EVENTS.inc(event="hang", mode=self._mode)
+        self._log.append(
+            f"[system {_timestamp()}] No progress for {silent_for:.0f}s; restarting the chat."
+        )
+        self._last_progress = self._clock()
+        if self._mode != "inprocess":
+            # The exit monitor schedules the restart.
+            with self._lock:
+                proc = self._process
+            if proc is not None:
+                proc.kill()
+            return
+        # A thread can't be killed: abandon it (its result is discarded) and
+        # let a fresh engine take over the display.
+        with self._lock:
+            engine, stop_event = self._engine, self._engine_stop
+            self._engine = None
+            self._engine_stop = None
+            if engine is not None:
+                self._retired.append(engine)
+        if stop_event is not None:
+            stop_event.set()
+        self._clear_display()
+        self._on_exit(crashed=True)
+
+    @staticmethod
+    def _format_turn(speaker: str, body: str, *, separator: bool = False) -> list[str]:
+        lines = [f"[{speaker}]:"]
+        lines.extend("  " + line for line in chat.wrap_text(body, LCD_WIDTH))
+        if separator:
+            lines.append("─" * LCD_WIDTH)
+        return lines
 
     def _clear_display(self) -> None:
         """Best-effort clear of the attached console to prevent burn-in."""
+        if not self._display:
+            return
         try:
-            with open("/dev/tty1", "w", encoding="utf-8", errors="ignore") as lcd:
+            with open(self._display, "w", encoding="utf-8", errors="ignore") as lcd:
                 lcd.write("\033c")
                 lcd.flush()
         except OSError:
@@ -0,0 +1,164 @@
+"""Append-only journal of a running conversation, for resuming it later.
+
+The journal is a JSON-lines file. A ``snapshot`` line holds everything a
+conversation needs to carry on (topic, first speaker, next turn and the
+history's state); each completed turn then appends one short ``turn`` line.
+Loading takes the last snapshot and replays the turns after it. Once
+``compact_after`` turns have piled up the file is rewritten as a single
+snapshot, atomically, so the SD card sees one small append per turn and an
+occasional rewrite of a few kilobytes. An ``end`` line marks a conversation
+that ran to completion and should not be resumed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from conversation import ConversationHistory
+
+JOURNAL_VERSION = 1
+# Turn lines after the last snapshot before the journal is compacted.
+COMPACT_AFTER = 50
+
+
+@dataclass
+class Checkpoint:
+    topic: str
+    first_speaker: str
+    # Index of the next turn to play.
+    turn: int
+    history: Dict[str, Any]
+    finished: bool = False
+
+    def can_resume(self, topic: Optional[str] = None, max_turns: int = 0) -> bool:
+        """Whether a run about ``topic`` (any, if None) may carry on from here."""
+        if self.finished or (topic is not None and topic != self.topic):
+            return False
+        return max_turns <= 0 or self.turn < max_turns
+
+    def restore(self, window: int, token_budget: int = 0) -> ConversationHistory:
+        return ConversationHistory.from_state(self.history, window, token_budget)
+
+
+def _encode(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+class ConversationJournal:
+    """Checkpoints of one conversation, kept in the file at ``path``."""
+
+    def __init__(self, path: Path | str, *, compact_after: int = COMPACT_AFTER) -> None:
+        self.path = Path(path)
+        self.compact_after = max(compact_after, 1)
+        self._file: Optional[TextIO] = None
+        self._header: Dict[str, Any] = {}
+        self._pending = 0
+
+    def load(self) -> Optional[Checkpoint]:
+        """The latest checkpoint, or None without a usable journal.
+
+        A line torn by a power cut ends the replay; everything before it counts.
+        """
+        try:
+            with self.path.open(encoding="utf-8") as handle:
+                lines = handle.readlines()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logging.warning("Could not read the conversation journal %s", self.path, exc_info=True)
+            return None
+        snapshot: Optional[Dict[str, Any]] = None
+        turns: List[Tuple[int, str, str]] = []
+        finished = False
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            kind = record.get("t") if isinstance(record, dict) else None
+            if kind == "snapshot" and record.get("v") == JOURNAL_VERSION:
+                snapshot, turns, finished = record, [], False
+            elif kind == "turn" and snapshot is not None:
+                turns.append((int(record["turn"]), str(record["speaker"]), str(record["text"])))
+            elif kind == "end":
+                finished = True
+        if snapshot is None:
+            return None
+        history = dict(snapshot["history"])
+        history["turns"] = [*history.get("turns", ()), *((speaker, text) for _, speaker, text in turns)]
+        history["turn_count"] = int(history.get("turn_count", 0)) + len(turns)
+        return Checkpoint(
+            topic=str(snapshot.get("topic", "")),
+            first_speaker=str(snapshot.get("first_speaker", "bot1")),
+            turn=turns[-1][0] + 1 if turns else int(snapshot.get("turn", 0)),
+            history=history,
+            finished=finished,
+        )
+
+    def begin(self, topic: str, first_speaker: str, history: ConversationHistory, turn: int = 0) -> None:
+        """Start journaling from this state, replacing whatever the file held."""
+        self._header = {"topic": topic, "first_speaker": first_speaker}
+        self.compact(history, turn)
+
+    def record_turn(self, turn: int, speaker: str, text: str, history: ConversationHistory) -> None:
+        """Append one completed turn; ``history`` must already include it."""
+        if self._file is None:
+            return
+        try:
+            self._file.write(_encode({"t": "turn", "turn": turn, "speaker": speaker, "text": text}))
+            self._file.flush()
+        except OSError:
+            logging.warning("Could not append to the conversation journal %s", self.path, exc_info=True)
+            return
+        self._pending += 1
+        if self._pending >= self.compact_after:
+            self.compact(history, turn + 1)
+
+    def finish(self) -> None:
+        """Mark the conversation as complete so it is not resumed."""
+        if self._file is None:
+            return
+        try:
+            self._file.write(_encode({"t": "end"}))
+            self._file.flush()
+        except OSError:
+            logging.warning("Could not append to the conversation journal %s", self.path, exc_info=True)
+
+    def compact(self, history: ConversationHistory, turn: int) -> None:
+        """Rewrite the journal as one snapshot of ``history`` before ``turn``."""
+        self.close()
+        record = {"t": "snapshot", "v": JOURNAL_VERSION, **self._header, "turn": turn, "history": history.to_state()}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}-")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    handle.write(_encode(record))
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+            self._file = self.path.open("a", encoding="utf-8")
+        except OSError:
+            logging.warning("Could not write the conversation journal %s", self.path, exc_info=True)
+            return
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+
+__all__ = ["COMPACT_AFTER", "Checkpoint", "ConversationJournal"]
@@ -36,6 +36,10 @@ def _get_env(name: str, default: Optional[str] = None, *, required: bool = False
         )
     return value
 
+
+def _parse_bool(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
 # === LCD / Display configuration ===
 LCD_WIDTH = int(_get_env("CHAT_LCD_WIDTH", "55"))
 
@@ -43,17 +47,99 @@ LCD_WIDTH = int(_get_env("CHAT_LCD_WIDTH", "55"))
 GROQ_ENDPOINT = _get_env(
     "GROQ_ENDPOINT", "https://api.groq.com/openai/v1/chat/completions"
 )
+GROQ_CONNECT_TIMEOUT = float(_get_env("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_READ_TIMEOUT = float(_get_env("GROQ_READ_TIMEOUT", "30"))
+GROQ_TURN_DEADLINE = float(_get_env("GROQ_TURN_DEADLINE", "60"))
+GROQ_MAX_RETRIES = int(_get_env("GROQ_MAX_RETRIES", "3"))
+# Keep-alive connections kept per API key.
+GROQ_POOL_SIZE = int(_get_env("GROQ_POOL_SIZE", "4"))
 GROQ_API_KEYS = {
     "bot1": _get_env("GROQ_BOT1_KEY", required=True) or "",
     "bot2": _get_env("GROQ_BOT2_KEY", required=True) or "",
 }
 
+# === Turn pacing ===
+# Set CHAT_MIN_DELAY to pace turns from Groq's rate-limit headers, as fast as
+# the limits allow but never faster than this; unset keeps the fixed delay
+# (which pacing only ever stretches).
+_MIN_DELAY = _get_env("CHAT_MIN_DELAY")
+PACING_MIN_DELAY = float(_MIN_DELAY) if _MIN_DELAY else None
+# Let a bot borrow the other bot's API key while its own is exhausted.
+PACING_SHARE_KEYS = _parse_bool(_get_env("CHAT_SHARE_KEYS", "false"))
+
+# === Hedged requests ===
+# Comma-separated fallback models, tried in order when a reply is slower to
+# start than the model's recent p95; empty disables hedging.
+HEDGE_FALLBACK_MODELS = _get_env("CHAT_HEDGE_FALLBACKS", "") or ""
+# Largest share of turns that may send a hedge request (0 disables hedging).
+HEDGE_BUDGET = float(_get_env("CHAT_HEDGE_BUDGET", "0.1"))
+
 # === Control panel credentials ===
 ADMIN_USERNAME = _get_env("CHAT_ADMIN_USERNAME", required=True)
 ADMIN_PASSWORD = _get_env("CHAT_ADMIN_PASSWORD", required=True)
 
+# Seconds the panel coalesces setting changes before rewriting .env.
+SETTINGS_WRITE_DELAY = float(_get_env("CHAT_SETTINGS_WRITE_DELAY", "2"))
+
+# === Chat runner configuration ===
+# "subprocess" launches chat.py per start; "inprocess" runs it on a worker thread.
+RUNNER_MODE = _get_env("CHAT_RUNNER_MODE", "subprocess")
+# Keep a pre-started chat.py waiting (imports done, API connection open) so a
+# subprocess-mode start only has to hand it the conversation's settings.
+RUNNER_STANDBY = _parse_bool(_get_env("CHAT_RUNNER_STANDBY", "true"))
+# Seconds without a turn event (on top of the configured delay and the time
+# a full reply takes to type) before a hung chat is killed and restarted;
+# 0 disables the watchdog.
+WATCHDOG_TIMEOUT = float(_get_env("CHAT_WATCHDOG_TIMEOUT", "120"))
+# Crashed chats restart after 1s, 2s, 4s, ... up to this many seconds, and
+# are left down after more than CRASH_LOOP_LIMIT crashes in ten minutes.
+RESTART_BACKOFF_MAX = float(_get_env("CHAT_RESTART_BACKOFF_MAX", "60"))
+CRASH_LOOP_LIMIT = int(_get_env("CHAT_CRASH_LOOP_LIMIT", "5"))
+# Upper bound on extra conversations run side by side in the panel's pool.
+POOL_MAX_CONVERSATIONS = int(_get_env("CHAT_POOL_MAX_CONVERSATIONS", "32"))
+# Consoles a pooled conversation may be typed on, comma-separated; when
+# empty, any /dev/ttyN character device is allowed.
+POOL_DISPLAYS = _get_env("CHAT_POOL_DISPLAYS", "") or ""
+
+# === Topic prefetch ===
+# Facts fetched ahead of time, and where they are cached between restarts.
+TOPIC_PREFETCH = int(_get_env("CHAT_TOPIC_PREFETCH", "8"))
+TOPIC_CACHE_FILE = _get_env("CHAT_TOPIC_CACHE") or str(Path(__file__).resolve().parent / ".topic_cache.json")
+
+# === Conversation checkpoints ===
+# The panel's chat journals every turn here and, when CHAT_RESUME is on, a
+# start with the same topic picks up where the last run stopped.
+CHECKPOINT_RESUME = _parse_bool(_get_env("CHAT_RESUME", "true"))
+CHECKPOINT_FILE = _get_env("CHAT_CHECKPOINT_FILE") or str(Path(__file__).resolve().parent / ".chat_journal.jsonl")
+
+# === Response cache (record/replay) ===
+# "passthrough" always calls Groq, "record" also stores every reply and
+# "replay" answers only from the store, without network access.
+CACHE_MODE = _get_env("CHAT_CACHE_MODE", "passthrough")
+CACHE_DIR = _get_env("CHAT_CACHE_DIR") or str(Path(__file__).resolve().parent / ".response_cache")
+CACHE_MAX_MB = float(_get_env("CHAT_CACHE_MAX_MB", "64"))
+CACHE_REPLAY_LATENCY = _parse_bool(_get_env("CHAT_CACHE_REPLAY_LATENCY", "false"))
+
 # === Log configuration ===
 LOG_MAX_LINES = int(_get_env("CHAT_LOG_MAX_LINES", "200"))
+# Memory for the held lines (UTF-8), allocated up front; whichever of the
+# two limits is reached first evicts the oldest lines.
+LOG_MAX_BYTES = int(_get_env("CHAT_LOG_MAX_BYTES", str(64 * 1024)))
+# Evicted lines go to rotating gzip segments here, served by /logs/history.
+# LOG_ARCHIVE_SEGMENTS=0 turns the archive off.
+LOG_ARCHIVE_DIR = _get_env("CHAT_LOG_ARCHIVE_DIR") or str(Path(__file__).resolve().parent / ".log_archive")
+LOG_ARCHIVE_SEGMENTS = int(_get_env("CHAT_LOG_ARCHIVE_SEGMENTS", "8"))
+LOG_ARCHIVE_SEGMENT_BYTES = int(_get_env("CHAT_LOG_ARCHIVE_SEGMENT_KB", "256")) * 1024
+# Live log streams are closed after this long; browsers reconnect and resume.
+LOG_STREAM_MAX_SECONDS = float(_get_env("CHAT_LOG_STREAM_MAX_SECONDS", "300"))
+
+# === Control panel web server ===
+# "auto" uses waitress when installed and otherwise a bounded built-in
+# server; "dev" is Flask's development server.
+PANEL_SERVER = _get_env("CHAT_PANEL_SERVER", "auto")
+# Worker threads; every open live-log stream holds one, so at most half of
+# them are given to streams and later viewers fall back to polling.
+PANEL_THREADS = int(_get_env("CHAT_PANEL_THREADS", "16"))
 
 # === Default conversation / scheduler settings ===
 _DEFAULT_TOPIC = _get_env("CHAT_DEFAULT_TOPIC", "Who are you?")
@@ -63,12 +149,20 @@ _DEFAULT_MAX_TURNS = int(_get_env("CHAT_DEFAULT_MAX_TURNS", "0"))
 _DEFAULT_DELAY = float(_get_env("CHAT_DEFAULT_DELAY", "30"))
 _DEFAULT_TYPING_SPEED = float(_get_env("CHAT_DEFAULT_TYPING_SPEED", "0.01"))
 _DEFAULT_CONTEXT_LIMIT = int(_get_env("CHAT_DEFAULT_CONTEXT", "6"))
+# Prompt-token budget for the context; 0 keeps the message-count limit above.
+_DEFAULT_CONTEXT_TOKENS = int(_get_env("CHAT_DEFAULT_CONTEXT_TOKENS", "0"))
 _DEFAULT_TEMPERATURE = float(_get_env("CHAT_DEFAULT_TEMPERATURE", "1.0"))
 _DEFAULT_MAX_COMPLETION_TOKENS = int(_get_env("CHAT_DEFAULT_MAX_COMPLETION_TOKENS", "256"))
+_DEFAULT_STREAM = _get_env("CHAT_DEFAULT_STREAM", "false")
+_DEFAULT_PIPELINE = _get_env("CHAT_DEFAULT_PIPELINE", "false")
 _DEFAULT_START_HOUR = _get_env("CHAT_DEFAULT_START_HOUR")
 _DEFAULT_START_MINUTE = _get_env("CHAT_DEFAULT_START_MINUTE")
 _DEFAULT_STOP_HOUR = _get_env("CHAT_DEFAULT_STOP_HOUR")
 _DEFAULT_STOP_MINUTE = _get_env("CHAT_DEFAULT_STOP_MINUTE")
+# Weekly windows, e.g. "mon-fri 07:00-09:00, 17:30-23:00; sat,sun 10:00-22:00".
+_DEFAULT_SCHEDULE = _get_env("CHAT_DEFAULT_SCHEDULE", "") or ""
+# IANA zone the schedule is read in; blank uses the system's local time.
+SCHEDULE_TIMEZONE = _get_env("CHAT_TIMEZONE", "") or ""
 
 
 def _parse_optional_int(value: Optional[str]) -> Optional[int]:
@@ -90,12 +184,16 @@ def load_control_defaults() -> Dict[str, Any]:
         "delay": _DEFAULT_DELAY,
         "typing_speed": _DEFAULT_TYPING_SPEED,
         "context_limit": _DEFAULT_CONTEXT_LIMIT,
+        "context_tokens": _DEFAULT_CONTEXT_TOKENS,
         "temperature": _DEFAULT_TEMPERATURE,
         "max_completion_tokens": _DEFAULT_MAX_COMPLETION_TOKENS,
+        "stream": _parse_bool(_DEFAULT_STREAM),
+        "pipeline": _parse_bool(_DEFAULT_PIPELINE),
         "start_hour": _parse_optional_int(_DEFAULT_START_HOUR),
         "start_minute": _parse_optional_int(_DEFAULT_START_MINUTE),
         "stop_hour": _parse_optional_int(_DEFAULT_STOP_HOUR),
         "stop_minute": _parse_optional_int(_DEFAULT_STOP_MINUTE),
+        "schedule": _DEFAULT_SCHEDULE,
     }
 
 
@@ -103,8 +201,41 @@ __all__ = [
     "LCD_WIDTH",
     "GROQ_ENDPOINT",
     "GROQ_API_KEYS",
+    "GROQ_CONNECT_TIMEOUT",
+    "GROQ_READ_TIMEOUT",
+    "GROQ_TURN_DEADLINE",
+    "GROQ_MAX_RETRIES",
+    "GROQ_POOL_SIZE",
+    "PACING_MIN_DELAY",
+    "PACING_SHARE_KEYS",
+    "HEDGE_FALLBACK_MODELS",
+    "HEDGE_BUDGET",
     "ADMIN_USERNAME",
     "ADMIN_PASSWORD",
+    "SETTINGS_WRITE_DELAY",
+    "RUNNER_MODE",
+    "RUNNER_STANDBY",
+    "WATCHDOG_TIMEOUT",
+    "RESTART_BACKOFF_MAX",
+    "CRASH_LOOP_LIMIT",
+    "POOL_MAX_CONVERSATIONS",
+    "POOL_DISPLAYS",
+    "TOPIC_PREFETCH",
+    "TOPIC_CACHE_FILE",
+    "CHECKPOINT_RESUME",
+    "CHECKPOINT_FILE",
+    "CACHE_MODE",
+    "CACHE_DIR",
+    "CACHE_MAX_MB",
+    "CACHE_REPLAY_LATENCY",
     "LOG_MAX_LINES",
+    "LOG_MAX_BYTES",
+    "LOG_ARCHIVE_DIR",
+    "LOG_ARCHIVE_SEGMENTS",
+    "LOG_ARCHIVE_SEGMENT_BYTES",
+    "LOG_STREAM_MAX_SECONDS",
+    "PANEL_SERVER",
+    "PANEL_THREADS",
+    "SCHEDULE_TIMEZONE",
     "load_control_defaults",
 ]
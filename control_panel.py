@@ -1,40 +1,102 @@
 from __future__ import annotations
 
+import atexit
+import datetime
+import hashlib
+import json
 import logging
 import socket
-import requests
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, make_response, render_template, request
+from markupsafe import Markup
 
 from chat_runner import ChatRunner
+from checkpoint import ConversationJournal
 from config import (
     ADMIN_PASSWORD,
     ADMIN_USERNAME,
+    LOG_ARCHIVE_DIR,
+    LOG_ARCHIVE_SEGMENTS,
     LOG_MAX_LINES,
+    LOG_STREAM_MAX_SECONDS,
+    PANEL_SERVER,
+    PANEL_THREADS,
     load_control_defaults,
 )
-from log_buffer import LogBuffer
-from scheduler import ChatScheduler
+from conversation_pool import ConversationPool, InvalidDisplay, PoolFull
+from log_archive import LogArchive
+from log_buffer import LogBuffer, LogSlice, parse_cursor
+from metrics import LOG_REQUESTS, REGISTRY, counter_func, gauge
+from panel_server import install_response_filters, serve
+from scheduler import ChatScheduler, parse_schedule, windows_from_config
+from settings_store import SettingsStore
+from topic_provider import TopicProvider
 
 BASE_DIR = Path(__file__).resolve().parent
 app = Flask(
     __name__, template_folder=str(BASE_DIR / "templates"), static_folder=str(BASE_DIR / "static")
 )
+install_response_filters(app)
 
 # Keep request logs quiet unless something problematic happens.
 logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
 ENV_FILE = BASE_DIR / ".env"
 
-log_buffer = LogBuffer(LOG_MAX_LINES)
+log_archive = LogArchive(LOG_ARCHIVE_DIR) if LOG_ARCHIVE_SEGMENTS > 0 else None
+if log_archive is not None:
+    atexit.register(log_archive.close)
+log_buffer = LogBuffer(LOG_MAX_LINES, archive=log_archive)
 control_config: Dict[str, Any] = load_control_defaults()
 chat_runner = ChatRunner(log_buffer)
 chat_scheduler = ChatScheduler(chat_runner, control_config)
+conversation_pool = ConversationPool()
+topic_provider = TopicProvider()
+settings_store = SettingsStore(ENV_FILE)
+atexit.register(settings_store.close)
 is_authenticated = False
 
-USELESS_FACTS_ENDPOINT = "https://uselessfacts.jsph.pl/api/v2/facts/random"
+gauge("chat_log_buffer_lines", "Lines held in the log buffer.", lambda: log_buffer.stats()["lines"])
+gauge("chat_log_buffer_bytes", "UTF-8 size of the held log lines.", lambda: log_buffer.stats()["bytes"])
+counter_func(
+    "chat_log_lines_appended_total",
+    "Lines appended to the log buffer since the panel started.",
+    lambda: log_buffer.stats()["appended_total"],
+)
+counter_func(
+    "chat_log_lines_archived_total",
+    "Evicted log lines written to the on-disk archive since the panel started.",
+    lambda: log_archive.archived_total if log_archive is not None else 0,
+)
+gauge("chat_running", "1 while a conversation is running.", lambda: int(chat_runner.is_running()))
+gauge(
+    "chat_runner_downtime_seconds",
+    "Time the supervised chat spent down between a crash or hang and its restart.",
+    lambda: chat_runner.supervision()["downtime"],
+)
+gauge("chat_pool_conversations", "Conversations held in the pool.", lambda: len(conversation_pool))
+gauge("chat_pool_running", "Pooled conversations currently running.", conversation_pool.running_count)
+gauge("chat_topics_prefetched", "Topics waiting in the prefetch queue.", lambda: len(topic_provider))
+
+LOG_STREAM_HEARTBEAT_SECONDS = 15.0
+# On a server with bounded workers every live log stream holds one of them;
+# run() caps the streams, and viewers beyond the cap are turned away with a
+# 503 so their browser falls back to polling /logs.
+_stream_slots: Optional[threading.BoundedSemaphore] = None
+
+# Rendered control pages, keyed by everything they show except the live log,
+# which is spliced into the cached page on every request.
+PAGE_CACHE_SIZE = 8
+_CHAT_FEED_SLOT = "<!-- chat-feed -->"
+_page_cache: "OrderedDict[str, str]" = OrderedDict()
+_page_cache_lock = threading.Lock()
+# The last rendered log feed and the cursor it was rendered at.
+_feed_cache: tuple[str, str] = ("", "")
 
 
 def _get_local_ip() -> str:
@@ -46,38 +108,12 @@ def _get_local_ip() -> str:
         return "127.0.0.1"
 
 
-def _request_topic_from_uselessfacts() -> str | None:
-    try:
-        response = requests.get(USELESS_FACTS_ENDPOINT, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-    except Exception:
-        return None
-
-    if not isinstance(data, dict):
-        return None
-
-    text = data.get("text") or data.get("fact")
-    if not isinstance(text, str):
-        return None
-
-    text = text.strip()
-    if not text:
-        return None
-
-    language = data.get("language")
-    if isinstance(language, str) and language and not language.lower().startswith("en"):
-        return None
-
-    return text
-
-
 def _apply_new_topic(topic: str, *, persist: bool = True) -> None:
     control_config["topic"] = topic
     if not persist:
         return
     try:
-        _write_env_updates({"CHAT_DEFAULT_TOPIC": topic})
+        settings_store.update({"CHAT_DEFAULT_TOPIC": topic})
     except Exception:
         logging.warning("Failed to persist generated topic to .env", exc_info=True)
 
@@ -88,12 +124,17 @@ def _update_config_from_form(form_data: Dict[str, str]) -> List[str]:
         if key in form_data:
             raw_value = form_data[key]
             try:
-                if key in {"max_turns", "context_limit", "max_completion_tokens"}:
+                if key in {"max_turns", "context_limit", "context_tokens", "max_completion_tokens"}:
                     control_config[key] = int(raw_value)
                 elif key in {"delay", "typing_speed", "temperature"}:
                     control_config[key] = float(raw_value)
                 elif key in {"start_hour", "start_minute", "stop_hour", "stop_minute"}:
                     control_config[key] = int(raw_value) if raw_value != "" else None
+                elif key == "schedule":
+                    parse_schedule(raw_value)
+                    control_config[key] = raw_value.strip()
+                elif key in {"stream", "pipeline"}:
+                    control_config[key] = raw_value.strip().lower() in {"1", "true", "yes", "on"}
                 else:
                     control_config[key] = raw_value
             except ValueError:
@@ -101,31 +142,33 @@ def _update_config_from_form(form_data: Dict[str, str]) -> List[str]:
     return warnings
 
 
-def _write_env_updates(updates: Dict[str, str]) -> None:
-    existing_lines = []
-    seen_keys = set()
-    if ENV_FILE.exists():
-        existing_lines = ENV_FILE.read_text().splitlines()
-
-    new_lines: List[str] = []
-    for line in existing_lines:
-        stripped = line.strip()
-        if not stripped or stripped.startswith("#") or "=" not in line:
-            new_lines.append(line)
-            continue
-        key, _ = line.split("=", 1)
-        key = key.strip()
-        if key in updates:
-            new_lines.append(f"{key}={updates[key]}")
-            seen_keys.add(key)
-        else:
-            new_lines.append(line)
-
-    for key, value in updates.items():
-        if key not in seen_keys:
-            new_lines.append(f"{key}={value}")
-
-    ENV_FILE.write_text("\n".join(new_lines) + ("\n" if new_lines else ""))
+def _handle_pool_action(action: str, form_data: Dict[str, str]) -> str:
+    conversation_id = form_data.get("conversation_id", "")
+    if action == "pool_create":
+        pool_config = dict(control_config)
+        pool_config["topic"] = form_data.get("pool_topic", "").strip() or control_config["topic"]
+        pool_config["model"] = form_data.get("pool_model") or control_config["model"]
+        try:
+            conversation = conversation_pool.create(
+                pool_config, display=form_data.get("pool_display", "").strip() or None
+            )
+        except (PoolFull, InvalidDisplay) as exc:
+            return f"⚠️ {exc}"
+        conversation_pool.start(conversation.id)
+        return f"✅ Conversation {conversation.id} started."
+    if action == "pool_start":
+        if conversation_pool.start(conversation_id):
+            return f"✅ Conversation {conversation_id} started."
+        return f"⚠️ Conversation {conversation_id} is already running or gone."
+    if action == "pool_stop":
+        if conversation_pool.stop(conversation_id):
+            return f"⏹ Conversation {conversation_id} stopped."
+        return f"⚠️ Conversation {conversation_id} is not running."
+    if action == "pool_remove":
+        if conversation_pool.remove(conversation_id):
+            return f"🗑 Conversation {conversation_id} removed."
+        return f"⚠️ No conversation {conversation_id}."
+    return ""
 
 
 def _persist_env_settings() -> None:
@@ -134,19 +177,69 @@ def _persist_env_settings() -> None:
         "CHAT_DEFAULT_START_MINUTE": "" if control_config.get("start_minute") is None else str(control_config["start_minute"]),
         "CHAT_DEFAULT_STOP_HOUR": "" if control_config.get("stop_hour") is None else str(control_config["stop_hour"]),
         "CHAT_DEFAULT_STOP_MINUTE": "" if control_config.get("stop_minute") is None else str(control_config["stop_minute"]),
+        "CHAT_DEFAULT_SCHEDULE": control_config.get("schedule", ""),
         "CHAT_DEFAULT_TOPIC": control_config.get("topic", ""),
         "CHAT_DEFAULT_MODEL": control_config.get("model", ""),
     }
-    _write_env_updates(updates)
+    settings_store.update(updates)
+
+
+def _render_control_page(log_slice: LogSlice, **context: Any) -> Response:
+    """The control page, re-rendered only when something on it changed.
+
+    A GET carries an ETag over the page's state and the log cursor, so a
+    reload with nothing new is answered with an empty 304.
+    """
+    global _feed_cache
+    supervision = context["supervision"]
+    key = json.dumps(
+        {
+            **context,
+            "pool": [conversation.describe() for conversation in context["pool"]],
+            # Only the whole seconds the page shows.
+            "supervision": {
+                **supervision,
+                "downtime": round(supervision["downtime"]),
+                "restart_in": None if supervision["restart_in"] is None else round(supervision["restart_in"]),
+            },
+        },
+        sort_keys=True,
+        default=str,
+    )
+    etag = hashlib.sha1(f"{key}\0{log_slice.cursor}".encode("utf-8")).hexdigest()[:20]
+    if request.method == "GET" and request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        with _page_cache_lock:
+            page = _page_cache.get(key)
+            if page is not None:
+                _page_cache.move_to_end(key)
+        if page is None:
+            page = render_template("control.html", chat_feed=Markup(_CHAT_FEED_SLOT), **context)
+            with _page_cache_lock:
+                _page_cache[key] = page
+                while len(_page_cache) > PAGE_CACHE_SIZE:
+                    _page_cache.popitem(last=False)
+        cursor, feed = _feed_cache
+        if cursor != log_slice.cursor:
+            feed = render_template("_chat_feed.html", log_lines=log_slice.lines, log_cursor=log_slice.cursor)
+            _feed_cache = (log_slice.cursor, feed)
+        response = make_response(page.replace(_CHAT_FEED_SLOT, feed, 1))
+    if request.method == "GET":
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @app.route("/", methods=["GET", "POST"])
-def control() -> str:
+def control() -> Any:
     global is_authenticated
 
     if not is_authenticated or request.form.get("action") == "logout":
         if request.method == "POST" and request.form.get("action") == "logout":
+            chat_scheduler.hold()
             chat_runner.stop()
+            conversation_pool.stop_all()
             is_authenticated = False
             return render_template("login.html", error=None)
 
@@ -165,6 +258,7 @@ def control() -> str:
     message_segments: List[str] = []
     if request.method == "POST":
         message_segments.extend(_update_config_from_form(request.form))
+        chat_scheduler.notify()
         action = request.form.get("action")
 
         persist_env = action in {"save", "start", "restart", "stop"}
@@ -173,21 +267,28 @@ def control() -> str:
             message_segments.append("✅ Settings saved.")
 
         elif action == "start":
+            chat_scheduler.release()
             if chat_runner.start(control_config):
                 message_segments.append("✅ Chat started.")
             else:
                 message_segments.append("⚠️ Chat is already running.")
 
         elif action == "stop":
+            # Otherwise the scheduler would start it again inside an open window.
+            chat_scheduler.hold()
             if chat_runner.stop():
                 message_segments.append("⏹ Chat stopped.")
             else:
                 message_segments.append("⚠️ No chat is running.")
 
         elif action == "restart":
+            chat_scheduler.release()
             chat_runner.restart(control_config)
             message_segments.append("🔁 Chat restarted.")
 
+        elif action and action.startswith("pool_"):
+            message_segments.append(_handle_pool_action(action, request.form))
+
         if persist_env:
             try:
                 _persist_env_settings()
@@ -195,57 +296,216 @@ def control() -> str:
                 message_segments.append("⚠️ Failed to persist schedule to .env.")
 
     running = chat_runner.is_running()
-    schedule_enabled = None not in (
-        control_config.get("start_hour"),
-        control_config.get("start_minute"),
-        control_config.get("stop_hour"),
-        control_config.get("stop_minute"),
-    )
-
-    log_lines = log_buffer.snapshot()
+    try:
+        schedule_enabled = bool(windows_from_config(control_config))
+    except ValueError:
+        schedule_enabled = False
+    next_running, next_at = chat_scheduler.next_transition()
+    next_transition = None
+    if next_at is not None:
+        action = "Stop" if next_running else "Start"
+        next_transition = f"{action} {datetime.datetime.fromtimestamp(next_at, chat_scheduler.timezone):%a %H:%M}"
+
+    log_slice = log_buffer.read_since(None, 0)
     status_message = " ".join(message_segments) if message_segments else "Ready for commands."
 
-    return render_template(
-        "control.html",
+    return _render_control_page(
+        log_slice,
         config=control_config,
         running=running,
         schedule_enabled=schedule_enabled,
+        next_transition=next_transition,
+        supervision=chat_runner.supervision(),
         status_message=status_message,
-        log_lines=log_lines,
+        pool=conversation_pool.conversations(),
+        pool_max=conversation_pool.max_conversations,
+    )
+
+
+def _logs_response(buffer: LogBuffer) -> Any:
+    """Lines from ``buffer``, incrementally when the client sends ``?since=<cursor>``.
+
+    The ETag is the buffer's current cursor, so a poll that finds nothing new
+    is answered with an empty 304.
+    """
+    generation, seq = parse_cursor(request.args.get("since"))
+    log_slice = buffer.read_since(generation, seq)
+    etag = log_slice.cursor
+    # Weak comparison: gzip turns the ETag into a weak one.
+    if request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+    else:
+        response = jsonify(
+            {
+                "lines": log_slice.lines,
+                "cursor": log_slice.cursor,
+                "reset": log_slice.reset,
+                "max_lines": buffer.max_lines,
+            }
+        )
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    LOG_REQUESTS.inc(status=str(response.status_code))
+    return response
+
+
+def _sse_lines_event(buffer: LogBuffer, log_slice: LogSlice) -> str:
+    payload = json.dumps(
+        {"lines": log_slice.lines, "reset": log_slice.reset, "max_lines": buffer.max_lines}
+    )
+    return f"id: {log_slice.cursor}\nevent: lines\ndata: {payload}\n\n"
+
+
+def _log_stream_response(buffer: LogBuffer) -> Any:
+    """Server-Sent Events feed of new lines in ``buffer``.
+
+    Resumes from ``Last-Event-ID`` (or ``?since=``) after a reconnect, sends a
+    comment heartbeat while idle, and ends after LOG_STREAM_MAX_SECONDS so a
+    worker thread is never pinned forever; EventSource reconnects on its own.
+    With every stream slot taken it answers 503 and the page polls instead.
+    """
+    slots = _stream_slots
+    if slots is not None and not slots.acquire(blocking=False):
+        return jsonify({"error": "Too many live streams; poll /logs instead"}), 503
+    generation, seq = parse_cursor(
+        request.headers.get("Last-Event-ID") or request.args.get("since")
     )
 
+    def events():
+        nonlocal generation, seq
+        deadline = time.monotonic() + LOG_STREAM_MAX_SECONDS
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            log_slice = buffer.read_since(generation, seq)
+            if log_slice.reset or log_slice.lines:
+                yield _sse_lines_event(buffer, log_slice)
+            generation, seq = log_slice.generation, log_slice.last_seq
+            timeout = min(LOG_STREAM_HEARTBEAT_SECONDS, max(deadline - time.monotonic(), 0))
+            if not buffer.wait_for_change(generation, seq, timeout):
+                yield ": heartbeat\n\n"
+
+    response = Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    if slots is not None:
+        response.call_on_close(slots.release)
+    return response
+
 
 @app.route("/logs")
 def logs() -> Any:
-    return jsonify({"lines": log_buffer.snapshot()})
+    return _logs_response(log_buffer)
+
+
+@app.route("/logs/stream")
+def logs_stream() -> Any:
+    return _log_stream_response(log_buffer)
+
+
+@app.route("/logs/history")
+def logs_history() -> Any:
+    """Archived lines older than ``?before=<id>``, oldest first, ``?limit=`` at a time.
+
+    ``next`` is the ``before`` for the previous page, or null at the start.
+    """
+    if log_archive is None:
+        return jsonify({"lines": [], "next": None})
+    lines, next_before = log_archive.page(
+        request.args.get("before", type=int), request.args.get("limit", 100, type=int)
+    )
+    return jsonify({"lines": lines, "next": next_before})
+
+
+@app.route("/conversations")
+def conversations() -> Any:
+    return jsonify(
+        {
+            "conversations": [
+                conversation.describe() for conversation in conversation_pool.conversations()
+            ],
+            "max_conversations": conversation_pool.max_conversations,
+        }
+    )
+
+
+@app.route("/conversations/<conversation_id>/logs")
+def conversation_logs(conversation_id: str) -> Any:
+    conversation = conversation_pool.get(conversation_id)
+    if conversation is None:
+        return jsonify({"error": "Unknown conversation"}), 404
+    return _logs_response(conversation.log)
+
+
+@app.route("/conversations/<conversation_id>/logs/stream")
+def conversation_logs_stream(conversation_id: str) -> Any:
+    conversation = conversation_pool.get(conversation_id)
+    if conversation is None:
+        return jsonify({"error": "Unknown conversation"}), 404
+    return _log_stream_response(conversation.log)
+
+
+@app.route("/metrics")
+def metrics() -> Response:
+    """Prometheus text exposition of the panel's counters and histograms."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.route("/topics")
 def topics() -> Any:
-    topic = _request_topic_from_uselessfacts()
+    topic = topic_provider.take()
     if topic:
         _apply_new_topic(topic)
-        return jsonify({"topic": topic, "source": "uselessfacts"})
+        return jsonify({"topic": topic, "source": "uselessfacts", "prefetched": len(topic_provider)})
 
     return jsonify({"error": "Unable to generate topic"}), 503
 
 
-def run() -> None:
-    startup_topic = _request_topic_from_uselessfacts()
+def _resumable_topic() -> Optional[str]:
+    """Topic of the unfinished conversation the chat's journal would resume, if any."""
+    if not chat_runner.journal:
+        return None
+    checkpoint = ConversationJournal(chat_runner.journal).load()
+    if checkpoint is None or not checkpoint.can_resume(max_turns=int(control_config.get("max_turns") or 0)):
+        return None
+    return checkpoint.topic or None
+
+
+def _init_topic() -> None:
+    """Pick the topic the panel starts with."""
+    # After a reboot mid-conversation, keep its topic so the chat resumes.
+    resumed_topic = _resumable_topic()
+    if resumed_topic:
+        _apply_new_topic(resumed_topic)
+        logging.info("Kept the topic of the unfinished conversation so it resumes.")
+        return
+    # Take a cached topic right away; the worker refills the queue in the background.
+    startup_topic = topic_provider.take(allow_repeat=False)
     if startup_topic:
         _apply_new_topic(startup_topic)
-        logging.info("Initialized conversation topic with startup fact.")
+        logging.info("Initialized conversation topic with a prefetched fact.")
     else:
-        logging.warning("Unable to fetch startup topic; using existing default.")
+        logging.warning("No prefetched topic yet; using existing default.")
+
+
+def run() -> None:
+    global _stream_slots
+    _init_topic()
+    topic_provider.start()
 
+    # Warm a standby chat process before the scheduler might start one.
+    chat_runner.prepare()
     chat_scheduler.start()
+    if PANEL_SERVER != "dev":
+        _stream_slots = threading.BoundedSemaphore(max(PANEL_THREADS // 2, 1))
     local_ip = _get_local_ip()
     # Provide a handy reminder about how to reach the panel once the server starts.
     print(
         "Control panel available at http://localhost:5000 "
         f"(use http://{local_ip}:5000 from another device)."
     )
-    app.run(host="0.0.0.0", port=5000)
+    serve(app, "0.0.0.0", 5000)
 
 
 if __name__ == "__main__":
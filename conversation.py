@@ -0,0 +1,236 @@
+"""Bounded conversation history shared by the two bots."""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Speaker id used for messages that belong to neither bot (the opening prompt).
+OPENING_SPEAKER = "user"
+
+# Rough characters per token for English text; close enough for budgeting
+# without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+# Role markers and separators the chat template wraps around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+# Share of the token budget set aside for the running summary.
+SUMMARY_SHARE = 0.25
+# Longest excerpt kept per summarised turn.
+SUMMARY_POINT_CHARS = 160
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate (ceil of characters / CHARS_PER_TOKEN)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(content: str) -> int:
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _first_sentence(text: str) -> str:
+    sentence = _SENTENCE_END_RE.split(" ".join(text.split()), maxsplit=1)[0]
+    if len(sentence) > SUMMARY_POINT_CHARS:
+        sentence = sentence[: SUMMARY_POINT_CHARS - 1].rstrip() + "…"
+    return sentence
+
+
+class RollingSummary:
+    """Extractive digest of turns that no longer fit in the context.
+
+    Each evicted turn is folded in once, as its first sentence; when the
+    digest outgrows ``max_tokens`` its oldest points are dropped. Nothing is
+    recomputed per turn except the (cached) rendering for each speaker.
+    """
+
+    HEADER = "Summary of the earlier conversation:"
+
+    def __init__(self, max_tokens: int) -> None:
+        self.max_tokens = max(max_tokens, 0)
+        self._points: deque[Tuple[str, str, int]] = deque()
+        self._tokens = estimate_message_tokens(self.HEADER)
+        self._rendered: Dict[str, str] = {}
+
+    def fold(self, speaker: str, content: str) -> None:
+        point = _first_sentence(content)
+        if not point:
+            return
+        cost = estimate_tokens(point) + 2
+        self._points.append((speaker, point, cost))
+        self._tokens += cost
+        while self._tokens > self.max_tokens and len(self._points) > 1:
+            self._tokens -= self._points.popleft()[2]
+        self._rendered.clear()
+
+    def message_for(self, speaker: str) -> Optional[Dict[str, str]]:
+        """The summary as a system message worded for ``speaker``, if any."""
+        if not self._points:
+            return None
+        text = self._rendered.get(speaker)
+        if text is None:
+            lines = [self.HEADER]
+            for who, point, _ in self._points:
+                if who == OPENING_SPEAKER:
+                    label = "Opening"
+                elif who == speaker:
+                    label = "You"
+                else:
+                    label = "Them"
+                lines.append(f"- {label}: {point}")
+            text = self._rendered[speaker] = "\n".join(lines)
+        return {"role": "system", "content": text}
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens if self._points else 0
+
+    def points(self) -> List[Tuple[str, str]]:
+        return [(who, point) for who, point, _ in self._points]
+
+    def restore(self, points: Iterable[Tuple[str, str]]) -> None:
+        """Replace the digest with ``points`` as returned by :meth:`points`."""
+        self._points.clear()
+        self._tokens = estimate_message_tokens(self.HEADER)
+        for who, point in points:
+            cost = estimate_tokens(point) + 2
+            self._points.append((who, point, cost))
+            self._tokens += cost
+        while self._tokens > self.max_tokens and len(self._points) > 1:
+            self._tokens -= self._points.popleft()[2]
+        self._rendered.clear()
+
+    def copy(self) -> "RollingSummary":
+        clone = RollingSummary(self.max_tokens)
+        clone._points.extend(self._points)
+        clone._tokens = self._tokens
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+
+class ConversationHistory:
+    """Pinned system prompt plus a ring buffer of the most recent turns.
+
+    Turns are stored once, tagged with the bot that said them; roles are
+    assigned when the context is assembled (the asking bot's own turns are
+    ``assistant``, everything else is ``user``). Memory stays bounded by
+    ``window`` however long the conversation runs, and building a context
+    never looks further back than the window.
+
+    With a ``token_budget`` the window is measured in estimated prompt
+    tokens instead of messages: the newest turns that fit are kept verbatim
+    and older ones are folded into a :class:`RollingSummary` as they are
+    evicted, so the prompt size stays flat however long the replies get.
+    """
+
+    def __init__(self, system_prompt: str, window: int, token_budget: int = 0) -> None:
+        self._system = {"role": "system", "content": system_prompt}
+        self._window = max(window, 1)
+        self._token_budget = max(token_budget, 0)
+        self._turns: deque[Tuple[str, str, int]] = deque(
+            maxlen=None if self._token_budget else self._window
+        )
+        self._held_tokens = 0
+        self._summary = RollingSummary(int(self._token_budget * SUMMARY_SHARE))
+        self.turn_count = 0
+
+    @property
+    def window(self) -> int:
+        return self._window
+
+    @property
+    def token_budget(self) -> int:
+        return self._token_budget
+
+    @property
+    def system_prompt(self) -> str:
+        return self._system["content"]
+
+    def record(self, speaker: str, content: str) -> None:
+        """Append one message; the oldest falls out once the window is full."""
+        cost = estimate_message_tokens(content)
+        self._turns.append((speaker, content, cost))
+        if speaker != OPENING_SPEAKER:
+            self.turn_count += 1
+        if not self._token_budget:
+            return
+        self._held_tokens += cost
+        room = self._token_budget - estimate_message_tokens(self.system_prompt) - self._summary.max_tokens
+        # The newest turn always stays, even if it alone is over budget.
+        while self._held_tokens > room and len(self._turns) > 1:
+            who, text, old_cost = self._turns.popleft()
+            self._held_tokens -= old_cost
+            self._summary.fold(who, text)
+
+    def context_for(self, speaker: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Messages to send when ``speaker`` is next, newest ``limit`` turns only.
+
+        In token-budget mode ``limit`` is ignored: every held turn fits the
+        budget, and the running summary follows the system prompt.
+        """
+        held = len(self._turns)
+        if self._token_budget:
+            limit = None
+        count = held if limit is None else min(max(limit, 1), held)
+        messages = [self._system]
+        summary = self._summary.message_for(speaker) if self._token_budget else None
+        if summary is not None:
+            messages.append(summary)
+        for who, content, _ in islice(self._turns, held - count, held):
+            role = "assistant" if who == speaker else "user"
+            messages.append({"role": role, "content": content})
+        return messages
+
+    def estimated_tokens(self) -> int:
+        """Estimated prompt tokens of a full context (system, summary, turns)."""
+        turns = self._held_tokens if self._token_budget else sum(cost for _, _, cost in self._turns)
+        return estimate_message_tokens(self.system_prompt) + self._summary.tokens + turns
+
+    def recent(self) -> List[Tuple[str, str]]:
+        return [(who, content) for who, content, _ in self._turns]
+
+    def to_state(self) -> Dict[str, Any]:
+        """Plain data for a checkpoint; see :meth:`from_state`."""
+        return {
+            "system": self.system_prompt,
+            "turns": self.recent(),
+            "summary": self._summary.points(),
+            "turn_count": self.turn_count,
+        }
+
+    @classmethod
+    def from_state(
+        cls, state: Dict[str, Any], window: int, token_budget: int = 0
+    ) -> "ConversationHistory":
+        """Rebuild a history from :meth:`to_state`, under a possibly different window or budget."""
+        history = cls(state["system"], window, token_budget)
+        history._summary.restore(tuple(point) for point in state.get("summary", ()))
+        for who, content in state.get("turns", ()):
+            history.record(who, content)
+        history.turn_count = int(state.get("turn_count", history.turn_count))
+        return history
+
+    def copy(self) -> "ConversationHistory":
+        clone = ConversationHistory(self.system_prompt, self._window, self._token_budget)
+        clone._turns.extend(self._turns)
+        clone._held_tokens = self._held_tokens
+        clone._summary = self._summary.copy()
+        clone.turn_count = self.turn_count
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+
+__all__ = [
+    "ConversationHistory",
+    "OPENING_SPEAKER",
+    "RollingSummary",
+    "estimate_message_tokens",
+    "estimate_tokens",
+]
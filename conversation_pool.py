@@ -0,0 +1,181 @@
+"""Several conversations at once, each on an in-process ChatRunner."""
+
+from __future__ import annotations
+
+import itertools
+import os
+import re
+import stat
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from chat_runner import ChatRunner
+from config import LOG_MAX_LINES, PACING_SHARE_KEYS, POOL_DISPLAYS, POOL_MAX_CONVERSATIONS
+from groq_client import GroqClient
+from log_buffer import LogBuffer
+from pacing import RateLimitPacer
+
+_CONSOLE_RE = re.compile(r"/dev/tty[0-9]+")
+
+
+class PoolFull(RuntimeError):
+    """Raised when the pool already holds its maximum number of conversations."""
+
+
+class InvalidDisplay(ValueError):
+    """Raised for a display that is not an allowed console device."""
+
+
+def check_display(path: str, allowed: str = POOL_DISPLAYS) -> str:
+    """Return ``path`` if a conversation may be typed on it, else raise InvalidDisplay.
+
+    The runner opens its display for writing, so only character devices are
+    accepted: those listed in ``allowed`` (comma-separated) or, when the list
+    is empty, any ``/dev/ttyN`` console.
+    """
+    listed = [entry.strip() for entry in allowed.split(",") if entry.strip()]
+    if listed and path not in listed:
+        raise InvalidDisplay(f"{path} is not one of the allowed consoles ({', '.join(listed)}).")
+    if not listed and not _CONSOLE_RE.fullmatch(path):
+        raise InvalidDisplay(f"{path} is not a console; use /dev/ttyN.")
+    try:
+        is_console = stat.S_ISCHR(os.stat(path).st_mode)
+    except OSError:
+        is_console = False
+    if not is_console:
+        raise InvalidDisplay(f"{path} is not a console device.")
+    return path
+
+
+@dataclass
+class PooledConversation:
+    id: str
+    name: str
+    config: Dict[str, Any]
+    log: LogBuffer
+    runner: ChatRunner = field(repr=False)
+
+    @property
+    def display(self) -> Optional[str]:
+        return self.runner.display
+
+    def is_running(self) -> bool:
+        return self.runner.is_running()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "topic": self.config.get("topic", ""),
+            "model": self.config.get("model", ""),
+            "display": self.display,
+            "running": self.is_running(),
+            "cursor": self.log.cursor(),
+        }
+
+
+class ConversationPool:
+    """Runs up to ``max_conversations`` conversations side by side in this process.
+
+    Every conversation gets its own ChatRunner (in-process mode, one engine
+    thread each), LogBuffer and config, and is typed on its own console or
+    runs headless. They all share one GroqClient, so keep-alive connections
+    are reused across conversations, and one attached RateLimitPacer, so the
+    two API keys' rate limits are budgeted for the whole pool rather than
+    per conversation.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_conversations: int = POOL_MAX_CONVERSATIONS,
+        log_max_lines: int = LOG_MAX_LINES,
+        client: Optional[GroqClient] = None,
+        pacer: Optional[RateLimitPacer] = None,
+    ) -> None:
+        self.max_conversations = max(max_conversations, 1)
+        self._log_max_lines = log_max_lines
+        self.client = client or GroqClient(pool_maxsize=self.max_conversations)
+        self.pacer = (pacer or RateLimitPacer(share_keys=PACING_SHARE_KEYS)).attach(self.client)
+        self._conversations: Dict[str, PooledConversation] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def create(
+        self,
+        chat_config: Dict[str, Any],
+        *,
+        name: Optional[str] = None,
+        display: Optional[str] = None,
+    ) -> PooledConversation:
+        if display:
+            display = check_display(display)
+        with self._lock:
+            if len(self._conversations) >= self.max_conversations:
+                raise PoolFull(f"The pool already runs {self.max_conversations} conversations.")
+            conversation_id = f"c{next(self._ids)}"
+            log = LogBuffer(self._log_max_lines)
+            runner = ChatRunner(
+                log,
+                mode="inprocess",
+                display=display or None,
+                client=self.client,
+                pacer=self.pacer,
+                # Pooled conversations are throwaway; only the main chat resumes.
+                journal=None,
+            )
+            conversation = PooledConversation(
+                conversation_id,
+                name or chat_config.get("topic") or conversation_id,
+                dict(chat_config),
+                log,
+                runner,
+            )
+            self._conversations[conversation_id] = conversation
+            return conversation
+
+    def get(self, conversation_id: str) -> Optional[PooledConversation]:
+        with self._lock:
+            return self._conversations.get(conversation_id)
+
+    def conversations(self) -> List[PooledConversation]:
+        with self._lock:
+            return list(self._conversations.values())
+
+    def start(self, conversation_id: str) -> bool:
+        conversation = self.get(conversation_id)
+        return bool(conversation and conversation.runner.start(conversation.config))
+
+    def stop(self, conversation_id: str) -> bool:
+        conversation = self.get(conversation_id)
+        return bool(conversation and conversation.runner.stop())
+
+    def remove(self, conversation_id: str) -> bool:
+        with self._lock:
+            conversation = self._conversations.pop(conversation_id, None)
+        if conversation is None:
+            return False
+        conversation.runner.stop()
+        return True
+
+    def stop_all(self) -> None:
+        # Stop them in parallel: each stop may wait on an HTTP call in flight.
+        stoppers = [
+            threading.Thread(target=conversation.runner.stop, daemon=True)
+            for conversation in self.conversations()
+        ]
+        for stopper in stoppers:
+            stopper.start()
+        for stopper in stoppers:
+            stopper.join()
+
+    def running_count(self) -> int:
+        return sum(1 for conversation in self.conversations() if conversation.is_running())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._conversations)
+
+
+__all__ = ["ConversationPool", "InvalidDisplay", "PoolFull", "PooledConversation", "check_display"]
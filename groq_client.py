@@ -0,0 +1,266 @@
+"""Pooled, deadline-bounded HTTP client for the Groq chat completions API."""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_ENDPOINT,
+    GROQ_MAX_RETRIES,
+    GROQ_POOL_SIZE,
+    GROQ_READ_TIMEOUT,
+    GROQ_TURN_DEADLINE,
+)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TurnDeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a turn used up its whole deadline budget without a reply."""
+
+
+class RequestCancelled(Exception):
+    """Raised by :meth:`GroqClient.post_chat` once its ``cancel`` event is set."""
+
+
+def _retry_after_seconds(response: requests.Response) -> float:
+    raw = response.headers.get("retry-after")
+    if not raw:
+        return 0.0
+    try:
+        return max(float(raw), 0.0)
+    except ValueError:
+        return 0.0
+
+
+class GroqClient:
+    """Keeps one keep-alive Session per API key and retries transient failures.
+
+    Every call gets a total deadline budget; each attempt's connect/read timeout
+    is clipped to whatever is left of it, so a stalled request can never hang
+    the conversation loop. 429 and 5xx responses are retried with jittered
+    exponential backoff (honouring ``Retry-After`` when the server sends it).
+    """
+
+    def __init__(
+        self,
+        endpoint: str = GROQ_ENDPOINT,
+        *,
+        connect_timeout: float = GROQ_CONNECT_TIMEOUT,
+        read_timeout: float = GROQ_READ_TIMEOUT,
+        turn_deadline: float = GROQ_TURN_DEADLINE,
+        max_retries: int = GROQ_MAX_RETRIES,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 8.0,
+        pool_maxsize: int = GROQ_POOL_SIZE,
+    ) -> None:
+        self.endpoint = endpoint
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.turn_deadline = turn_deadline
+        self.max_retries = max(max_retries, 0)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_maxsize = max(pool_maxsize, 1)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._observers: List[Any] = []
+        self._lock = threading.Lock()
+
+    # --- public API -----------------------------------------------------
+
+    def session_for(self, api_key: str) -> requests.Session:
+        """Return the persistent Session bound to ``api_key``."""
+        with self._lock:
+            session = self._sessions.get(api_key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(
+                    {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+                )
+                self._sessions[api_key] = session
+            return session
+
+    def warm(self, api_keys: Iterable[str]) -> bool:
+        """Open (or refresh) a keep-alive connection for each key ahead of the first turn.
+
+        Uses the cheap ``/models`` listing next to the chat endpoint; returns
+        False if any key's connection could not be made.
+        """
+        url = self.endpoint.rsplit("/chat/completions", 1)[0] + "/models"
+        ok = True
+        for api_key in api_keys:
+            try:
+                response = self.session_for(api_key).get(
+                    url, timeout=(self.connect_timeout, self.read_timeout)
+                )
+                response.close()
+            except requests.exceptions.RequestException:
+                logging.debug("Could not warm the Groq connection", exc_info=True)
+                ok = False
+        return ok
+
+    def add_observer(self, observer: Any) -> None:
+        """Show ``observer`` every request and response (see pacing.RateLimitPacer).
+
+        It needs ``on_request(api_key, body)``, called before each attempt, and
+        ``on_response(api_key, response)``, called with every response
+        including the ones that are about to be retried.
+        """
+        with self._lock:
+            self._observers.append(observer)
+
+    def remove_observer(self, observer: Any) -> None:
+        with self._lock:
+            if observer in self._observers:
+                self._observers.remove(observer)
+
+    def post_chat(
+        self,
+        api_key: str,
+        body: Dict[str, Any],
+        *,
+        stream: bool = False,
+        stats: Optional[Dict[str, Any]] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> requests.Response:
+        """POST ``body`` to the completions endpoint within the turn deadline.
+
+        Returns the final response, which may still be an error status once
+        retries or the deadline are used up; callers decide how to report it.
+        With ``stream=True`` only the status and headers have been read; pass
+        the response to :meth:`iter_deltas` to consume the SSE body.
+        ``stats``, if given, gets the number of ``retries`` made so far.
+        Setting ``cancel`` stops any further attempt or backoff sleep with
+        :class:`RequestCancelled`.
+        """
+        session = self.session_for(api_key)
+        deadline = time.monotonic() + self.turn_deadline
+        attempt = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled("Groq request cancelled")
+            timeout = self._attempt_timeout(deadline)
+            response: Optional[requests.Response] = None
+            self._notify("on_request", api_key, body)
+            try:
+                response = session.post(self.endpoint, json=body, timeout=timeout, stream=stream)
+                self._notify("on_response", api_key, response)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                wait = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                wait = max(self._backoff(attempt), _retry_after_seconds(response))
+
+            if time.monotonic() + wait >= deadline:
+                if response is not None:
+                    return response
+                raise TurnDeadlineExceeded(
+                    f"No reply from Groq within the {self.turn_deadline:g}s turn deadline"
+                )
+            if response is not None:
+                response.close()
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                raise RequestCancelled("Groq request cancelled")
+            attempt += 1
+            if stats is not None:
+                stats["retries"] = attempt
+
+    @staticmethod
+    def iter_deltas(
+        response: requests.Response, usage: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        """Yield assistant content deltas from a ``stream: true`` response.
+
+        Chunks are read as soon as they arrive. There is no total deadline here
+        because the consumer (the typewriter) sets the pace; a stalled server is
+        still caught by the per-read timeout set in :meth:`post_chat`. Token
+        counts from the final chunk (``usage`` or Groq's ``x_groq.usage``) are
+        copied into ``usage`` when given.
+        """
+        try:
+            for raw in response.iter_lines(chunk_size=None):
+                if not raw.startswith(b"data:"):
+                    continue
+                data = raw[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if usage is not None:
+                    usage.update(chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or {})
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+        finally:
+            response.close()
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    # --- helpers --------------------------------------------------------
+
+    def _notify(self, method: str, *args: Any) -> None:
+        with self._lock:
+            observers = list(self._observers)
+        for observer in observers:
+            try:
+                getattr(observer, method)(*args)
+            except Exception:
+                logging.warning("Groq client observer failed", exc_info=True)
+
+    def _attempt_timeout(self, deadline: float) -> tuple[float, float]:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TurnDeadlineExceeded(
+                f"No reply from Groq within the {self.turn_deadline:g}s turn deadline"
+            )
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spread retries from both bots so they don't collide.
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+
+_default_client: Optional[GroqClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> GroqClient:
+    """Return the process-wide client shared by every chat turn."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = GroqClient()
+        return _default_client
+
+
+__all__ = [
+    "GroqClient",
+    "RequestCancelled",
+    "TurnDeadlineExceeded",
+    "RETRY_STATUSES",
+    "get_default_client",
+]
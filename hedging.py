@@ -0,0 +1,298 @@
+"""Latency-hedged chat requests with a fallback model chain.
+
+If the configured model hasn't started answering within its usual p95 time
+to first content, the same prompt is also sent to the next model in the
+fallback chain; whichever starts first is used and the other is cancelled.
+A hedge budget caps how often that may happen, and the rate-limit pacer
+must agree that the key can afford the extra request.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from groq_client import GroqClient
+from pacing import RateLimitPacer, estimate_request_tokens
+
+# Samples kept per model for the p95 estimate.
+TRACKER_WINDOW = 50
+# Below this many samples the default threshold is used.
+TRACKER_MIN_SAMPLES = 8
+DEFAULT_HEDGE_THRESHOLD = 3.0
+MIN_HEDGE_THRESHOLD = 0.25
+
+
+def parse_model_chain(raw: Optional[str]) -> List[str]:
+    return [model.strip() for model in (raw or "").split(",") if model.strip()]
+
+
+class LatencyTracker:
+    """Recent time-to-first-content samples per model."""
+
+    def __init__(self, window: int = TRACKER_WINDOW) -> None:
+        self._window = window
+        self._samples: Dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def p95(self, model: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if len(samples) < TRACKER_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def threshold(self, model: str) -> float:
+        p95 = self.p95(model)
+        if p95 is None:
+            return DEFAULT_HEDGE_THRESHOLD
+        return max(p95, MIN_HEDGE_THRESHOLD)
+
+
+class HedgeBudget:
+    """Allows hedging on at most ``fraction`` of turns, with a small burst."""
+
+    def __init__(self, fraction: float, burst: float = 3.0) -> None:
+        self.fraction = max(fraction, 0.0)
+        self.burst = max(burst, 1.0)
+        self._tokens = 1.0 if self.fraction > 0 else 0.0
+        self._lock = threading.Lock()
+
+    def on_turn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.fraction)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+_default_tracker = LatencyTracker()
+
+
+class _Attempt:
+    """One request on its own daemon thread, reporting progress to a shared Condition."""
+
+    def __init__(
+        self,
+        client: GroqClient,
+        api_key: str,
+        body: Dict[str, Any],
+        stream: bool,
+        progress: threading.Condition,
+    ) -> None:
+        self.model = str(body.get("model", ""))
+        self.started = time.monotonic()
+        self.ttfb: Optional[float] = None
+        self.chunks: List[str] = []
+        self.usage: Dict[str, Any] = {}
+        self.stats: Dict[str, Any] = {}
+        self.error: Optional[BaseException] = None
+        self.finished = False
+        self.cancelled = threading.Event()
+        self._client = client
+        self._api_key = api_key
+        self._body = body
+        self._stream = stream
+        self._progress = progress
+        self._response: Optional[requests.Response] = None
+        threading.Thread(target=self._run, name=f"hedge-{self.model}", daemon=True).start()
+
+    @property
+    def has_content(self) -> bool:
+        return self.ttfb is not None
+
+    def cancel(self) -> None:
+        # Also stops post_chat from retrying or sleeping through its backoff.
+        self.cancelled.set()
+        response = self._response
+        if response is not None:
+            # Closing the response aborts a stream still being read.
+            response.close()
+
+    def _run(self) -> None:
+        try:
+            body = {**self._body, "stream": True} if self._stream else self._body
+            response = self._client.post_chat(
+                self._api_key, body, stream=self._stream, stats=self.stats, cancel=self.cancelled
+            )
+            self._response = response
+            if self.cancelled.is_set():
+                response.close()
+                return
+            response.raise_for_status()
+            if self._stream:
+                for delta in self._client.iter_deltas(response, usage=self.usage):
+                    if self.cancelled.is_set():
+                        break
+                    self._publish(delta)
+            else:
+                payload = response.json()
+                self.usage.update(payload.get("usage") or {})
+                self._publish(payload["choices"][0]["message"].get("content", "") or "")
+        except BaseException as exc:  # noqa: BLE001 reported to the coordinator
+            self.error = exc
+        finally:
+            with self._progress:
+                self.finished = True
+                self._progress.notify_all()
+
+    def _publish(self, text: str) -> None:
+        with self._progress:
+            if self.ttfb is None:
+                self.ttfb = time.monotonic() - self.started
+            self.chunks.append(text)
+            self._progress.notify_all()
+
+
+class Hedger:
+    """Sends a turn's request, hedging to fallback models when it is slow to start.
+
+    ``fallbacks`` is the chain tried in order (the turn's own model is
+    skipped); at most ``max_hedges`` extra requests go out per turn.
+    """
+
+    def __init__(
+        self,
+        fallbacks: Sequence[str],
+        *,
+        budget: float,
+        pacer: Optional[RateLimitPacer] = None,
+        tracker: Optional[LatencyTracker] = None,
+        max_hedges: int = 1,
+    ) -> None:
+        self.fallbacks = list(fallbacks)
+        self.budget = HedgeBudget(budget)
+        self.pacer = pacer
+        self.tracker = tracker or _default_tracker
+        self.max_hedges = max(max_hedges, 0)
+
+    def request(
+        self,
+        client: GroqClient,
+        api_key: str,
+        body: Dict[str, Any],
+        on_delta: Optional[Callable[[str], None]],
+        stats: Dict[str, Any],
+    ) -> str:
+        """Return the reply text, streaming the winning attempt to ``on_delta``.
+
+        Fills ``stats`` like chat_turn does, plus ``model`` (the winner) and
+        ``hedged`` (whether a fallback request was sent).
+        """
+        self.budget.on_turn()
+        primary = str(body.get("model", ""))
+        chain = [model for model in self.fallbacks if model != primary][: self.max_hedges]
+        progress = threading.Condition()
+        started = time.monotonic()
+        stream = on_delta is not None
+        attempts = [_Attempt(client, api_key, body, stream, progress)]
+        hedge_at = started + self.tracker.threshold(primary)
+
+        with progress:
+            while True:
+                winner = next((attempt for attempt in attempts if attempt.has_content), None)
+                if winner is not None:
+                    break
+                live = [attempt for attempt in attempts if not attempt.finished]
+                now = time.monotonic()
+                can_hedge = bool(chain) and (not live or now >= hedge_at)
+                if can_hedge:
+                    if self._may_hedge(api_key, body):
+                        model = chain.pop(0)
+                        attempts.append(
+                            _Attempt(client, api_key, {**body, "model": model}, stream, progress)
+                        )
+                        hedge_at = now + self.tracker.threshold(model)
+                    else:
+                        # Out of hedge budget or rate-limit room: no more hedges this turn.
+                        chain = []
+                    continue
+                if not live:
+                    # Everything failed (or finished empty) and nothing is left to try.
+                    finished = next((a for a in attempts if a.error is None), None)
+                    if finished is not None:
+                        winner = finished
+                        break
+                    raise attempts[0].error  # type: ignore[misc]
+                timeout = max(hedge_at - now, 0.0) if chain else None
+                progress.wait(timeout)
+
+        for attempt in attempts:
+            if attempt is not winner:
+                attempt.cancel()
+                if not attempt.finished:
+                    # Censored sample: its first content would have taken at least this long.
+                    self.tracker.record(attempt.model, time.monotonic() - attempt.started)
+        if winner.ttfb is not None:
+            self.tracker.record(winner.model, winner.ttfb)
+            stats["ttfb"] = time.monotonic() - started if winner is not attempts[0] else winner.ttfb
+
+        text, consumer_time = self._drain(winner, progress, on_delta)
+        stats["api_latency"] = time.monotonic() - started
+        stats["generation_time"] = stats["api_latency"] - consumer_time
+        stats["usage"] = winner.usage
+        stats["retries"] = attempts[0].stats.get("retries", 0)
+        stats["model"] = winner.model
+        stats["hedged"] = len(attempts) > 1
+        return text
+
+    def _may_hedge(self, api_key: str, body: Dict[str, Any]) -> bool:
+        if self.pacer is not None and self.pacer.wait_time(api_key, estimate_request_tokens(body)) > 0:
+            return False
+        return self.budget.try_spend()
+
+    @staticmethod
+    def _drain(
+        winner: _Attempt, progress: threading.Condition, on_delta: Optional[Callable[[str], None]]
+    ) -> Tuple[str, float]:
+        """Hand the winner's chunks to ``on_delta`` as they arrive.
+
+        Returns the full text and the time spent inside ``on_delta``.
+        """
+        handed = 0
+        consumer_time = 0.0
+        try:
+            while True:
+                with progress:
+                    while handed == len(winner.chunks) and not winner.finished:
+                        progress.wait()
+                    chunks = winner.chunks[handed:]
+                    handed += len(chunks)
+                    done = winner.finished and handed == len(winner.chunks)
+                if on_delta is not None:
+                    handed_off = time.monotonic()
+                    for chunk in chunks:
+                        on_delta(chunk)
+                    consumer_time += time.monotonic() - handed_off
+                if done:
+                    break
+        except BaseException:
+            winner.cancel()
+            raise
+        if winner.error is not None:
+            raise winner.error
+        return "".join(winner.chunks), consumer_time
+
+
+__all__ = [
+    "DEFAULT_HEDGE_THRESHOLD",
+    "HedgeBudget",
+    "Hedger",
+    "LatencyTracker",
+    "parse_model_chain",
+]
@@ -0,0 +1,210 @@
+"""On-disk history of log lines that no longer fit in a LogBuffer.
+
+Evicted lines are numbered and batched in memory, then written every
+``delay`` seconds as one gzip member appended to the current segment file
+(``log-<first id>.jsonl.gz``). A segment that has grown past
+``segment_bytes`` is closed and a new one begun; only the newest
+``segments`` files are kept. :meth:`LogArchive.page` reads them back
+newest-first for ``/logs/history``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import LOG_ARCHIVE_SEGMENT_BYTES, LOG_ARCHIVE_SEGMENTS
+
+# Seconds evicted lines are batched before they are written out.
+FLUSH_DELAY = 30.0
+# Pending bytes that trigger a write without waiting for the delay.
+FLUSH_BYTES = 64 * 1024
+HISTORY_PAGE_MAX = 500
+
+_SEGMENT_RE = re.compile(r"^log-(\d+)\.jsonl\.gz$")
+
+
+def _read_segment(path: Path) -> Tuple[List[Dict[str, Any]], bool]:
+    """Records in ``path`` and whether it read cleanly to the end.
+
+    A member torn by a power cut ends the read; the records before it count.
+    """
+    records: List[Dict[str, Any]] = []
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            for line in handle:
+                records.append(json.loads(line))
+    except (OSError, EOFError, ValueError, zlib.error):
+        return records, False
+    return records, True
+
+
+class LogArchive:
+    """Rotating, gzip-compressed segments of evicted log lines."""
+
+    def __init__(
+        self,
+        directory: Path | str,
+        *,
+        segment_bytes: int = LOG_ARCHIVE_SEGMENT_BYTES,
+        segments: int = LOG_ARCHIVE_SEGMENTS,
+        delay: float = FLUSH_DELAY,
+    ) -> None:
+        self.directory = Path(directory)
+        self.segment_bytes = max(segment_bytes, 1024)
+        self.segments = max(segments, 1)
+        self.delay = max(delay, 0.0)
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending: List[Tuple[int, float, bytes]] = []
+        self._pending_bytes = 0
+        self._timer: Optional[threading.Timer] = None
+        # A segment that no longer reads to its end: nothing more is appended
+        # to it, since a reader would stop at the damage before the new lines.
+        self._sealed: Optional[Path] = None
+        self._next_id = self._scan_next_id()
+        self.archived_total = 0
+
+    def add(self, lines: Iterable[bytes], ts: float) -> None:
+        """Queue UTF-8 encoded lines evicted at ``ts``; cheap enough to call under a lock."""
+        with self._lock:
+            for line in lines:
+                self._pending.append((self._next_id, ts, line))
+                self._pending_bytes += len(line)
+                self._next_id += 1
+            if not self._pending:
+                return
+            urgent = self._pending_bytes >= FLUSH_BYTES
+            if self._timer is not None and urgent:
+                self._timer.cancel()
+                self._timer = None
+            if self._timer is None:
+                self._timer = threading.Timer(0 if urgent else self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """Write pending lines now; returns how many were written."""
+        with self._io_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch, self._pending, self._pending_bytes = self._pending, [], 0
+            if not batch:
+                return 0
+            payload = "".join(
+                json.dumps(
+                    {"id": line_id, "ts": round(ts, 3), "line": line.decode("utf-8", "replace")},
+                    ensure_ascii=False,
+                )
+                + "\n"
+                for line_id, ts, line in batch
+            ).encode("utf-8")
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                segment = self._current_segment(batch[0][0])
+                # Each batch is its own gzip member; gzip readers concatenate them.
+                with segment.open("ab") as handle:
+                    handle.write(gzip.compress(payload, compresslevel=6, mtime=0))
+                self._prune()
+            except OSError:
+                logging.warning("Could not write the log archive in %s", self.directory, exc_info=True)
+                return 0
+            self.archived_total += len(batch)
+            return len(batch)
+
+    def page(self, before: Optional[int] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Up to ``limit`` archived lines older than id ``before``, oldest first.
+
+        Also returns the ``before`` to ask for the next (older) page, or None
+        once the oldest archived line has been returned.
+        """
+        limit = min(max(limit, 1), HISTORY_PAGE_MAX)
+        found: List[Dict[str, Any]] = []
+
+        def wanted(line_id: int) -> bool:
+            return before is None or line_id < before
+
+        # Hold the I/O lock throughout, so a flush can't move a batch from
+        # pending to disk between the two reads.
+        with self._io_lock:
+            with self._lock:
+                pending = [
+                    {"id": line_id, "ts": round(ts, 3), "line": line.decode("utf-8", "replace")}
+                    for line_id, ts, line in self._pending
+                    if wanted(line_id)
+                ]
+                oldest = self._pending[0][0] if self._pending else None
+            found.extend(reversed(pending))
+            paths = self._segment_paths()
+            if paths:
+                oldest = paths[0][0]
+            for first_id, path in reversed(paths):
+                if len(found) >= limit:
+                    break
+                if not wanted(first_id):
+                    continue
+                records = [record for record in _read_segment(path)[0] if wanted(int(record.get("id", 0)))]
+                found.extend(reversed(records))
+        found = found[:limit]
+        found.reverse()
+        # Ids are consecutive, so anything above the oldest held id has predecessors.
+        if not found or oldest is None or found[0]["id"] <= oldest:
+            return found, None
+        return found, found[0]["id"]
+
+    def close(self) -> None:
+        self.flush()
+
+    def _segment_paths(self) -> List[Tuple[int, Path]]:
+        try:
+            entries = list(self.directory.iterdir())
+        except OSError:
+            return []
+        paths = []
+        for path in entries:
+            match = _SEGMENT_RE.match(path.name)
+            if match:
+                paths.append((int(match.group(1)), path))
+        paths.sort()
+        return paths
+
+    def _current_segment(self, first_id: int) -> Path:
+        paths = self._segment_paths()
+        if paths and paths[-1][1] != self._sealed:
+            path = paths[-1][1]
+            try:
+                if path.stat().st_size < self.segment_bytes:
+                    return path
+            except OSError:
+                pass
+        return self.directory / f"log-{first_id:012d}.jsonl.gz"
+
+    def _prune(self) -> None:
+        paths = self._segment_paths()
+        for _, path in paths[: max(len(paths) - self.segments, 0)]:
+            path.unlink(missing_ok=True)
+
+    def _scan_next_id(self) -> int:
+        paths = self._segment_paths()
+        if not paths:
+            return 1
+        first_id, path = paths[-1]
+        records, clean = _read_segment(path)
+        recovered = int(records[-1].get("id", 0)) + 1 if records else first_id
+        if clean:
+            return recovered
+        logging.warning("Log archive segment %s is damaged; starting a new one", path)
+        self._sealed = path
+        # Ids past the damage are lost, but the new segment must not reuse this one's name.
+        return max(recovered, first_id + 1)
+
+
+__all__ = ["HISTORY_PAGE_MAX", "LogArchive"]
@@ -2,38 +2,231 @@
 
 from __future__ import annotations
 
-from collections import deque
-from typing import Iterable, List
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 import threading
+import time
+import uuid
+
+from config import LOG_MAX_BYTES
+from log_archive import LogArchive
+
+
+class LogSlice(NamedTuple):
+    """Lines newer than a cursor, plus the cursor to ask from next time."""
+
+    generation: str
+    last_seq: int
+    lines: List[str]
+    reset: bool
+
+    @property
+    def cursor(self) -> str:
+        return format_cursor(self.generation, self.last_seq)
+
+
+def format_cursor(generation: str, seq: int) -> str:
+    return f"{generation}:{seq}"
+
+
+def parse_cursor(raw: Optional[str]) -> tuple[Optional[str], int]:
+    """Split a ``generation:seq`` cursor; malformed input means "from scratch"."""
+    if not raw:
+        return None, 0
+    generation, _, seq = raw.rpartition(":")
+    try:
+        return generation or None, max(int(seq), 0)
+    except ValueError:
+        return None, 0
 
 
 class LogBuffer:
-    """Fixed-size FIFO of string lines with thread-safe access."""
+    """Bounded FIFO of log lines with thread-safe access.
+
+    Every appended line gets a monotonically increasing sequence number, and
+    the buffer carries a generation id that changes on :meth:`clear`, so a
+    reader holding a ``(generation, seq)`` cursor can fetch just what's new.
+    Readers can also block in :meth:`wait_for_change` until that happens.
+
+    Lines are stored UTF-8 encoded, back to back, in a ring of ``max_bytes``
+    allocated up front, with only their lengths kept alongside; the buffer
+    holds at most ``max_lines`` lines and ``max_bytes`` bytes, and a single
+    line longer than the whole ring is truncated. Readers copy the bytes they
+    need under the lock and decode them after releasing it. Lines pushed out
+    (or cleared) are handed to ``archive``, if given.
+    """
+
+    def __init__(
+        self,
+        max_lines: int = 200,
+        *,
+        max_bytes: int = LOG_MAX_BYTES,
+        archive: Optional[LogArchive] = None,
+    ) -> None:
+        self._max_lines = max(max_lines, 1)
+        self._capacity = max(max_bytes, 1)
+        self._ring = bytearray(self._capacity)
+        self._lengths = array("I", bytes(4 * self._max_lines))
+        self._archive = archive
+        self._lock = threading.Condition()
+        self._generation = uuid.uuid4().hex[:12]
+        self._last_seq = 0
+        # Oldest held line's slot in ``_lengths``, held line count, byte
+        # offset of the oldest line in ``_ring`` and bytes held.
+        self._first = 0
+        self._count = 0
+        self._start = 0
+        self._bytes = 0
+        self._appended_total = 0
+        self._evicted: List[bytes] = []
+        self._snapshot_cache: Tuple[str, int, List[str]] = ("", -1, [])
+
+    def _copy_out(self, offset: int, length: int) -> bytes:
+        end = offset + length
+        if end <= self._capacity:
+            return bytes(self._ring[offset:end])
+        return bytes(self._ring[offset:]) + bytes(self._ring[: end - self._capacity])
+
+    def _evict_oldest(self) -> None:
+        length = self._lengths[self._first]
+        if self._archive is not None:
+            self._evicted.append(self._copy_out(self._start, length))
+        self._start = (self._start + length) % self._capacity
+        self._bytes -= length
+        self._first = (self._first + 1) % self._max_lines
+        self._count -= 1
+
+    def _push(self, line: str) -> None:
+        data = line.encode("utf-8", "replace")
+        if len(data) > self._capacity:
+            data = data[: self._capacity].decode("utf-8", "ignore").encode("utf-8")
+        while self._count and (
+            self._count == self._max_lines or self._bytes + len(data) > self._capacity
+        ):
+            self._evict_oldest()
+        offset = (self._start + self._bytes) % self._capacity
+        head = min(len(data), self._capacity - offset)
+        self._ring[offset : offset + head] = data[:head]
+        self._ring[: len(data) - head] = data[head:]
+        self._lengths[(self._first + self._count) % self._max_lines] = len(data)
+        self._count += 1
+        self._bytes += len(data)
+        self._last_seq += 1
+        self._appended_total += 1
+
+    def _read_newest(self, count: int) -> Tuple[bytes, List[int]]:
+        """The newest ``count`` lines as one byte string plus their lengths; needs the lock."""
+        first = self._count - count
+        lengths = [self._lengths[(self._first + index) % self._max_lines] for index in range(first, self._count)]
+        size = sum(lengths)
+        offset = (self._start + self._bytes - size) % self._capacity
+        return self._copy_out(offset, size), lengths
 
-    def __init__(self, max_lines: int = 200) -> None:
-        self._max_lines = max_lines
-        self._lines: deque[str] = deque(maxlen=max_lines)
-        self._lock = threading.Lock()
+    @staticmethod
+    def _decode(blob: bytes, lengths: List[int]) -> List[str]:
+        lines = []
+        offset = 0
+        for length in lengths:
+            lines.append(blob[offset : offset + length].decode("utf-8", "replace"))
+            offset += length
+        return lines
+
+    def _spill(self) -> None:
+        """Hand evicted lines to the archive; call after releasing the lock."""
+        if self._archive is None:
+            return
+        with self._lock:
+            evicted, self._evicted = self._evicted, []
+        if evicted:
+            self._archive.add(evicted, time.time())
 
     def append(self, line: str) -> None:
         with self._lock:
-            self._lines.append(line)
+            self._push(line)
+            self._lock.notify_all()
+        self._spill()
 
     def clear(self) -> None:
         with self._lock:
-            self._lines.clear()
+            while self._count:
+                self._evict_oldest()
+            self._first = self._start = 0
+            self._generation = uuid.uuid4().hex[:12]
+            self._last_seq = 0
+            self._lock.notify_all()
+        self._spill()
 
-    def snapshot(self) -> List[str]:
+    def _snapshot(self) -> Tuple[str, int, List[str]]:
+        """``(generation, last_seq, lines)``; decoded once per buffer state."""
         with self._lock:
-            return list(self._lines)
+            cached = self._snapshot_cache
+            if cached[0] == self._generation and cached[1] == self._last_seq:
+                return cached
+            generation, seq = self._generation, self._last_seq
+            blob, lengths = self._read_newest(self._count)
+        snapshot = (generation, seq, self._decode(blob, lengths))
+        self._snapshot_cache = snapshot
+        return snapshot
+
+    def snapshot(self) -> List[str]:
+        return list(self._snapshot()[2])
 
     def extend(self, lines: Iterable[str]) -> None:
         with self._lock:
-            self._lines.extend(lines)
+            for line in lines:
+                self._push(line)
+            self._lock.notify_all()
+        self._spill()
+
+    def wait_for_change(self, generation: Optional[str], seq: int, timeout: float) -> bool:
+        """Block until the buffer moves past ``(generation, seq)``.
+
+        Returns False if ``timeout`` seconds pass without a change.
+        """
+        with self._lock:
+            return self._lock.wait_for(
+                lambda: generation != self._generation or seq != self._last_seq, timeout
+            )
+
+    def read_since(self, generation: Optional[str], seq: int) -> LogSlice:
+        """Return the lines after ``seq`` in ``generation``.
+
+        If the cursor belongs to another generation, or points further back
+        than the buffer still holds, the whole buffer is returned with
+        ``reset=True`` so the reader replaces rather than appends.
+        """
+        with self._lock:
+            first_seq = self._last_seq - self._count + 1
+            reset = generation != self._generation or seq < first_seq - 1 or seq > self._last_seq
+            if not reset:
+                current, last_seq = self._generation, self._last_seq
+                blob, lengths = self._read_newest(self._last_seq - seq)
+        if reset:
+            current, last_seq, lines = self._snapshot()
+            return LogSlice(current, last_seq, list(lines), True)
+        return LogSlice(current, last_seq, self._decode(blob, lengths), False)
+
+    def cursor(self) -> str:
+        with self._lock:
+            return format_cursor(self._generation, self._last_seq)
+
+    def stats(self) -> Dict[str, int]:
+        """Held lines, their UTF-8 size, the byte capacity and lines appended since start."""
+        with self._lock:
+            return {
+                "lines": self._count,
+                "bytes": self._bytes,
+                "capacity_bytes": self._capacity,
+                "appended_total": self._appended_total,
+            }
 
     @property
     def max_lines(self) -> int:
         return self._max_lines
 
+    @property
+    def archive(self) -> Optional[LogArchive]:
+        return self._archive
+
 
-__all__ = ["LogBuffer"]
+__all__ = ["LogBuffer", "LogSlice", "format_cursor", "parse_cursor"]
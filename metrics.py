@@ -0,0 +1,276 @@
+"""Tiny Prometheus-style counters and histograms for the control panel.
+
+Only what the panel needs: labelled counters, histograms with fixed buckets
+and gauges read from a callback at scrape time, rendered in the Prometheus
+text exposition format. Updates are a dict lookup and an add under a lock,
+so instrumenting a path that runs a few times per turn costs nothing
+measurable, even on a Pi Zero.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TYPING_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed upper-bound buckets, plus sum and count."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last is +Inf)], sum.
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, list(counts), total[0]) for key, (counts, total) in self._values.items())
+        for key, counts, total in items:
+            running = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                running += count
+                labels = _label_text(self.labelnames, key, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {running}"
+            labels = _label_text(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {running}"
+
+
+class Gauge(_Metric):
+    """Current value read from ``function`` whenever the metrics are scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, function: Callable[[], float]) -> None:
+        super().__init__(name, documentation)
+        self._function = function
+
+    def _samples(self) -> Iterable[str]:
+        try:
+            value = float(self._function())
+        except Exception:  # noqa: BLE001 a broken gauge must not break /metrics
+            return
+        yield f"{self.name} {_format_value(value)}"
+
+
+class CounterFunc(Gauge):
+    """Monotonic total kept elsewhere and read from ``function`` at scrape time."""
+
+    kind = "counter"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))  # type: ignore[return-value]
+
+
+def gauge(name: str, documentation: str, function: Callable[[], float]) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, function))  # type: ignore[return-value]
+
+
+def counter_func(name: str, documentation: str, function: Callable[[], float]) -> CounterFunc:
+    return REGISTRY.register(CounterFunc(name, documentation, function))  # type: ignore[return-value]
+
+
+# --- metrics shared by the panel's modules ---------------------------------
+
+API_LATENCY = histogram(
+    "chat_api_latency_seconds",
+    "Groq round trip per reply, until the last byte.",
+    ("model", "bot"),
+)
+API_TTFB = histogram(
+    "chat_api_ttfb_seconds",
+    "Time until the first reply content was available.",
+    ("model", "bot"),
+)
+TOKENS = counter(
+    "chat_tokens_total",
+    "Tokens reported in the API usage block.",
+    ("model", "bot", "direction"),
+)
+API_RETRIES = counter(
+    "chat_api_retries_total",
+    "Retried Groq requests (429, 5xx, connection errors).",
+    ("model", "bot"),
+)
+TYPING_DURATION = histogram(
+    "chat_typing_seconds",
+    "Time spent typing each reply on the display.",
+    ("bot",),
+    TYPING_BUCKETS,
+)
+TURNS = counter("chat_turns_total", "Finished turns by outcome.", ("bot", "outcome"))
+RUNNER_EVENTS = counter(
+    "chat_runner_events_total",
+    "ChatRunner lifecycle events (start, stop, exit).",
+    ("event", "mode"),
+)
+SCHEDULER_TRANSITIONS = counter(
+    "chat_scheduler_transitions_total",
+    "Starts, stops and restarts issued by the scheduler.",
+    ("action",),
+)
+HEDGES = counter(
+    "chat_hedges_total",
+    "Turns that sent a hedge request, by configured and winning model.",
+    ("model", "winner"),
+)
+LOG_REQUESTS = counter(
+    "chat_log_requests_total",
+    "/logs polls by response status.",
+    ("status",),
+)
+
+
+__all__ = [
+    "API_LATENCY",
+    "API_RETRIES",
+    "API_TTFB",
+    "Counter",
+    "CounterFunc",
+    "Gauge",
+    "HEDGES",
+    "Histogram",
+    "LATENCY_BUCKETS",
+    "LOG_REQUESTS",
+    "REGISTRY",
+    "RUNNER_EVENTS",
+    "Registry",
+    "SCHEDULER_TRANSITIONS",
+    "TOKENS",
+    "TURNS",
+    "TYPING_BUCKETS",
+    "TYPING_DURATION",
+    "counter",
+    "counter_func",
+    "gauge",
+    "histogram",
+]
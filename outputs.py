@@ -0,0 +1,194 @@
+"""Non-blocking output fan-out for the chat display (stdout pipe, LCD console)."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict
+
+
+class LineBufferedOutput:
+    """Forward only complete lines to ``target``.
+
+    The typewriter writes a frame at a time; a pipe reader such as ChatRunner
+    only cares about finished lines, so partial ones are held back here.
+    """
+
+    def __init__(self, target) -> None:
+        self.target = target
+        self._partial = ""
+
+    def write(self, message: str) -> None:
+        head, newline, tail = (self._partial + message).rpartition("\n")
+        self._partial = tail
+        if newline:
+            self.target.write(head + newline)
+            self.target.flush()
+
+    def flush(self) -> None:
+        self.target.flush()
+
+
+class QueuedSink:
+    """Writes to one target from its own thread through a bounded queue.
+
+    ``write`` never blocks: pending chunks are coalesced into a single write
+    whenever the writer thread gets to them, and if the target falls more
+    than ``max_pending_bytes`` behind, the oldest pending lines are dropped
+    (a lagging LCD should show the latest text, not replay a backlog). Only
+    whole lines go: a line already partly written is finished first, so the
+    target never sees two lines spliced together or a cut escape sequence.
+    """
+
+    def __init__(self, target, name: str, max_pending_bytes: int = 64 * 1024) -> None:
+        self.target = target
+        self.name = name
+        self._max_pending_bytes = max_pending_bytes
+        self._queue: deque[str] = deque()
+        self._pending_bytes = 0
+        self._busy = False
+        # Whether the target was last handed a line without its newline.
+        self._line_open = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._bytes_written = 0
+        self._writes = 0
+        self._stalls = 0
+        self._dropped_bytes = 0
+        self._errors = 0
+        self._thread = threading.Thread(target=self._run, name=f"output-{name}", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        if not message:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            self._queue.append(message)
+            self._pending_bytes += len(message)
+            if self._pending_bytes > self._max_pending_bytes:
+                self._stalls += 1
+                self._drop_oldest_lines()
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """No-op: the writer thread flushes after every batch."""
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until everything queued so far has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float | None = 2.0) -> None:
+        self.drain(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "pending_bytes": self._pending_bytes,
+                "bytes_written": self._bytes_written,
+                "writes": self._writes,
+                "stalls": self._stalls,
+                "dropped_bytes": self._dropped_bytes,
+                "errors": self._errors,
+            }
+
+    def _drop_oldest_lines(self) -> None:
+        """Drop whole lines from the front of the queue until it fits; the caller holds ``_cond``."""
+        pending = "".join(self._queue)
+        start = 0
+        if self._line_open:
+            # Keep the rest of the line the target is in the middle of.
+            start = pending.find("\n") + 1
+            if start == 0:
+                return
+        excess = len(pending) - self._max_pending_bytes
+        cut = pending.find("\n", start + max(excess, 1) - 1) + 1
+        if cut == 0:
+            # Not enough complete lines to fit; drop all of them but the open one.
+            cut = pending.rfind("\n") + 1
+        if cut <= start:
+            return
+        kept = pending[:start] + pending[cut:]
+        self._queue = deque([kept])
+        self._pending_bytes = len(kept)
+        self._dropped_bytes += cut - start
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                chunk = "".join(self._queue)
+                self._queue.clear()
+                self._pending_bytes = 0
+                self._line_open = not chunk.endswith("\n")
+                self._busy = True
+            try:
+                self.target.write(chunk)
+                self.target.flush()
+                failed = False
+            except Exception:
+                failed = True
+            with self._cond:
+                self._busy = False
+                if failed:
+                    self._errors += 1
+                else:
+                    self._writes += 1
+                    self._bytes_written += len(chunk)
+                self._cond.notify_all()
+
+
+class MultiOutput:
+    """Mirror writes to multiple targets without letting a slow one stall the caller.
+
+    Plain file-like targets are wrapped in a :class:`QueuedSink`; pass an
+    existing sink to share one writer thread between several MultiOutputs
+    (stdout and stderr both mirror to the same LCD, for instance).
+    """
+
+    def __init__(self, *targets):
+        self.targets = tuple(
+            target if isinstance(target, QueuedSink) else QueuedSink(target, _sink_name(target))
+            for target in targets
+        )
+
+    def write(self, message: str) -> None:
+        for target in self.targets:
+            target.write(message)
+
+    def flush(self) -> None:
+        for target in self.targets:
+            target.flush()
+
+    def close(self, timeout: float | None = 2.0) -> None:
+        for target in self.targets:
+            target.close(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {target.name: target.stats() for target in self.targets}
+
+
+def _sink_name(target) -> str:
+    name = getattr(target, "name", None)
+    if isinstance(name, str):
+        return name
+    return type(target).__name__
+
+
+__all__ = ["LineBufferedOutput", "MultiOutput", "QueuedSink"]
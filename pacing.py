@@ -0,0 +1,227 @@
+"""Rate-limit-aware pacing of chat turns across the bots' API keys.
+
+Groq reports its limits on every response (``x-ratelimit-limit-*``,
+``x-ratelimit-remaining-*`` and ``x-ratelimit-reset-*`` for requests and
+tokens). :class:`RateLimitPacer` turns those into a token bucket per key and
+resource, debits each request locally as it is sent, and tells the
+conversation loop how long to wait before the next turn so it never runs
+into a 429.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from conversation import estimate_message_tokens
+
+# Kept free in every bucket so that estimates that come in a little low
+# still land under the limit.
+DEFAULT_HEADROOM = 0.02
+# Assumed completion size when a request sets no max_completion_tokens.
+DEFAULT_COMPLETION_TOKENS = 256
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNIT_SECONDS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds in a Groq reset header such as ``"2m59.56s"``, ``"7.66s"`` or ``"450ms"``."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def estimate_request_tokens(body: Dict[str, Any]) -> int:
+    """Prompt plus worst-case completion tokens a request can be charged."""
+    prompt = sum(
+        estimate_message_tokens(str(message.get("content") or ""))
+        for message in body.get("messages", [])
+    )
+    completion = body.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt + int(completion)
+
+
+class TokenBucket:
+    """One limit of one key, resynchronised from response headers.
+
+    Between responses the level refills at the rate implied by the last
+    headers: whatever was missing from the limit comes back by the reset time.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.limit = 0.0
+        self._level = 0.0
+        self._rate = 0.0
+        self._updated = 0.0
+
+    @property
+    def known(self) -> bool:
+        return self.limit > 0
+
+    def level(self) -> float:
+        if not self.known:
+            return float("inf")
+        elapsed = self._clock() - self._updated
+        return min(self.limit, self._level + self._rate * elapsed)
+
+    def sync(self, limit: float, remaining: float, reset_seconds: Optional[float]) -> None:
+        self.limit = limit
+        self._level = max(min(remaining, limit), 0.0)
+        missing = limit - self._level
+        if reset_seconds:
+            self._rate = missing / reset_seconds
+        elif missing <= 0:
+            self._rate = 0.0
+        self._updated = self._clock()
+
+    def debit(self, amount: float) -> None:
+        if self.known:
+            self._level = self.level() - amount
+            self._updated = self._clock()
+
+    def wait_for(self, amount: float, headroom: float) -> float:
+        """Seconds until ``amount`` can be spent while keeping ``headroom`` spare."""
+        if not self.known:
+            return 0.0
+        need = min(amount + max(self.limit * headroom, 1.0), self.limit)
+        shortfall = need - self.level()
+        if shortfall <= 0:
+            return 0.0
+        if self._rate <= 0:
+            # No refill information yet: check again after a minute.
+            return 60.0
+        return shortfall / self._rate
+
+
+class KeyBudget:
+    """Request and token buckets for one API key, plus any Retry-After block."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self.requests = TokenBucket(clock)
+        self.tokens = TokenBucket(clock)
+        self.blocked_until = 0.0
+
+    def wait_for(self, tokens: int, headroom: float) -> float:
+        blocked = max(self.blocked_until - self._clock(), 0.0)
+        return max(
+            blocked,
+            self.requests.wait_for(1, headroom),
+            self.tokens.wait_for(tokens, headroom),
+        )
+
+
+class RateLimitPacer:
+    """Decides how long to wait before a turn and which key should make it.
+
+    Attach it to a :class:`groq_client.GroqClient` with :meth:`attach` so it
+    sees every request (debited from the buckets up front) and every
+    response (buckets resynchronised from the headers; a 429 blocks the key
+    for its ``retry-after``). With ``share_keys`` a bot whose key has run dry
+    may borrow the other key instead of waiting.
+    """
+
+    def __init__(
+        self,
+        *,
+        share_keys: bool = False,
+        headroom: float = DEFAULT_HEADROOM,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.share_keys = share_keys
+        self.headroom = headroom
+        self._clock = clock
+        self._budgets: Dict[str, KeyBudget] = {}
+        self._lock = threading.Lock()
+        self.rate_limited = 0
+
+    # --- GroqClient observer interface ------------------------------------
+
+    def attach(self, client) -> "RateLimitPacer":
+        client.add_observer(self)
+        return self
+
+    def detach(self, client) -> None:
+        client.remove_observer(self)
+
+    def on_request(self, api_key: str, body: Dict[str, Any]) -> None:
+        tokens = estimate_request_tokens(body)
+        with self._lock:
+            budget = self._budget(api_key)
+            budget.requests.debit(1)
+            budget.tokens.debit(tokens)
+
+    def on_response(self, api_key: str, response) -> None:
+        headers = response.headers
+        with self._lock:
+            budget = self._budget(api_key)
+            for name, bucket in (("requests", budget.requests), ("tokens", budget.tokens)):
+                limit = _header_number(headers, f"x-ratelimit-limit-{name}")
+                remaining = _header_number(headers, f"x-ratelimit-remaining-{name}")
+                if limit is not None and remaining is not None:
+                    bucket.sync(limit, remaining, parse_reset(headers.get(f"x-ratelimit-reset-{name}")))
+            if response.status_code == 429:
+                self.rate_limited += 1
+                retry_after = parse_reset(headers.get("retry-after")) or 1.0
+                budget.blocked_until = max(budget.blocked_until, self._clock() + retry_after)
+
+    # --- decisions ----------------------------------------------------------
+
+    def wait_time(self, api_key: str, tokens: int) -> float:
+        """Seconds before ``api_key`` can afford a request of ``tokens``."""
+        with self._lock:
+            return self._budget(api_key).wait_for(tokens, self.headroom)
+
+    def choose_key(self, own_key: str, other_keys: Iterable[str], tokens: int) -> Tuple[str, float]:
+        """The key to use for the next turn and how long it has to wait.
+
+        Without ``share_keys`` that is always ``own_key``.
+        """
+        best = (own_key, self.wait_time(own_key, tokens))
+        if not self.share_keys or best[1] <= 0:
+            return best
+        for key in other_keys:
+            if key and key != own_key:
+                wait = self.wait_time(key, tokens)
+                if wait < best[1]:
+                    best = (key, wait)
+        return best
+
+    def _budget(self, api_key: str) -> KeyBudget:
+        budget = self._budgets.get(api_key)
+        if budget is None:
+            budget = self._budgets[api_key] = KeyBudget(self._clock)
+        return budget
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    raw = headers.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        logging.debug("Ignoring malformed %s header: %r", name, raw)
+        return None
+
+
+__all__ = [
+    "KeyBudget",
+    "RateLimitPacer",
+    "TokenBucket",
+    "estimate_request_tokens",
+    "parse_reset",
+]
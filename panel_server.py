@@ -0,0 +1,194 @@
+"""Serving the control panel outside Flask's development server.
+
+:func:`serve` runs the app on waitress when it is installed and otherwise on
+werkzeug's server with a fixed pool of worker threads, so a crowd of viewers
+queues up instead of spawning a thread each. :func:`install_response_filters`
+adds what the dev server never did: content-hashed static URLs with a year
+of caching, and gzip for text responses.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, Response, request
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from config import PANEL_SERVER, PANEL_THREADS
+
+try:
+    import waitress
+except ImportError:  # pragma: no cover - optional dependency
+    waitress = None  # type: ignore[assignment]
+
+SERVERS = ("auto", "waitress", "builtin", "dev")
+# Static URLs carry their content hash, so they can be cached for a year.
+STATIC_MAX_AGE = 365 * 24 * 3600
+GZIP_MIN_BYTES = 512
+GZIP_LEVEL = 6
+# Compressed bodies kept, keyed by URL and ETag (static files, log snapshots).
+GZIP_CACHE_SIZE = 32
+_COMPRESSIBLE = ("text/html", "text/css", "text/plain", "application/json", "text/javascript", "application/javascript")
+
+
+class _Handler(WSGIRequestHandler):
+    # One request per connection: an idle keep-alive socket would otherwise
+    # hold one of the few worker threads.
+    protocol_version = "HTTP/1.0"
+
+
+class BoundedWSGIServer(BaseWSGIServer):
+    """werkzeug's WSGI server handling connections on ``threads`` workers."""
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app: Any, *, threads: int = PANEL_THREADS) -> None:
+        super().__init__(host, port, app, handler=_Handler)
+        self._pool = ThreadPoolExecutor(max_workers=max(threads, 1), thread_name_prefix="panel-http")
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+
+def serve(app: Flask, host: str, port: int, *, server: str = PANEL_SERVER, threads: int = PANEL_THREADS) -> None:
+    """Serve ``app`` until interrupted.
+
+    ``server`` is "waitress", "builtin" (the bounded werkzeug server), "dev"
+    (Flask's development server) or "auto": waitress if installed, else builtin.
+    """
+    if server not in SERVERS:
+        logging.warning("Unknown panel server %r; using auto", server)
+        server = "auto"
+    if server in {"auto", "waitress"} and waitress is not None:
+        waitress.serve(app, host=host, port=port, threads=max(threads, 1), ident=None)
+        return
+    if server == "waitress":
+        logging.warning("waitress is not installed; using the built-in server")
+    if server == "dev":
+        app.run(host=host, port=port, threaded=True)
+        return
+    httpd = BoundedWSGIServer(host, port, app, threads=threads)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+
+
+class _StaticHashes:
+    """Short content hashes of static files, recomputed when a file changes."""
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+        self._lock = threading.Lock()
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+
+    def get(self, filename: str) -> Optional[str]:
+        path = self._root / filename
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(filename)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+
+def _accepts_gzip() -> bool:
+    return any(value == "gzip" and quality > 0 for value, quality in request.accept_encodings)
+
+
+def install_response_filters(app: Flask) -> None:
+    """Version static URLs and gzip text responses for ``app``."""
+    hashes = _StaticHashes(Path(app.static_folder or "static"))
+    gzip_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+    gzip_lock = threading.Lock()
+
+    @app.url_defaults
+    def _version_static(endpoint: str, values: Dict[str, Any]) -> None:
+        if endpoint == "static" and "filename" in values and "v" not in values:
+            digest = hashes.get(values["filename"])
+            if digest:
+                values["v"] = digest
+
+    def _compress(response: Response) -> None:
+        static = request.endpoint == "static"
+        if static:
+            # send_file streams the file; read it so it can be compressed.
+            response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < GZIP_MIN_BYTES:
+            return
+        # An ETag names the exact bytes of this URL's response, so their
+        # compressed form can be reused.
+        etag, _ = response.get_etag()
+        key = (request.full_path, etag or "")
+        compressed = None
+        if etag:
+            with gzip_lock:
+                compressed = gzip_cache.get(key)
+        if compressed is None:
+            compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+            if etag:
+                with gzip_lock:
+                    gzip_cache[key] = compressed
+                    while len(gzip_cache) > GZIP_CACHE_SIZE:
+                        gzip_cache.popitem(last=False)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = "gzip"
+        # Same content, different bytes: only a weak validator still holds.
+        if etag:
+            response.set_etag(etag, weak=True)
+
+    @app.after_request
+    def _filter(response: Response) -> Response:
+        if request.endpoint == "static" and response.status_code in {200, 304}:
+            if request.args.get("v") and request.args.get("v") == hashes.get(request.view_args["filename"]):
+                response.cache_control.no_cache = None
+                response.cache_control.public = True
+                response.cache_control.max_age = STATIC_MAX_AGE
+                response.cache_control.immutable = True
+        if (
+            response.status_code != 200
+            or response.is_streamed and request.endpoint != "static"
+            or response.mimetype not in _COMPRESSIBLE
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        if _accepts_gzip() and request.method != "HEAD":
+            _compress(response)
+        return response
+
+
+__all__ = [
+    "BoundedWSGIServer",
+    "STATIC_MAX_AGE",
+    "install_response_filters",
+    "serve",
+]
@@ -0,0 +1,209 @@
+"""Record/replay cache for chat completions, for offline runs and benchmarks."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+CACHE_MODES = ("passthrough", "record", "replay")
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when no recording matches the request."""
+
+
+@dataclass
+class CachedReply:
+    text: str
+    usage: Dict[str, Any] = field(default_factory=dict)
+    ttfb: float = 0.0
+    # Time the API took to produce the whole reply, excluding the time a
+    # streaming consumer (the typewriter) spent on each chunk.
+    latency: float = 0.0
+    model: str = ""
+    recorded_at: float = 0.0
+
+
+def cache_key(body: Dict[str, Any]) -> str:
+    """Hash of the parts of a request that decide the reply.
+
+    Messages are the trimmed context actually sent; ``stream`` is left out
+    so a recording made with streaming on replays with it off and vice versa.
+    """
+    material = {
+        "model": body.get("model"),
+        "messages": [
+            {"role": message.get("role"), "content": (message.get("content") or "").strip()}
+            for message in body.get("messages", [])
+        ],
+        "temperature": body.get("temperature"),
+        "max_completion_tokens": body.get("max_completion_tokens", 0),
+    }
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """On-disk store of replies, one JSON file per request hash.
+
+    ``record`` calls the API as usual and stores every reply, ``replay``
+    answers only from the store (raising :class:`CacheMiss` otherwise) and
+    ``passthrough`` leaves the store alone. The directory is kept under
+    ``max_bytes`` by evicting the least recently used files; the in-memory
+    index holds only key → size in LRU order, seeded from file mtimes, which
+    hits refresh so the order survives restarts.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        mode: str = "passthrough",
+        *,
+        max_bytes: int = 64 * 1024 * 1024,
+        replay_latency: bool = False,
+    ) -> None:
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}; expected one of {', '.join(CACHE_MODES)}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.max_bytes = max(max_bytes, 0)
+        self.replay_latency = replay_latency
+        self.hits = 0
+        self.misses = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        if mode != "passthrough":
+            self._load_index()
+
+    # --- public API -----------------------------------------------------
+
+    def lookup(self, key: str) -> Optional[CachedReply]:
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                reply = CachedReply(**data)
+            except (OSError, ValueError, TypeError):
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            self.hits += 1
+            return reply
+
+    def store(self, key: str, reply: CachedReply) -> None:
+        payload = json.dumps(asdict(reply), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(payload)
+                os.replace(tmp_name, self._path(key))
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(payload)
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def replay(
+        self,
+        key: str,
+        *,
+        on_delta: Optional[Callable[[str], None]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> str:
+        """Return the recorded reply for ``key``, streaming it to ``on_delta``.
+
+        With ``replay_latency`` the recorded time to first byte and total
+        generation time are reproduced; otherwise it runs as fast as possible.
+        """
+        reply = self.lookup(key)
+        if reply is None:
+            raise CacheMiss(f"No recorded reply for request {key[:12]} in {self.directory}")
+        stats = {} if stats is None else stats
+        started = time.monotonic()
+        if self.replay_latency and reply.ttfb > 0:
+            sleep(reply.ttfb)
+        stats["ttfb"] = time.monotonic() - started
+        if on_delta is not None:
+            words = reply.text.split(" ")
+            gap = 0.0
+            if self.replay_latency and len(words) > 1:
+                gap = max(reply.latency - reply.ttfb, 0.0) / (len(words) - 1)
+            for index, word in enumerate(words):
+                if index and gap:
+                    sleep(gap)
+                on_delta(word if index == 0 else " " + word)
+        elif self.replay_latency and reply.latency > reply.ttfb:
+            sleep(reply.latency - reply.ttfb)
+        stats["api_latency"] = time.monotonic() - started
+        stats["usage"] = dict(reply.usage)
+        stats["cache"] = "hit"
+        return reply.text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    # --- helpers --------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self) -> None:
+        try:
+            entries = [
+                (entry.stat().st_mtime, entry.name[:-5], entry.stat().st_size)
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json") and entry.is_file()
+            ]
+        except FileNotFoundError:
+            return
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._forget(oldest)
+
+    def _forget(self, key: str) -> None:
+        self._total_bytes -= self._index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+
+__all__ = ["CACHE_MODES", "CacheMiss", "CachedReply", "ResponseCache", "cache_key"]
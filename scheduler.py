@@ -1,56 +1,336 @@
-"""Background scheduler that starts/stops the chat based on configured hours."""
+"""Background scheduler that starts/stops the chat based on configured hours.
+
+The schedule is a set of daily windows, each applying to some weekdays. The
+scheduler computes the exact moment of the next start or stop, sleeps until
+then on an Event and is woken early by :meth:`ChatScheduler.notify` whenever
+the panel changes the config. Window boundaries are local wall-clock times
+and are converted to absolute instants day by day, so they stay put across
+DST changes.
+"""
 
 from __future__ import annotations
 
 import datetime
+import logging
+import re
 import threading
 import time
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
 
 from chat_runner import ChatRunner
+from config import SCHEDULE_TIMEZONE
+from metrics import SCHEDULER_TRANSITIONS
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None  # type: ignore[assignment]
+
+# Longest uninterrupted sleep, so a wall clock that jumps (NTP sync on a Pi
+# without an RTC) is noticed within this many seconds.
+MAX_SLEEP = 300.0
+# Inside an open window a chat that ended or crashed for good is started
+# again within this many seconds.
+RECHECK_INTERVAL = 60.0
+# How far ahead the next transition is searched for.
+HORIZON_DAYS = 8
+
+DAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+ALL_DAYS: FrozenSet[int] = frozenset(range(7))
+_DAY_ALIASES = {
+    "daily": ALL_DAYS,
+    "*": ALL_DAYS,
+    "weekdays": frozenset(range(5)),
+    "weekends": frozenset({5, 6}),
+}
+_WINDOW_RE = re.compile(r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})$")
+
+
+@dataclass(frozen=True)
+class ScheduleWindow:
+    """Run from ``start`` to ``stop`` on ``days`` (0 = Monday).
+
+    A ``stop`` at or before ``start`` ends on the following day, so
+    ``22:00-02:00`` runs overnight and equal times run around the clock.
+    """
+
+    days: FrozenSet[int]
+    start: datetime.time
+    stop: datetime.time
+
+
+def _parse_days(spec: str) -> FrozenSet[int]:
+    days = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if part in _DAY_ALIASES:
+            days |= _DAY_ALIASES[part]
+            continue
+        first, _, last = part.partition("-")
+        try:
+            begin = DAY_NAMES.index(first[:3])
+            end = DAY_NAMES.index(last[:3]) if last else begin
+        except ValueError:
+            raise ValueError(f"Unknown day {part!r}") from None
+        day = begin
+        while True:
+            days.add(day)
+            if day == end:
+                break
+            day = (day + 1) % 7
+    return frozenset(days)
+
+
+def _parse_clock(hour: str, minute: str) -> datetime.time:
+    if int(hour) == 24 and int(minute) == 0:
+        return datetime.time(0, 0)
+    return datetime.time(int(hour), int(minute))
+
+
+def parse_schedule(text: str) -> List[ScheduleWindow]:
+    """Parse rules such as ``"mon-fri 07:00-09:00, 17:30-23:00; sat,sun 10:00-22:00"``.
+
+    Rules are separated by ``;`` or newlines. Each starts with optional days
+    (``mon-fri``, ``sat,sun``, ``weekdays``, ``weekends`` or ``daily``, the
+    default) followed by comma-separated ``HH:MM-HH:MM`` windows. Raises
+    ValueError on anything else.
+    """
+    windows: List[ScheduleWindow] = []
+    for rule in re.split(r"[;\n]", text.lower()):
+        rule = rule.strip()
+        if not rule:
+            continue
+        days = ALL_DAYS
+        if not rule[0].isdigit():
+            spec, _, rule = rule.partition(" ")
+            days = _parse_days(spec)
+        for part in rule.split(","):
+            match = _WINDOW_RE.match(part.strip())
+            if match is None:
+                raise ValueError(f"Bad window {part.strip()!r}; expected HH:MM-HH:MM")
+            start_hour, start_minute, stop_hour, stop_minute = match.groups()
+            windows.append(
+                ScheduleWindow(
+                    days, _parse_clock(start_hour, start_minute), _parse_clock(stop_hour, stop_minute)
+                )
+            )
+    return windows
+
+
+def windows_from_config(config: Dict[str, Any]) -> List[ScheduleWindow]:
+    """Weekly ``schedule`` rules plus the legacy single daily start/stop time."""
+    windows = parse_schedule(config.get("schedule") or "")
+    start_hour = config.get("start_hour")
+    start_minute = config.get("start_minute")
+    stop_hour = config.get("stop_hour")
+    stop_minute = config.get("stop_minute")
+    if None not in (start_hour, start_minute, stop_hour, stop_minute):
+        windows.append(
+            ScheduleWindow(
+                ALL_DAYS,
+                datetime.time(start_hour, start_minute),
+                datetime.time(stop_hour, stop_minute),
+            )
+        )
+    return windows
+
 
+def resolve_timezone(name: Optional[str]) -> Optional[datetime.tzinfo]:
+    """The named IANA zone, or None for the system's local time."""
+    if not name or ZoneInfo is None:
+        return None
+    try:
+        return ZoneInfo(name)
+    except Exception:  # noqa: BLE001 unknown zone names fall back to local time
+        logging.warning("Unknown timezone %r; using local time", name)
+        return None
 
-def _time_in_range(start: datetime.time, stop: datetime.time, current: datetime.time) -> bool:
-    if start < stop:
-        return start <= current < stop
-    return current >= start or current < stop
+
+def _local_wall(timestamp: float, tz: Optional[datetime.tzinfo]) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp, tz).replace(tzinfo=None)
+
+
+def wall_to_timestamp(wall: datetime.datetime, tz: Optional[datetime.tzinfo] = None) -> float:
+    """Epoch seconds of the local wall-clock time ``wall``.
+
+    A time that occurs twice when the clocks go back resolves to its first
+    occurrence; one skipped when they go forward resolves to the jump itself.
+    """
+    local = wall.replace(tzinfo=tz) if tz is not None else wall
+    first = local.replace(fold=0).timestamp()
+    if _local_wall(first, tz) == wall:
+        return first
+    # Inside a gap the two folds land on either side of the jump.
+    low, high = sorted((local.replace(fold=1).timestamp(), first))
+    while high - low > 0.001:
+        middle = (low + high) / 2
+        if _local_wall(middle, tz) >= wall:
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def run_intervals(
+    windows: List[ScheduleWindow], now: float, tz: Optional[datetime.tzinfo] = None
+) -> List[Tuple[float, float]]:
+    """Merged ``(start, stop)`` instants of every window from yesterday to the horizon."""
+    today = _local_wall(now, tz).date()
+    intervals = []
+    for offset in range(-1, HORIZON_DAYS):
+        day = today + datetime.timedelta(days=offset)
+        for window in windows:
+            if day.weekday() not in window.days:
+                continue
+            stop_day = day if window.stop > window.start else day + datetime.timedelta(days=1)
+            intervals.append(
+                (
+                    wall_to_timestamp(datetime.datetime.combine(day, window.start), tz),
+                    wall_to_timestamp(datetime.datetime.combine(stop_day, window.stop), tz),
+                )
+            )
+    merged: List[Tuple[float, float]] = []
+    for start, stop in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def schedule_state(
+    windows: List[ScheduleWindow], now: float, tz: Optional[datetime.tzinfo] = None
+) -> Tuple[bool, Optional[float]]:
+    """Whether the chat should run at ``now`` and when that next changes (None: not soon)."""
+    for start, stop in run_intervals(windows, now, tz):
+        if start <= now < stop:
+            return True, stop
+        if start > now:
+            return False, start
+    return False, None
 
 
 class ChatScheduler:
-    def __init__(self, runner: ChatRunner, config: Dict[str, Any]) -> None:
+    """Starts and stops ``runner`` at the schedule's transitions.
+
+    The desired state is applied when the scheduler starts, when a window
+    opens or closes, and when the schedule itself changes. Inside an open
+    window a chat that has ended, or that its runner gave up restarting, is
+    started again every RECHECK_INTERVAL seconds, unless it was stopped from
+    the panel (:meth:`hold`); that lasts until the next transition or
+    :meth:`release`. ``clock`` returns
+    epoch seconds and ``wait(event, timeout)`` sleeps until ``event`` is set
+    or ``timeout`` seconds have passed on that clock, returning whether the
+    event was set; tests swap both for a fake clock.
+    """
+
+    def __init__(
+        self,
+        runner: ChatRunner,
+        config: Dict[str, Any],
+        *,
+        clock: Callable[[], float] = time.time,
+        wait: Callable[[threading.Event, float], bool] = threading.Event.wait,
+        timezone: Optional[datetime.tzinfo] = None,
+    ) -> None:
         self._runner = runner
         self._config = config
-        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._clock = clock
+        self._wait = wait
+        self._tz = timezone if timezone is not None else resolve_timezone(SCHEDULE_TIMEZONE)
+        self._wake = threading.Event()
+        self._shutdown = threading.Event()
+        self._lock = threading.Lock()
+        self._next: Tuple[bool, Optional[float]] = (False, None)
+        self._held = False
+        self._thread = threading.Thread(target=self._loop, name="chat-scheduler", daemon=True)
+
+    @property
+    def timezone(self) -> Optional[datetime.tzinfo]:
+        return self._tz
 
     def start(self) -> None:
         if not self._thread.is_alive():
             self._thread.start()
 
+    def notify(self) -> None:
+        """Re-read the config now instead of at the next transition."""
+        self._wake.set()
+
+    def hold(self) -> None:
+        """Leave the chat stopped until the next transition; call before a manual stop."""
+        with self._lock:
+            self._held = True
+
+    def release(self) -> None:
+        """Forget a :meth:`hold`, e.g. after a manual start."""
+        with self._lock:
+            self._held = False
+
+    def shutdown(self) -> None:
+        self._shutdown.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def next_transition(self) -> Tuple[bool, Optional[float]]:
+        """``(should_run, at)``: the state before the next transition and its epoch time."""
+        with self._lock:
+            return self._next
+
     def _loop(self) -> None:
-        while True:
+        applied: Optional[List[ScheduleWindow]] = None
+        due: Optional[float] = None
+        while not self._shutdown.is_set():
+            self._wake.clear()
+            now = self._clock()
             try:
-                start_hour = self._config.get("start_hour")
-                start_minute = self._config.get("start_minute")
-                stop_hour = self._config.get("stop_hour")
-                stop_minute = self._config.get("stop_minute")
-
-                if None not in (start_hour, start_minute, stop_hour, stop_minute):
-                    start_time = datetime.time(start_hour, start_minute)
-                    stop_time = datetime.time(stop_hour, stop_minute)
-                    now = datetime.datetime.now().time()
-
-                    should_run = _time_in_range(start_time, stop_time, now)
-                    running = self._runner.is_running()
-
-                    if should_run and not running:
-                        self._runner.start(self._config)
-                    elif not should_run and running:
-                        self._runner.stop()
+                windows = windows_from_config(self._config)
+                should_run, next_at = schedule_state(windows, now, self._tz)
+                if windows and (windows != applied or (due is not None and now >= due)):
+                    self.release()
+                    self._apply(should_run)
+                elif windows and should_run:
+                    self._recheck()
+                applied, due = windows, next_at
+                with self._lock:
+                    self._next = (should_run, next_at) if windows else (False, None)
             except Exception:
-                # Silent error to keep the scheduler alive. For troubleshooting,
-                # inspect the control panel logs or run the app in verbose mode.
-                pass
-            time.sleep(60)
+                # Keep the scheduler alive; a bad config is retried on the next wake.
+                logging.warning("Chat scheduler failed", exc_info=True)
+                due = None
+            longest = RECHECK_INTERVAL if self._next[0] else MAX_SLEEP
+            timeout = longest if due is None else min(max(due - now, 0.0), longest)
+            self._wait(self._wake, timeout)
+
+    def _recheck(self) -> None:
+        """Start a chat that is down inside an open window, unless held or already restarting."""
+        with self._lock:
+            if self._held:
+                return
+        if self._runner.is_running() or self._runner.supervision()["restart_in"] is not None:
+            return
+        self._runner.start(self._config)
+        SCHEDULER_TRANSITIONS.inc(action="restart")
+
+    def _apply(self, should_run: bool) -> None:
+        running = self._runner.is_running()
+        if should_run and not running:
+            self._runner.start(self._config)
+            SCHEDULER_TRANSITIONS.inc(action="start")
+        elif not should_run and running:
+            self._runner.stop()
+            SCHEDULER_TRANSITIONS.inc(action="stop")
 
 
-__all__ = ["ChatScheduler"]
+__all__ = [
+    "ChatScheduler",
+    "ScheduleWindow",
+    "parse_schedule",
+    "resolve_timezone",
+    "run_intervals",
+    "schedule_state",
+    "wall_to_timestamp",
+    "windows_from_config",
+]
@@ -0,0 +1,159 @@
+"""Write-behind store for the settings the control panel persists to ``.env``.
+
+The file is read once; afterwards the store answers from its in-memory view
+and updates only touch memory. Changes are coalesced and written out after
+``delay`` seconds, atomically (temp file, fsync, rename), so a power cut
+leaves either the old or the new ``.env`` and never a truncated one. Updates
+that change nothing never reach the disk.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+
+from config import SETTINGS_WRITE_DELAY
+
+# A failed write is retried after RETRY_BASE seconds, doubling up to RETRY_MAX.
+RETRY_BASE = 1.0
+RETRY_MAX = 300.0
+
+
+def _line_key(line: str) -> Optional[str]:
+    stripped = line.strip()
+    if not stripped or stripped.startswith("#") or "=" not in line:
+        return None
+    return line.split("=", 1)[0].strip() or None
+
+
+class SettingsStore:
+    """In-memory view of a ``KEY=value`` file with debounced atomic writes.
+
+    Comments, blank lines and the order of keys are preserved; new keys are
+    appended at the end.
+    """
+
+    def __init__(self, path: Path | str, *, delay: float = SETTINGS_WRITE_DELAY) -> None:
+        self.path = Path(path)
+        self.delay = max(delay, 0.0)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._lines: List[str] = []
+        self._values: Dict[str, str] = {}
+        self._written = ""
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._failures = 0
+        self.writes = 0
+        self._load()
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._lock:
+            return self._values.get(key, default)
+
+    def values(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._values)
+
+    def update(self, updates: Mapping[str, str]) -> bool:
+        """Apply ``updates`` in memory and schedule a write; False if nothing changed."""
+        with self._lock:
+            changed = {key: value for key, value in updates.items() if self._values.get(key) != value}
+            if not changed:
+                return False
+            for index, line in enumerate(self._lines):
+                key = _line_key(line)
+                if key in changed:
+                    self._lines[index] = f"{key}={changed[key]}"
+            for key, value in changed.items():
+                if key not in self._values:
+                    self._lines.append(f"{key}={value}")
+            self._values.update(changed)
+            self._dirty = True
+            if self._timer is None:
+                self._schedule(self.delay)
+        return True
+
+    def flush(self) -> bool:
+        """Write pending changes now; True if the file was rewritten."""
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return False
+                self._dirty = False
+                content = "\n".join(self._lines) + ("\n" if self._lines else "")
+            if content == self._written:
+                return False
+            # Outside the view lock, so updates never wait on the disk.
+            try:
+                self._write(content)
+            except OSError:
+                with self._lock:
+                    self._dirty = True
+                    self._failures += 1
+                    retry = min(max(self.delay, RETRY_BASE) * 2 ** (self._failures - 1), RETRY_MAX)
+                    if self._timer is None:
+                        self._schedule(retry)
+                logging.warning(
+                    "Failed to write settings to %s; retrying in %.1fs", self.path, retry, exc_info=True
+                )
+                return False
+            self._failures = 0
+            self._written = content
+            self.writes += 1
+            return True
+
+    def close(self) -> None:
+        self.flush()
+
+    def _schedule(self, delay: float) -> None:
+        """Arm the write timer; the caller holds ``_lock``."""
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _load(self) -> None:
+        try:
+            self._written = self.path.read_text()
+        except FileNotFoundError:
+            return
+        self._lines = self._written.splitlines()
+        for line in self._lines:
+            key = _line_key(line)
+            if key is not None:
+                self._values[key] = line.split("=", 1)[1].strip()
+
+    def _write(self, content: str) -> None:
+        directory = self.path.parent
+        try:
+            mode = self.path.stat().st_mode & 0o777
+        except FileNotFoundError:
+            # .env holds the API keys; keep a new one private.
+            mode = 0o600
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{self.path.name}-")
+        try:
+            with os.fdopen(fd, "w") as handle:
+                handle.write(content)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        # Make the rename itself durable.
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+
+__all__ = ["SettingsStore"]
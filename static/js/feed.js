@@ -3,51 +3,116 @@ const topicRefreshButton = document.getElementById('topic-refresh');
 const topicInput = document.getElementById('topic');
 const defaultTopicPlaceholder = topicInput ? topicInput.getAttribute('placeholder') || '' : '';
 
+let logCursor = chatFeed ? chatFeed.dataset.cursor || '' : '';
+
+function renderLogLines(lines, reset, maxLines) {
+    const previousScrollTop = chatFeed.scrollTop;
+    const previousScrollHeight = chatFeed.scrollHeight;
+    const isPinnedToBottom =
+        Math.abs(previousScrollHeight - chatFeed.clientHeight - previousScrollTop) < 6;
+    const fragment = document.createDocumentFragment();
+    for (const line of lines) {
+        const row = document.createElement('div');
+        row.textContent = line;
+        fragment.appendChild(row);
+    }
+    const placeholder = chatFeed.querySelector('.chat-feed__placeholder');
+    if (reset) {
+        chatFeed.replaceChildren(fragment);
+    } else if (lines.length > 0) {
+        if (placeholder) {
+            placeholder.remove();
+        }
+        chatFeed.appendChild(fragment);
+    }
+    if (maxLines > 0) {
+        while (chatFeed.childElementCount > maxLines) {
+            chatFeed.firstElementChild.remove();
+        }
+    }
+    if (chatFeed.childElementCount === 0) {
+        const emptyPlaceholder = document.createElement('div');
+        emptyPlaceholder.classList.add('chat-feed__placeholder');
+        emptyPlaceholder.textContent = 'Waiting for chat output...';
+        chatFeed.appendChild(emptyPlaceholder);
+    }
+    if (isPinnedToBottom) {
+        chatFeed.scrollTop = chatFeed.scrollHeight;
+    } else if (!reset) {
+        chatFeed.scrollTop = previousScrollTop;
+    } else {
+        const heightDelta = chatFeed.scrollHeight - previousScrollHeight;
+        chatFeed.scrollTop = Math.max(0, previousScrollTop + heightDelta);
+    }
+}
+
 async function refreshChat() {
     if (!chatFeed) {
         return;
     }
     try {
-        const response = await fetch('/logs', { cache: 'no-store' });
-        if (!response.ok) {
+        const headers = logCursor ? { 'If-None-Match': `"${logCursor}"` } : {};
+        const query = logCursor ? `?since=${encodeURIComponent(logCursor)}` : '';
+        const response = await fetch(`/logs${query}`, { cache: 'no-store', headers });
+        if (response.status === 304 || !response.ok) {
             return;
         }
         const data = await response.json();
         if (!Array.isArray(data.lines)) {
             return;
         }
-        const previousScrollTop = chatFeed.scrollTop;
-        const previousScrollHeight = chatFeed.scrollHeight;
-        const isPinnedToBottom =
-            Math.abs(previousScrollHeight - chatFeed.clientHeight - previousScrollTop) < 6;
-        const fragment = document.createDocumentFragment();
-        if (data.lines.length === 0) {
-            const placeholder = document.createElement('div');
-            placeholder.classList.add('chat-feed__placeholder');
-            placeholder.textContent = 'Waiting for chat output...';
-            fragment.appendChild(placeholder);
-        } else {
-            for (const line of data.lines) {
-                const row = document.createElement('div');
-                row.textContent = line;
-                fragment.appendChild(row);
-            }
-        }
-        chatFeed.replaceChildren(fragment);
-        if (isPinnedToBottom) {
-            chatFeed.scrollTop = chatFeed.scrollHeight;
-        } else {
-            const heightDelta = chatFeed.scrollHeight - previousScrollHeight;
-            chatFeed.scrollTop = Math.max(0, previousScrollTop + heightDelta);
+        renderLogLines(data.lines, Boolean(data.reset) || !logCursor, Number(data.max_lines) || 0);
+        if (typeof data.cursor === 'string') {
+            logCursor = data.cursor;
         }
     } catch (error) {
         // Ignore intermittent network issues; the next poll will retry.
     }
 }
 
-if (chatFeed) {
+let pollTimer = null;
+
+function startPolling() {
+    if (pollTimer !== null) {
+        return;
+    }
     refreshChat();
-    setInterval(refreshChat, 3000);
+    pollTimer = setInterval(refreshChat, 3000);
+}
+
+function startLogStream() {
+    if (typeof EventSource === 'undefined') {
+        startPolling();
+        return;
+    }
+    const query = logCursor ? `?since=${encodeURIComponent(logCursor)}` : '';
+    const source = new EventSource(`/logs/stream${query}`);
+    source.addEventListener('lines', (event) => {
+        let data = null;
+        try {
+            data = JSON.parse(event.data);
+        } catch (parseError) {
+            return;
+        }
+        if (!data || !Array.isArray(data.lines)) {
+            return;
+        }
+        renderLogLines(data.lines, Boolean(data.reset), Number(data.max_lines) || 0);
+        if (event.lastEventId) {
+            logCursor = event.lastEventId;
+        }
+    });
+    source.addEventListener('error', () => {
+        // EventSource reconnects by itself (resuming via Last-Event-ID); only
+        // fall back to polling once the browser has given up on the stream.
+        if (source.readyState === EventSource.CLOSED) {
+            startPolling();
+        }
+    });
+}
+
+if (chatFeed) {
+    startLogStream();
 }
 
 async function populateRandomTopic() {
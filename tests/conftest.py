@@ -0,0 +1,25 @@
+"""Shared setup: the modules under test read required settings at import time."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_scratch = Path(tempfile.mkdtemp(prefix="chat-tests-"))
+for _name, _value in {
+    "GROQ_BOT1_KEY": "test-key-1",
+    "GROQ_BOT2_KEY": "test-key-2",
+    "CHAT_ADMIN_USERNAME": "admin",
+    "CHAT_ADMIN_PASSWORD": "admin",
+    "CHAT_RUNNER_STANDBY": "false",
+    # Keep the files the panel writes out of the checkout.
+    "CHAT_CHECKPOINT_FILE": str(_scratch / "journal.jsonl"),
+    "CHAT_LOG_ARCHIVE_DIR": str(_scratch / "log_archive"),
+    "CHAT_TOPIC_CACHE": str(_scratch / "topics.json"),
+}.items():
+    os.environ.setdefault(_name, _value)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+import chat_runner
+from chat_events import TurnCompleted, Waiting
+from chat_runner import RESTART_BACKOFF_BASE, ChatRunner
+from config import RESTART_BACKOFF_MAX, WATCHDOG_TIMEOUT
+from groq_client import GroqClient
+from log_buffer import LogBuffer
+
+CONFIG: Dict[str, Any] = {"delay": 30, "typing_speed": 0.01, "max_completion_tokens": 256}
+
+
+class FakeClock:
+    """Monotonic time that only moves when a test advances it."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+        self.waits = 0
+        self.deadline: Optional[float] = None
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def __call__(self) -> float:
+        with self._cond:
+            return self.now
+
+    def wait(self, event: threading.Event, timeout: Optional[float]) -> bool:
+        with self._cond:
+            self.waits += 1
+            self.deadline = math.inf if timeout is None else self.now + timeout
+            self._cond.notify_all()
+            while not event.is_set() and self.now < self.deadline and not self.closed:
+                self._cond.wait(0.002)
+            self.deadline = None
+            if not self.closed:
+                return event.is_set()
+        # The test is over: park the supervisor instead of polling.
+        return event.wait()
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+
+    def advance_to(self, when: float) -> None:
+        with self._cond:
+            self.now = when
+            self._cond.notify_all()
+
+    def next_sleep(self, waits_before: int, timeout: float = 2.0) -> float:
+        """Block until the supervisor sleeps again after ``waits_before`` sleeps; returns its deadline."""
+        give_up = time.monotonic() + timeout
+        with self._cond:
+            while self.waits <= waits_before or self.deadline is None:
+                remaining = give_up - time.monotonic()
+                assert remaining > 0, "supervisor did not go back to sleep"
+                self._cond.wait(remaining)
+            return self.deadline
+
+
+@pytest.fixture
+def supervised():
+    """A runner whose launches are only recorded, supervised on a fake clock."""
+    clock = FakeClock()
+    runner = ChatRunner(
+        LogBuffer(50), mode="inprocess", display=None, standby=False, journal=None, clock=clock, wait=clock.wait
+    )
+    launches: List[Tuple[float, bool]] = []
+
+    def launch(config: Dict[str, Any], *, restarted: bool = False) -> None:
+        launches.append((clock(), restarted))
+        runner._last_progress = clock()
+        runner._grace = 0.0
+
+    runner._launch = launch  # type: ignore[method-assign]
+    assert runner.start(CONFIG)
+    clock.next_sleep(0)
+    yield runner, clock, launches
+    runner.stop()
+    clock.close()
+
+
+def _crash_and_restart(runner: ChatRunner, clock: FakeClock) -> float:
+    """Crash the chat, let the supervisor restart it and return the backoff it used."""
+    crashed_at = clock()
+    waits = clock.waits
+    runner._on_exit(crashed=True)
+    restart_at = clock.next_sleep(waits)
+    waits = clock.waits
+    clock.advance_to(restart_at)
+    clock.next_sleep(waits)
+    return restart_at - crashed_at
+
+
+def test_restarts_back_off_exponentially_up_to_the_cap(supervised, monkeypatch):
+    runner, clock, launches = supervised
+    monkeypatch.setattr(chat_runner, "CRASH_LOOP_LIMIT", 100)
+
+    delays = [_crash_and_restart(runner, clock) for _ in range(8)]
+
+    expected = [min(RESTART_BACKOFF_BASE * 2**index, RESTART_BACKOFF_MAX) for index in range(8)]
+    assert delays == pytest.approx(expected)
+    assert delays[-1] == RESTART_BACKOFF_MAX
+    # Every restart happened exactly when its backoff ran out.
+    assert [restarted for _, restarted in launches] == [False] + [True] * 8
+    assert runner.supervision()["restarts"] == 8
+
+
+def test_a_crash_loop_is_left_down(supervised, monkeypatch):
+    runner, clock, launches = supervised
+    monkeypatch.setattr(chat_runner, "CRASH_LOOP_LIMIT", 3)
+    for _ in range(3):
+        _crash_and_restart(runner, clock)
+
+    waits = clock.waits
+    runner._on_exit(crashed=True)
+
+    assert clock.next_sleep(waits) == math.inf
+    assert runner.supervision()["gave_up"]
+    assert runner.supervision()["restart_in"] is None
+    clock.advance_to(clock() + RESTART_BACKOFF_MAX * 10)
+    assert len(launches) == 4
+
+
+def test_old_crashes_stop_counting(supervised):
+    runner, clock, _ = supervised
+    assert _crash_and_restart(runner, clock) == RESTART_BACKOFF_BASE
+    assert _crash_and_restart(runner, clock) == RESTART_BACKOFF_BASE * 2
+
+    clock.advance_to(clock() + chat_runner.CRASH_LOOP_WINDOW + 1)
+
+    assert _crash_and_restart(runner, clock) == RESTART_BACKOFF_BASE
+
+
+def test_the_watchdog_allows_announced_waits(supervised, monkeypatch):
+    runner, clock, _ = supervised
+    hung: List[float] = []
+
+    def kill_hung(silent_for: float) -> None:
+        hung.append(clock())
+        runner._last_progress = clock()
+
+    monkeypatch.setattr(runner, "is_running", lambda: True)
+    monkeypatch.setattr(runner, "_kill_hung", kill_hung)
+    timeout = runner._watchdog_timeout(CONFIG)
+    started = clock()
+
+    waits = clock.waits
+    runner._wake.set()
+    assert clock.next_sleep(waits) == pytest.approx(started + timeout)
+
+    # A turn ends, then the chat waits ten minutes for its rate limit to reset.
+    clock.advance_to(started + 10)
+    runner._handle_event(TurnCompleted(turn=0, bot="bot1", speaker="Bot 1", model="mock", text="hi"))
+    clock.advance_to(started + 20)
+    runner._handle_event(Waiting(seconds=600, reason="rate_limit", model="mock"))
+    waits = clock.waits
+    clock.advance_to(started + timeout)
+    assert clock.next_sleep(waits) == pytest.approx(started + 20 + 600 + timeout)
+    assert hung == []
+
+    waits = clock.waits
+    clock.advance_to(started + 20 + 600 + timeout)
+    clock.next_sleep(waits)
+    assert hung == [started + 20 + 600 + timeout]
+
+
+def test_the_watchdog_covers_the_api_deadline_and_a_hedge(monkeypatch):
+    client = GroqClient("http://127.0.0.1:9", connect_timeout=5, read_timeout=30, turn_deadline=60)
+    runner = ChatRunner(LogBuffer(10), mode="inprocess", display=None, client=client, standby=False, journal=None)
+    config = {**CONFIG, "typing_speed": 0}
+
+    monkeypatch.setattr(chat_runner, "HEDGE_FALLBACK_MODELS", "")
+    assert runner._watchdog_timeout(config) == WATCHDOG_TIMEOUT + 30 + 95
+    monkeypatch.setattr(chat_runner, "HEDGE_FALLBACK_MODELS", "mock-small")
+    monkeypatch.setattr(chat_runner, "HEDGE_BUDGET", 0.1)
+    assert runner._watchdog_timeout(config) == WATCHDOG_TIMEOUT + 30 + 2 * 95
+
+
+def test_a_start_waits_for_an_engine_that_outlived_its_stop(monkeypatch):
+    release = threading.Event()
+    lock = threading.Lock()
+    running: List[int] = []
+    overlapped: List[int] = []
+
+    def run_conversation(args, *, stop_event, **kwargs) -> None:
+        with lock:
+            running.append(1)
+            if len(running) > 1:
+                overlapped.append(len(running))
+        # Like an HTTP call in flight: the stop is only seen once it returns.
+        release.wait(5)
+        with lock:
+            running.pop()
+        stop_event.wait(5)
+
+    monkeypatch.setattr(chat_runner.chat, "run_conversation", run_conversation)
+    monkeypatch.setattr(chat_runner, "ENGINE_STOP_TIMEOUT", 0.05)
+    monkeypatch.setattr(chat_runner, "ENGINE_DRAIN_POLL", 0.01)
+    runner = ChatRunner(LogBuffer(50), mode="inprocess", display=None, standby=False, journal=None)
+    config = {
+        "topic": "Octopuses",
+        "first_speaker": "bot1",
+        "model": "mock",
+        "max_turns": 0,
+        "delay": 0,
+        "typing_speed": 0,
+        "context_limit": 6,
+    }
+    assert runner.start(config)
+    assert runner.stop()
+
+    assert runner.start(config)
+    assert not runner.is_running()
+    assert runner.supervision()["restart_in"] is not None
+    release.set()
+    give_up = time.monotonic() + 2
+    while not runner.is_running():
+        assert time.monotonic() < give_up, "the waiting start never launched"
+        time.sleep(0.01)
+    runner.stop()
+
+    assert overlapped == []
+    assert runner.supervision()["restarts"] == 0
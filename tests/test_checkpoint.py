@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+import chat
+import control_panel
+from benchmarks.mock_groq import MockGroqServer
+from chat_runner import ChatRunner
+from checkpoint import ConversationJournal
+from conversation import OPENING_SPEAKER, ConversationHistory
+from groq_client import GroqClient
+from log_buffer import LogBuffer
+from settings_store import SettingsStore
+
+
+def _history(*turns: Tuple[str, str]) -> ConversationHistory:
+    history = ConversationHistory("system prompt", 6)
+    history.record(OPENING_SPEAKER, "opening")
+    for speaker, text in turns:
+        history.record(speaker, text)
+    return history
+
+
+def test_load_replays_turns_after_the_snapshot(tmp_path):
+    journal = ConversationJournal(tmp_path / "journal.jsonl")
+    history = _history()
+    journal.begin("Octopuses", "bot2", history)
+    for turn, speaker in enumerate(("bot2", "bot1")):
+        history.record(speaker, f"reply {turn}")
+        journal.record_turn(turn, speaker, f"reply {turn}", history)
+    journal.close()
+
+    checkpoint = ConversationJournal(tmp_path / "journal.jsonl").load()
+    assert checkpoint is not None
+    assert (checkpoint.topic, checkpoint.first_speaker, checkpoint.turn) == ("Octopuses", "bot2", 2)
+    assert checkpoint.restore(6).recent() == history.recent()
+    assert checkpoint.can_resume("Octopuses", max_turns=10)
+
+
+def test_compaction_keeps_the_same_state(tmp_path):
+    journal = ConversationJournal(tmp_path / "journal.jsonl", compact_after=3)
+    history = _history()
+    journal.begin("Octopuses", "bot1", history)
+    for turn in range(7):
+        speaker = "bot1" if turn % 2 == 0 else "bot2"
+        history.record(speaker, f"reply {turn}")
+        journal.record_turn(turn, speaker, f"reply {turn}", history)
+    journal.close()
+
+    lines = (tmp_path / "journal.jsonl").read_text().splitlines()
+    assert len(lines) == 2  # a snapshot after turn 5, then turn 6
+    checkpoint = ConversationJournal(tmp_path / "journal.jsonl").load()
+    assert checkpoint is not None and checkpoint.turn == 7
+    assert checkpoint.restore(6).recent() == history.recent()
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = ConversationJournal(path)
+    history = _history()
+    journal.begin("Octopuses", "bot1", history)
+    history.record("bot1", "reply 0")
+    journal.record_turn(0, "bot1", "reply 0", history)
+    journal.close()
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"t":"turn","turn":1,"spea')
+
+    checkpoint = ConversationJournal(path).load()
+    assert checkpoint is not None and checkpoint.turn == 1
+
+
+@pytest.mark.parametrize(
+    "finished, topic, max_turns, expected",
+    [
+        (False, "Octopuses", 0, True),
+        (False, None, 0, True),
+        (True, "Octopuses", 0, False),
+        (False, "Tea", 0, False),
+        (False, "Octopuses", 4, True),
+        (False, "Octopuses", 3, False),
+    ],
+)
+def test_can_resume(tmp_path, finished, topic, max_turns, expected):
+    journal = ConversationJournal(tmp_path / "journal.jsonl")
+    journal.begin("Octopuses", "bot1", _history(), turn=3)
+    if finished:
+        journal.finish()
+    journal.close()
+    checkpoint = ConversationJournal(tmp_path / "journal.jsonl").load()
+    assert checkpoint is not None
+    assert checkpoint.can_resume(topic, max_turns) is expected
+
+
+class _Topics:
+    def __init__(self, topic: Optional[str]) -> None:
+        self.topic = topic
+        self.taken = 0
+
+    def take(self, *, allow_repeat: bool = True) -> Optional[str]:
+        self.taken += 1
+        return self.topic
+
+
+@pytest.fixture
+def panel(tmp_path, monkeypatch):
+    """The control panel's startup state, with its journal and .env in ``tmp_path``."""
+    journal_path = tmp_path / "journal.jsonl"
+    runner = ChatRunner(LogBuffer(50), standby=False, journal=str(journal_path))
+    topics = _Topics("A brand new fact")
+    monkeypatch.setattr(control_panel, "chat_runner", runner)
+    monkeypatch.setattr(control_panel, "topic_provider", topics)
+    monkeypatch.setattr(control_panel, "settings_store", SettingsStore(tmp_path / ".env", delay=0))
+    monkeypatch.setattr(control_panel, "control_config", {**control_panel.control_config, "max_turns": 10})
+    return journal_path, topics
+
+
+def _journal_conversation(path, topic: str, turns: int, *, finished: bool = False) -> None:
+    journal = ConversationJournal(path)
+    history = _history()
+    journal.begin(topic, "bot1", history)
+    for turn in range(turns):
+        speaker = "bot1" if turn % 2 == 0 else "bot2"
+        history.record(speaker, f"reply {turn}")
+        journal.record_turn(turn, speaker, f"reply {turn}", history)
+    if finished:
+        journal.finish()
+    journal.close()
+
+
+def test_restart_keeps_the_topic_of_an_unfinished_conversation(panel):
+    journal_path, topics = panel
+    _journal_conversation(journal_path, "Octopuses have three hearts", 4)
+
+    control_panel._init_topic()
+
+    assert control_panel.control_config["topic"] == "Octopuses have three hearts"
+    assert topics.taken == 0
+
+
+def test_restart_takes_a_new_topic_after_a_finished_conversation(panel):
+    journal_path, topics = panel
+    _journal_conversation(journal_path, "Octopuses have three hearts", 4, finished=True)
+
+    control_panel._init_topic()
+
+    assert control_panel.control_config["topic"] == "A brand new fact"
+    assert topics.taken == 1
+
+
+def test_restart_takes_a_new_topic_without_a_journal(panel):
+    _, topics = panel
+
+    control_panel._init_topic()
+
+    assert control_panel.control_config["topic"] == "A brand new fact"
+
+
+def _run(args, client: GroqClient, stop_after: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    events: List[Tuple[str, Dict[str, Any]]] = []
+    stop_event = threading.Event()
+
+    def on_event(kind: str, data: Dict[str, Any]) -> None:
+        events.append((kind, data))
+        if stop_after is not None and kind == "turn_end" and data["turn"] + 1 >= stop_after:
+            stop_event.set()
+
+    with open(os.devnull, "w") as out:
+        chat.run_conversation(args, out=out, stop_event=stop_event, on_event=on_event, client=client)
+    return events
+
+
+def test_a_restarted_chat_resumes_where_it_stopped(tmp_path):
+    server = MockGroqServer().start()
+    client = GroqClient(server.endpoint)
+    argv = ["Octopuses", "bot2", "mock", "5", "0", "0", "--journal", str(tmp_path / "journal.jsonl"), "--resume"]
+    try:
+        first = _run(chat.parse_args(argv), client, stop_after=2)
+        # The panel comes back after a reboot and starts the same chat again.
+        second = _run(chat.parse_args(argv), client)
+    finally:
+        client.close()
+        server.stop()
+
+    assert [(data["turn"], data["bot"]) for kind, data in first if kind == "turn_end"] == [(0, "bot2"), (1, "bot1")]
+    assert second[0][0] == "resumed" and second[0][1]["turn"] == 2
+    ended = [(data["turn"], data["bot"]) for kind, data in second if kind == "turn_end"]
+    # The journaled alternation carries on: bot2 opened, so it also has turn 2.
+    assert ended == [(2, "bot2"), (3, "bot1"), (4, "bot2")]
+    checkpoint = ConversationJournal(tmp_path / "journal.jsonl").load()
+    assert checkpoint is not None and checkpoint.finished
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from log_archive import LogArchive
+
+
+def _archive(directory) -> LogArchive:
+    return LogArchive(directory, delay=3600)
+
+
+def _lines(start: int, count: int):
+    return [f"line {index}".encode() for index in range(start, start + count)]
+
+
+def test_appending_after_a_torn_segment_keeps_every_readable_line(tmp_path):
+    archive = _archive(tmp_path)
+    archive.add(_lines(0, 3), 1.0)
+    archive.flush()
+    archive.add(_lines(3, 3), 2.0)
+    archive.flush()
+    archive.close()
+    (segment,) = tmp_path.glob("log-*.jsonl.gz")
+    # A power cut in the middle of the second batch's gzip member.
+    data = segment.read_bytes()
+    segment.write_bytes(data[: len(data) - 5])
+
+    archive = _archive(tmp_path)
+    archive.add(_lines(6, 2), 3.0)
+    archive.flush()
+    records, _ = archive.page(limit=100)
+    archive.close()
+
+    assert len(list(tmp_path.glob("log-*.jsonl.gz"))) == 2
+    ids = [record["id"] for record in records]
+    assert ids == sorted(set(ids))
+    lines = [record["line"] for record in records]
+    assert lines[:3] == ["line 0", "line 1", "line 2"]
+    # The new lines land in a fresh segment, readable past the damage.
+    assert lines[-2:] == ["line 6", "line 7"]
+
+
+def test_a_clean_segment_is_appended_to(tmp_path):
+    archive = _archive(tmp_path)
+    archive.add(_lines(0, 2), 1.0)
+    archive.flush()
+    archive.close()
+
+    archive = _archive(tmp_path)
+    archive.add(_lines(2, 2), 2.0)
+    archive.flush()
+    records, _ = archive.page(limit=100)
+    archive.close()
+
+    assert len(list(tmp_path.glob("log-*.jsonl.gz"))) == 1
+    assert [record["id"] for record in records] == [1, 2, 3, 4]
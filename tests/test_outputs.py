@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from typing import List
+
+from outputs import QueuedSink
+
+GREEN = "\033[92m"
+RESET = "\033[0m"
+
+
+class _StalledTarget:
+    """Blocks its first write until released, like a console that froze for a while."""
+
+    def __init__(self) -> None:
+        self.writes: List[str] = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, chunk: str) -> None:
+        self.entered.set()
+        self.release.wait(5)
+        self.writes.append(chunk)
+
+    def flush(self) -> None:
+        pass
+
+
+def _frames(text: str, size: int) -> List[str]:
+    """``text`` in the small pieces the typewriter writes, cutting lines and escapes anywhere."""
+    return [text[index : index + size] for index in range(0, len(text), size)]
+
+
+def test_overflow_drops_only_whole_lines():
+    target = _StalledTarget()
+    sink = QueuedSink(target, "test", max_pending_bytes=300)
+    sink.write("[Bot 1] half a line ")
+    assert target.entered.wait(2)
+
+    lines = [f"{GREEN}[Bot {index % 2 + 1}] line {index:03d} of the reply{RESET}\n" for index in range(60)]
+    for frame in _frames("".join(lines), 7):
+        sink.write(frame)
+    target.release.set()
+    assert sink.drain(5)
+    sink.close()
+
+    output = "".join(target.writes)
+    written = output.splitlines(keepends=True)
+    # The line in progress when the target stalled is finished, not spliced.
+    assert written[0] == "[Bot 1] half a line " + lines[0]
+    survivors = written[1:]
+    assert survivors, "the newest lines should survive"
+    assert all(line in lines for line in survivors)
+    # What is left is the newest lines, in order and without gaps.
+    assert survivors == lines[len(lines) - len(survivors) :]
+    stats = sink.stats()
+    assert stats["dropped_bytes"] > 0
+    assert stats["dropped_bytes"] == len("".join(lines[1 : len(lines) - len(survivors)]))
+
+
+def test_an_open_line_is_kept_when_nothing_else_can_go():
+    target = _StalledTarget()
+    sink = QueuedSink(target, "test", max_pending_bytes=20)
+    sink.write("start ")
+    assert target.entered.wait(2)
+
+    text = "a long line without a newline yet " * 3
+    for frame in _frames(text, 5):
+        sink.write(frame)
+    target.release.set()
+    assert sink.drain(5)
+    sink.close()
+
+    assert "".join(target.writes) == "start " + text
+    assert sink.stats()["dropped_bytes"] == 0
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import datetime
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+
+from scheduler import (
+    RECHECK_INTERVAL,
+    ChatScheduler,
+    parse_schedule,
+    run_intervals,
+    schedule_state,
+    wall_to_timestamp,
+)
+
+ZoneInfo = pytest.importorskip("zoneinfo").ZoneInfo
+
+BERLIN = ZoneInfo("Europe/Berlin")
+UTC = datetime.timezone.utc
+# Real time a transition may take once its moment has come.
+PROMPT = 0.05
+
+
+def _at(*fields: int, tz: Optional[datetime.tzinfo] = BERLIN) -> float:
+    return wall_to_timestamp(datetime.datetime(*fields), tz)
+
+
+def _utc(*fields: int) -> float:
+    return datetime.datetime(*fields, tzinfo=UTC).timestamp()
+
+
+def _wall(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp, BERLIN).strftime("%a %H:%M")
+
+
+class FakeClock:
+    """Epoch time that only moves when a test advances it."""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+        self.waits = 0
+        self.deadline: Optional[float] = None
+        self._cond = threading.Condition()
+
+    def __call__(self) -> float:
+        with self._cond:
+            return self.now
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        with self._cond:
+            self.waits += 1
+            self.deadline = self.now + timeout
+            self._cond.notify_all()
+            while not event.is_set() and self.now < self.deadline:
+                # notify() sets the event without touching this condition.
+                self._cond.wait(0.002)
+            self.deadline = None
+            return event.is_set()
+
+    def advance_to(self, when: float) -> None:
+        with self._cond:
+            self.now = when
+            self._cond.notify_all()
+
+    def next_sleep(self, waits_before: int, timeout: float = 2.0) -> float:
+        """Block until the scheduler sleeps again after ``waits_before`` sleeps; returns its deadline."""
+        give_up = time.monotonic() + timeout
+        with self._cond:
+            while self.waits <= waits_before or self.deadline is None:
+                remaining = give_up - time.monotonic()
+                assert remaining > 0, "scheduler did not go back to sleep"
+                self._cond.wait(remaining)
+            return self.deadline
+
+
+class FakeRunner:
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+        self.running = False
+        # (action, fake time, real perf_counter) per start and stop.
+        self.transitions: List[Tuple[str, float, float]] = []
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def supervision(self) -> Dict[str, Any]:
+        return {"restart_in": None}
+
+    def start(self, config: Dict[str, Any]) -> bool:
+        self.running = True
+        self.transitions.append(("start", self.clock(), time.perf_counter()))
+        return True
+
+    def stop(self) -> bool:
+        self.running = False
+        self.transitions.append(("stop", self.clock(), time.perf_counter()))
+        return True
+
+
+@pytest.fixture
+def scheduled():
+    schedulers: List[ChatScheduler] = []
+
+    def make(schedule: str, now: float) -> Tuple[ChatScheduler, FakeClock, FakeRunner, Dict[str, Any]]:
+        clock = FakeClock(now)
+        runner = FakeRunner(clock)
+        config: Dict[str, Any] = {"schedule": schedule}
+        scheduler = ChatScheduler(runner, config, clock=clock, wait=clock.wait, timezone=BERLIN)  # type: ignore[arg-type]
+        schedulers.append(scheduler)
+        scheduler.start()
+        return scheduler, clock, runner, config
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown()
+
+
+def test_sleeps_until_exactly_the_window_start(scheduled):
+    scheduler, clock, runner, _ = scheduled("daily 07:00-09:00", _at(2024, 3, 25, 6, 59, 30))
+
+    deadline = clock.next_sleep(0)
+
+    assert deadline == pytest.approx(_at(2024, 3, 25, 7, 0), abs=1e-6)
+    assert scheduler.next_transition() == (False, pytest.approx(deadline))
+    assert runner.transitions == []
+
+
+def test_transitions_fire_within_milliseconds(scheduled):
+    _, clock, runner, _ = scheduled("daily 07:00-09:00", _at(2024, 3, 25, 6, 59, 30))
+
+    waits = 0
+    for action, wall in (("start", (7, 0)), ("stop", (9, 0))):
+        target = _at(2024, 3, 25, *wall)
+        deadline = clock.next_sleep(waits)
+        while deadline < target:
+            # Sleeps inside the window are capped at RECHECK_INTERVAL.
+            waits = clock.waits
+            clock.advance_to(deadline)
+            deadline = clock.next_sleep(waits)
+        assert deadline == pytest.approx(target, abs=1e-6)
+        waits = clock.waits
+        released = time.perf_counter()
+        clock.advance_to(deadline)
+        clock.next_sleep(waits)
+        fired_action, fired_at, fired_real = runner.transitions[-1]
+        assert fired_action == action
+        assert fired_at == deadline
+        assert fired_real - released < PROMPT
+
+
+def test_starts_at_once_inside_a_window(scheduled):
+    _, clock, runner, _ = scheduled("daily 07:00-09:00", _at(2024, 3, 25, 8, 0))
+
+    deadline = clock.next_sleep(0)
+
+    assert [action for action, _, _ in runner.transitions] == ["start"]
+    assert deadline == pytest.approx(_at(2024, 3, 25, 8, 0) + RECHECK_INTERVAL)
+
+
+def test_notify_applies_a_new_schedule_without_waiting(scheduled):
+    scheduler, clock, runner, config = scheduled("", _at(2024, 3, 25, 12, 0))
+    clock.next_sleep(0)
+    assert scheduler.next_transition() == (False, None)
+
+    waits = clock.waits
+    config["schedule"] = "daily 11:00-13:00"
+    notified = time.perf_counter()
+    scheduler.notify()
+    deadline = clock.next_sleep(waits)
+
+    assert [action for action, _, _ in runner.transitions] == ["start"]
+    assert runner.transitions[0][2] - notified < PROMPT
+    # The clock never moved: the change was picked up on notify alone.
+    assert runner.transitions[0][1] == _at(2024, 3, 25, 12, 0)
+    assert scheduler.next_transition() == (True, pytest.approx(_at(2024, 3, 25, 13, 0)))
+    assert deadline == pytest.approx(_at(2024, 3, 25, 12, 0) + RECHECK_INTERVAL)
+
+
+def test_a_chat_that_ends_inside_a_window_is_started_again(scheduled):
+    _, clock, runner, _ = scheduled("daily 11:00-13:00", _at(2024, 3, 25, 12, 0))
+    deadline = clock.next_sleep(0)
+    runner.running = False  # finished its turns, or crashed for good
+
+    waits = clock.waits
+    clock.advance_to(deadline)
+    clock.next_sleep(waits)
+
+    assert [(action, at) for action, at, _ in runner.transitions] == [
+        ("start", _at(2024, 3, 25, 12, 0)),
+        ("start", _at(2024, 3, 25, 12, 0) + RECHECK_INTERVAL),
+    ]
+    assert runner.running
+
+
+def test_a_manual_stop_is_kept_until_the_next_transition(scheduled):
+    scheduler, clock, runner, _ = scheduled("daily 11:00-13:00", _at(2024, 3, 25, 12, 0))
+    clock.next_sleep(0)
+    scheduler.hold()
+    runner.stop()  # stopped from the panel
+
+    waits = clock.waits
+    scheduler.notify()
+    deadline = clock.next_sleep(waits)
+    while deadline < _at(2024, 3, 26, 11, 0):
+        waits = clock.waits
+        clock.advance_to(deadline)
+        deadline = clock.next_sleep(waits)
+    waits = clock.waits
+    clock.advance_to(deadline)
+    clock.next_sleep(waits)
+
+    # Off for the rest of the window, back on when the next one opens.
+    assert [(action, _wall(at)) for action, at, _ in runner.transitions] == [
+        ("start", "Mon 12:00"),
+        ("stop", "Mon 12:00"),
+        ("start", "Tue 11:00"),
+    ]
+
+
+def test_a_restart_pending_in_the_runner_is_left_to_it(scheduled):
+    _, clock, runner, _ = scheduled("daily 11:00-13:00", _at(2024, 3, 25, 12, 0))
+    deadline = clock.next_sleep(0)
+    runner.running = False
+    runner.supervision = lambda: {"restart_in": 4.0}  # type: ignore[method-assign]
+
+    waits = clock.waits
+    clock.advance_to(deadline)
+    clock.next_sleep(waits)
+
+    assert [action for action, _, _ in runner.transitions] == ["start"]
+
+
+def test_multiple_windows_across_a_weekend_with_a_dst_change(scheduled):
+    # Friday 29 March 2024; Berlin moves its clocks forward early on Sunday.
+    _, clock, runner, _ = scheduled(
+        "mon-fri 07:00-09:00, 17:30-23:00; sat,sun 10:00-22:00", _at(2024, 3, 29, 6, 0)
+    )
+    end = _at(2024, 4, 1, 0, 0)
+    waits = 0
+    while True:
+        deadline = clock.next_sleep(waits)
+        waits = clock.waits
+        if deadline > end:
+            break
+        clock.advance_to(deadline)
+
+    fired = [(action, _wall(at)) for action, at, _ in runner.transitions]
+    assert fired == [
+        ("start", "Fri 07:00"),
+        ("stop", "Fri 09:00"),
+        ("start", "Fri 17:30"),
+        ("stop", "Fri 23:00"),
+        ("start", "Sat 10:00"),
+        ("stop", "Sat 22:00"),
+        ("start", "Sun 10:00"),
+        ("stop", "Sun 22:00"),
+    ]
+    # Every transition happened at its exact instant, never a poll later.
+    expected = [
+        _at(2024, 3, 29, 7, 0),
+        _at(2024, 3, 29, 9, 0),
+        _at(2024, 3, 29, 17, 30),
+        _at(2024, 3, 29, 23, 0),
+        _at(2024, 3, 30, 10, 0),
+        _at(2024, 3, 30, 22, 0),
+        _at(2024, 3, 31, 10, 0),
+        _at(2024, 3, 31, 22, 0),
+    ]
+    assert [at for _, at, _ in runner.transitions] == expected
+
+
+def test_overlapping_windows_merge_and_overnight_windows_wrap():
+    windows = parse_schedule("daily 07:00-09:00, 08:00-10:00, 22:00-02:00")
+    now = _at(2024, 3, 25, 6, 0)
+
+    intervals = run_intervals(windows, now, BERLIN)
+    today = [(start, stop) for start, stop in intervals if _at(2024, 3, 25, 0, 0) <= start < _at(2024, 3, 26, 0, 0)]
+
+    assert today == [
+        (_at(2024, 3, 25, 7, 0), _at(2024, 3, 25, 10, 0)),
+        (_at(2024, 3, 25, 22, 0), _at(2024, 3, 26, 2, 0)),
+    ]
+    assert schedule_state(windows, _at(2024, 3, 26, 1, 0), BERLIN) == (True, _at(2024, 3, 26, 2, 0))
+
+
+def test_bad_rules_are_rejected():
+    with pytest.raises(ValueError):
+        parse_schedule("mon-fri 7-9")
+    with pytest.raises(ValueError):
+        parse_schedule("someday 07:00-09:00")
+
+
+def test_wall_times_outside_dst_changes_map_directly():
+    assert _at(2024, 1, 15, 12, 0) == _utc(2024, 1, 15, 11, 0)
+    assert _at(2024, 7, 15, 12, 0) == _utc(2024, 7, 15, 10, 0)
+
+
+def test_a_time_skipped_by_the_spring_gap_resolves_to_the_jump():
+    # 02:00-03:00 does not exist in Berlin on 31 March 2024.
+    jump = _utc(2024, 3, 31, 1, 0)
+
+    assert _at(2024, 3, 31, 2, 30) == pytest.approx(jump, abs=0.01)
+    assert _at(2024, 3, 31, 2, 0) == pytest.approx(jump, abs=0.01)
+    assert _at(2024, 3, 31, 3, 0) == jump
+
+
+def test_a_time_repeated_by_the_autumn_fold_resolves_to_its_first_occurrence():
+    # 02:00-03:00 happens twice in Berlin on 27 October 2024: first in CEST.
+    assert _at(2024, 10, 27, 2, 30) == _utc(2024, 10, 27, 0, 30)
+    assert _at(2024, 10, 27, 3, 0) == _utc(2024, 10, 27, 2, 0)
+
+
+def test_windows_inside_a_dst_gap_and_fold():
+    gap = parse_schedule("daily 02:30-03:30")
+    assert schedule_state(gap, _utc(2024, 3, 30, 23, 0), BERLIN) == (
+        False,
+        pytest.approx(_utc(2024, 3, 31, 1, 0), abs=0.01),
+    )
+    assert schedule_state(gap, _utc(2024, 3, 31, 1, 0), BERLIN) == (True, _utc(2024, 3, 31, 1, 30))
+
+    fold = parse_schedule("daily 02:30-03:30")
+    # Starts at the first 02:30 and runs through the repeated hour to 03:30 CET.
+    assert schedule_state(fold, _utc(2024, 10, 27, 0, 0), BERLIN) == (False, _utc(2024, 10, 27, 0, 30))
+    assert schedule_state(fold, _utc(2024, 10, 27, 1, 15), BERLIN) == (True, _utc(2024, 10, 27, 2, 30))
+
+
+def test_a_daily_start_keeps_its_wall_time_across_dst():
+    daily = parse_schedule("daily 07:00-08:00")
+    before = schedule_state(daily, _utc(2024, 3, 30, 0, 0), BERLIN)
+    after = schedule_state(daily, _utc(2024, 3, 31, 0, 0), BERLIN)
+
+    assert before == (False, _utc(2024, 3, 30, 6, 0))
+    assert after == (False, _utc(2024, 3, 31, 5, 0))
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from topic_provider import TopicProvider
+
+
+def _provider(path) -> TopicProvider:
+    return TopicProvider(path, fetch=lambda: None)
+
+
+def test_a_taken_topic_is_gone_after_a_reload(tmp_path):
+    path = tmp_path / "topics.json"
+    provider = _provider(path)
+    for topic in ("Octopuses have three hearts", "Honey never spoils", "Bananas are berries"):
+        provider._offer(topic)
+    provider._save()
+
+    assert provider.take() == "Octopuses have three hearts"
+    # No stop(), as after a power cut: the removal must already be on disk.
+    reloaded = _provider(path)
+
+    assert reloaded.take() == "Honey never spoils"
+    assert _provider(path).take() == "Bananas are berries"
+    assert len(_provider(path)) == 0
+
+
+def test_a_repeat_from_history_survives_a_reload(tmp_path):
+    path = tmp_path / "topics.json"
+    provider = _provider(path)
+    provider._offer("Octopuses have three hearts")
+    provider.take()
+
+    reloaded = _provider(path)
+
+    assert len(reloaded) == 0
+    assert reloaded.take() == "Octopuses have three hearts"
+    assert reloaded.take(allow_repeat=False) is None
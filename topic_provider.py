@@ -0,0 +1,239 @@
+"""Prefetched conversation topics from the uselessfacts API.
+
+A worker thread keeps a small queue of deduplicated English facts topped
+up, so handing one out never waits on the network. The queue, a short
+history of served topics and the dedupe set are cached on disk, so the
+panel starts with a fresh topic straight away (and still has some to offer
+when it boots offline).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+
+import requests
+
+from config import TOPIC_CACHE_FILE, TOPIC_PREFETCH
+
+USELESS_FACTS_ENDPOINT = "https://uselessfacts.jsph.pl/api/v2/facts/random"
+FETCH_TIMEOUT = 10.0
+# Normalised topics remembered so the same fact isn't queued twice.
+SEEN_LIMIT = 1000
+# Served topics kept to fall back on when the queue is empty and the API is down.
+HISTORY_LIMIT = 100
+RETRY_MIN = 5.0
+RETRY_MAX = 300.0
+
+_NORMALISE_RE = re.compile(r"[\W_]+")
+
+
+def normalise_topic(text: str) -> str:
+    return _NORMALISE_RE.sub(" ", text.casefold()).strip()
+
+
+def fetch_uselessfacts_topic(
+    session: Optional[requests.Session] = None, timeout: float = FETCH_TIMEOUT
+) -> Optional[str]:
+    """One random English fact, or None if the API failed or answered in another language."""
+    try:
+        response = (session or requests).get(USELESS_FACTS_ENDPOINT, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    text = data.get("text") or data.get("fact")
+    if not isinstance(text, str):
+        return None
+
+    text = text.strip()
+    if not text:
+        return None
+
+    language = data.get("language")
+    if isinstance(language, str) and language and not language.lower().startswith("en"):
+        return None
+
+    return text
+
+
+class TopicProvider:
+    """Hands out prefetched topics while a worker refills the queue.
+
+    ``fetch`` returns one candidate topic or None; it defaults to the
+    uselessfacts API over a keep-alive session.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path | str = TOPIC_CACHE_FILE,
+        *,
+        target: int = TOPIC_PREFETCH,
+        fetch: Optional[Callable[[], Optional[str]]] = None,
+    ) -> None:
+        self.cache_path = Path(cache_path)
+        self.target = max(target, 1)
+        self._session = requests.Session()
+        self._fetch = fetch or (lambda: fetch_uselessfacts_topic(self._session))
+        self._queue: Deque[str] = deque()
+        self._history: Deque[str] = deque(maxlen=HISTORY_LIMIT)
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serialises cache writes, so an older snapshot never replaces a newer one.
+        self._save_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._dirty = False
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    # --- public API ---------------------------------------------------------
+
+    def start(self) -> "TopicProvider":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="topic-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=FETCH_TIMEOUT + 1)
+        self._save()
+
+    def take(self, *, allow_repeat: bool = True) -> Optional[str]:
+        """The next prefetched topic, without blocking.
+
+        With an empty queue this falls back to the least recently served
+        topic (unless ``allow_repeat`` is false) and returns None only when
+        there has never been one. A topic taken from the queue is removed
+        from the disk cache before returning, so a restart never serves it
+        again as new.
+        """
+        with self._lock:
+            consumed = bool(self._queue)
+            if consumed:
+                topic = self._queue.popleft()
+                self._history.append(topic)
+            elif allow_repeat and self._history:
+                topic = self._history.popleft()
+                self._history.append(topic)
+            else:
+                topic = None
+            self._dirty = True
+        if consumed:
+            self._save()
+        self._wake.set()
+        return topic
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    # --- worker -------------------------------------------------------------
+
+    def _run(self) -> None:
+        retry = RETRY_MIN
+        while not self._stop.is_set():
+            self._wake.clear()
+            if len(self) >= self.target:
+                self._save_if_dirty()
+                self._wake.wait()
+                continue
+            topic = self._fetch()
+            if topic is None:
+                # Offline or the API is failing: back off before the next try.
+                self._save_if_dirty()
+                self._stop.wait(retry)
+                retry = min(retry * 2, RETRY_MAX)
+                continue
+            retry = RETRY_MIN
+            self._offer(topic)
+
+    def _offer(self, topic: str) -> bool:
+        key = normalise_topic(topic)
+        with self._lock:
+            if not key or key in self._seen:
+                return False
+            self._seen[key] = None
+            while len(self._seen) > SEEN_LIMIT:
+                self._seen.popitem(last=False)
+            self._queue.append(topic)
+            self._dirty = True
+        return True
+
+    # --- persistence --------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            logging.warning("Ignoring unreadable topic cache %s", self.cache_path, exc_info=True)
+            return
+        if not isinstance(data, dict):
+            return
+        self._queue.extend(str(topic) for topic in data.get("queue", []) if topic)
+        self._history.extend(str(topic) for topic in data.get("history", []) if topic)
+        for key in data.get("seen", [])[-SEEN_LIMIT:]:
+            self._seen[str(key)] = None
+
+    def _save_if_dirty(self) -> None:
+        if self._dirty:
+            self._save()
+
+    def _save(self) -> None:
+        with self._save_lock:
+            with self._lock:
+                data: Dict[str, Any] = {
+                    "queue": list(self._queue),
+                    "history": list(self._history),
+                    "seen": list(self._seen),
+                }
+                self._dirty = False
+            try:
+                self._write(data)
+            except OSError:
+                logging.warning("Failed to write topic cache %s", self.cache_path, exc_info=True)
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        directory = self.cache_path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".topics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, ensure_ascii=False)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_path, self.cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        # Make the rename itself durable.
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+
+__all__ = [
+    "TopicProvider",
+    "USELESS_FACTS_ENDPOINT",
+    "fetch_uselessfacts_topic",
+    "normalise_topic",
+]